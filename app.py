@@ -1,42 +1,142 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+import re
+import base64
+import sys
+import time
+_import_started = time.perf_counter()
+
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, session, jsonify, send_file, has_request_context, has_app_context, stream_with_context, g
+from flask.sessions import SessionInterface, SessionMixin
+from flask.json.tag import TaggedJSONSerializer
 from flask_sqlalchemy import SQLAlchemy
+from itsdangerous import Signer, BadSignature
+from markupsafe import escape
+from werkzeug.datastructures import CallbackDict
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, date, timedelta
 import secrets
 import json
+import csv
+import io
 from sqlalchemy import func, extract
 import traceback
+import threading
+import bisect
+import hashlib
+import cProfile
+import contextlib
+import functools
+import math
+import queue
+import concurrent.futures
+import random
+import socket
+import sqlite3
+import shutil
+import urllib.parse
+import click
+import smtplib
+from email.message import EmailMessage
+from collections import OrderedDict, namedtuple
 
 # SQLAlchemy 2.0 compatibility
 import sqlalchemy as sa
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+try:
+    import numpy as np  # optional, for /admin/analytics
+except ImportError:
+    np = None
+
+try:
+    import orjson  # optional, faster JSON encoding for the list endpoints
+except ImportError:
+    orjson = None
 
 class Base(DeclarativeBase):
     pass
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
+
+def load_secret_key():
+    """SECRET_KEY from the environment, else a key persisted in the instance folder.
+
+    Every worker and every restart must sign cookies with the same key.
+    """
+    key = os.environ.get('SECRET_KEY')
+    if key:
+        return key
+    os.makedirs(app.instance_path, exist_ok=True)
+    path = os.path.join(app.instance_path, 'secret_key')
+    if not os.path.exists(path):
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp, path)  # atomic; a concurrent worker may win the race
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp)
+    with open(path) as f:
+        return f.read().strip()
+
+app.secret_key = load_secret_key()
 
 # Database Configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///evento.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///evento.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Seconds a SQLite statement waits for another writer's lock before failing
+app.config['SQLITE_BUSY_TIMEOUT'] = float(os.environ.get('SQLITE_BUSY_TIMEOUT', 5))
+if app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': app.config['SQLITE_BUSY_TIMEOUT']}}
+# Create tables and seed data lazily on the first request (see ensure_db)
+app.config['AUTO_INIT_DB'] = os.environ.get('EVENTO_AUTO_INIT_DB', '1') == '1'
+
+# Session Configuration: 'sql' (session table in the app database) or 'redis'
+# (SESSION_REDIS_URL, or a file-backed local stand-in when that is unset)
+app.config['SESSION_BACKEND'] = os.environ.get('SESSION_BACKEND', 'sql')
+app.config['SESSION_REDIS_URL'] = os.environ.get('SESSION_REDIS_URL')
+app.config['SESSION_SWEEP_INTERVAL'] = 300  # seconds between expired-session sweeps
+app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
 db = SQLAlchemy(app, model_class=Base)
 
 # Database Models
+DEFAULT_TENANT_ID = 1  # the organizer every pre-tenant row belongs to
+
+def tenant_column():
+    """tenant_id for tenant-scoped tables; ORM inserts are stamped in before_flush"""
+    return db.Column(db.Integer, db.ForeignKey('tenant.id'), nullable=False,
+                     default=lambda: current_tenant_id(), server_default=str(DEFAULT_TENANT_ID))
+
+class Tenant(db.Model):
+    """An event organizer; resolved per request from the host name or the /t/<slug> path prefix"""
+    id = db.Column(db.Integer, primary_key=True)
+    slug = db.Column(db.String(50), unique=True, nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    host = db.Column(db.String(255), unique=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    tenant_id = tenant_column()
     name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(100), unique=True, nullable=False)
+    email = db.Column(db.String(100), nullable=False)
     phone = db.Column(db.String(15))
     password = db.Column(db.String(200), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_admin = db.Column(db.Boolean, default=False)
     bookings = db.relationship('Booking', backref='user', lazy=True, cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.UniqueConstraint('tenant_id', 'email', name='uq_user_tenant_email'),
+    )
+
 class Booking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     booking_id = db.Column(db.String(20), unique=True, nullable=False)
+    tenant_id = tenant_column()
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     first_name = db.Column(db.String(50), nullable=False)
     last_name = db.Column(db.String(50), nullable=False)
@@ -60,16 +160,33 @@ class Booking(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # Booking history: one user's bookings, newest first
+        db.Index('ix_booking_user_created', 'user_id', 'created_at', 'id'),
+        # Admin bookings list: a tenant's bookings, newest first
+        db.Index('ix_booking_tenant_created', 'tenant_id', 'created_at'),
+        # Delta sync: a tenant's bookings changed since a watermark
+        db.Index('ix_booking_tenant_updated', 'tenant_id', 'updated_at', 'id'),
+        # Hall availability on a date
+        db.Index('ix_booking_tenant_event_date_hall', 'tenant_id', 'event_date', 'hall_name'),
+    )
+
 class Service(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    tenant_id = tenant_column()
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     price = db.Column(db.Integer, nullable=False)
     category = db.Column(db.String(50))  # venue, invitation, entertainment, etc.
     is_active = db.Column(db.Boolean, default=True)
 
+    __table_args__ = (
+        db.Index('ix_service_tenant_name', 'tenant_id', 'name'),
+    )
+
 class Hall(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    tenant_id = tenant_column()
     name = db.Column(db.String(100), nullable=False)
     location = db.Column(db.String(100))
     description = db.Column(db.Text)
@@ -78,32 +195,314 @@ class Hall(db.Model):
     image_url = db.Column(db.String(200))
     is_active = db.Column(db.Boolean, default=True)
 
+    __table_args__ = (
+        db.Index('ix_hall_tenant_name', 'tenant_id', 'name'),
+    )
+
 class Package(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    tenant_id = tenant_column()
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
     price = db.Column(db.Integer, nullable=False)
     features = db.Column(db.Text)  # JSON string of features
     is_active = db.Column(db.Boolean, default=True)
 
+    __table_args__ = (
+        db.Index('ix_package_tenant_name', 'tenant_id', 'name'),
+    )
+
+class CacheVersion(db.Model):
+    """Version counters for cached views; bumped in the same transaction as the data"""
+    name = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class Job(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = tenant_column()  # the organizer that queued it; handlers run scoped to it
+    name = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.Text, default='{}')  # JSON keyword arguments for the handler
+    priority = db.Column(db.Integer, default=0)  # higher runs first
+    status = db.Column(db.String(20), default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=5)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_job_dequeue', 'status', 'priority', 'run_at'),
+        db.Index('ix_job_tenant_status', 'tenant_id', 'status'),
+    )
+
+class Notification(db.Model):
+    """Outbox of customer notifications, written in the same commit as the booking change"""
+    id = db.Column(db.Integer, primary_key=True)
+    booking_id = db.Column(db.String(20), nullable=False)
+    channel = db.Column(db.String(20), nullable=False)  # email
+    recipient = db.Column(db.String(100), nullable=False)
+    kind = db.Column(db.String(30), nullable=False)  # booking_created, status_changed
+    payload = db.Column(db.Text, default='{}')
+    status = db.Column(db.String(20), default='pending')  # pending, sending, sent, superseded, failed
+    attempts = db.Column(db.Integer, default=0)
+    claimed_at = db.Column(db.DateTime)
+    retry_at = db.Column(db.DateTime)  # set after a failed delivery
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_notification_status', 'status', 'booking_id', 'id'),
+    )
+
+class BookingTombstone(db.Model):
+    """Deleted booking IDs for delta sync, filled by a trigger on booking deletes"""
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = tenant_column()
+    booking_id = db.Column(db.String(20), nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_booking_tombstone_tenant_deleted', 'tenant_id', 'deleted_at', 'id'),
+    )
+
+class BookingPartitionIndex(db.Model):
+    """Partition year of each archived booking, so a lookup by booking_id opens one partition"""
+    booking_id = db.Column(db.String(20), primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+
+class BookingDailyRollup(db.Model):
+    """Per-day booking counts, guests and revenue, kept current by triggers on booking.
+    Missing hall/package names are stored as ''."""
+    tenant_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)  # date the booking was made
+    event_type = db.Column(db.String(50), primary_key=True)
+    hall_name = db.Column(db.String(100), primary_key=True, default='')
+    package_name = db.Column(db.String(100), primary_key=True, default='')
+    status = db.Column(db.String(20), primary_key=True)
+    bookings = db.Column(db.Integer, nullable=False, default=0)
+    guests = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Integer, nullable=False, default=0)
+
+class ChangeEvent(db.Model):
+    """Append-only log of booking/user changes feeding the admin live stream"""
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = tenant_column()
+    kind = db.Column(db.String(30), nullable=False)  # booking_created, booking_status, user_added
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class IdempotencyKey(db.Model):
+    """Responses of completed writes, replayed when a client retries with the same key"""
+    user_id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    response = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+class ServerSession(db.Model):
+    sid = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
 # Create tables and initial data
-with app.app_context():
-    db.create_all()
-    
+# Nothing here runs at import time: workers boot without touching the database.
+# Use `flask --app app init-db` / `flask --app app seed` to prepare a database
+# explicitly, or let ensure_db() do it lazily on the first request.
+_db_ready = False
+_db_init_lock = threading.Lock()
+
+def _begin_immediate():
+    """Take SQLite's write lock so concurrent workers initialize one at a time"""
+    if db.engine.dialect.name == 'sqlite':
+        db.session.execute(sa.text('BEGIN IMMEDIATE'))
+
+# Full-text index over bookings (SQLite FTS5, external content = booking table)
+BOOKING_FTS_COLUMNS = ['booking_id', 'first_name', 'last_name', 'email', 'phone',
+                       'hall_name', 'package_name', 'service_name', 'special_requests']
+
+def _booking_fts_ddl():
+    cols = ', '.join(BOOKING_FTS_COLUMNS)
+    new_cols = ', '.join(f'new.{c}' for c in BOOKING_FTS_COLUMNS)
+    old_cols = ', '.join(f'old.{c}' for c in BOOKING_FTS_COLUMNS)
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS booking_fts USING fts5(
+            {cols}, content='booking', content_rowid='id', prefix='2 3')""",
+        f"""CREATE TRIGGER IF NOT EXISTS booking_fts_ai AFTER INSERT ON booking BEGIN
+            INSERT INTO booking_fts(rowid, {cols}) VALUES (new.id, {new_cols});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS booking_fts_ad AFTER DELETE ON booking BEGIN
+            INSERT INTO booking_fts(booking_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS booking_fts_au AFTER UPDATE OF {cols} ON booking BEGIN
+            INSERT INTO booking_fts(booking_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+            INSERT INTO booking_fts(rowid, {cols}) VALUES (new.id, {new_cols});
+        END""",
+    ]
+
+# Every delete from booking (ORM, bulk query or purge) leaves a tombstone.
+# deleted_at uses the same UTC text format SQLAlchemy writes for DateTime.
+BOOKING_TOMBSTONE_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS booking_tombstone_ad AFTER DELETE ON booking BEGIN
+    INSERT INTO booking_tombstone(tenant_id, booking_id, deleted_at) VALUES (
+        old.tenant_id, old.booking_id,
+        strftime('%Y-%m-%d %H:%M:%S', 'now') || '.' || substr(strftime('%f', 'now'), 4) || '000'
+    );
+END"""
+
+ROLLUP_KEY = "{0}.tenant_id, date({0}.created_at), {0}.event_type, coalesce({0}.hall_name, ''), coalesce({0}.package_name, ''), coalesce({0}.status, 'pending')"
+ROLLUP_KEY_COLUMNS = 'tenant_id, day, event_type, hall_name, package_name, status'
+ROLLUP_SOURCE_COLUMNS = 'tenant_id, created_at, event_type, hall_name, package_name, status, guests, total_amount'
+
+def _rollup_add(row, sign):
+    return f"""
+    INSERT INTO booking_daily_rollup({ROLLUP_KEY_COLUMNS}, bookings, guests, revenue)
+    VALUES ({ROLLUP_KEY.format(row)}, {sign}1, {sign}{row}.guests, {sign}{row}.total_amount)
+    ON CONFLICT({ROLLUP_KEY_COLUMNS}) DO UPDATE SET
+        bookings = bookings + excluded.bookings,
+        guests = guests + excluded.guests,
+        revenue = revenue + excluded.revenue;"""
+
+def _rollup_prune(row):
+    return f"""
+    DELETE FROM booking_daily_rollup WHERE bookings = 0
+        AND ({ROLLUP_KEY_COLUMNS}) = ({ROLLUP_KEY.format(row)});"""
+
+def _booking_rollup_ddl():
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS booking_rollup_ai AFTER INSERT ON booking BEGIN{_rollup_add('new', '+')}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS booking_rollup_ad AFTER DELETE ON booking BEGIN{_rollup_add('old', '-')}{_rollup_prune('old')}\nEND",
+        f"CREATE TRIGGER IF NOT EXISTS booking_rollup_au AFTER UPDATE OF {ROLLUP_SOURCE_COLUMNS} ON booking BEGIN"
+        f"{_rollup_add('old', '-')}{_rollup_prune('old')}{_rollup_add('new', '+')}\nEND",
+    ]
+
+def rebuild_booking_rollups(conn):
+    """Recompute every rollup row from the booking table and its archived partitions"""
+    conn.exec_driver_sql("DELETE FROM booking_daily_rollup")
+    tables = ['main.booking'] + [f'bookings_{year}.booking' for year in conn.info.get('booking_partitions', {})]
+    for table in tables:
+        conn.exec_driver_sql(f"""
+            INSERT INTO booking_daily_rollup({ROLLUP_KEY_COLUMNS}, bookings, guests, revenue)
+            SELECT {ROLLUP_KEY.format('booking')}, count(*), coalesce(sum(guests), 0), coalesce(sum(total_amount), 0)
+            FROM {table} AS booking GROUP BY 1, 2, 3, 4, 5, 6
+            ON CONFLICT({ROLLUP_KEY_COLUMNS}) DO UPDATE SET
+                bookings = bookings + excluded.bookings,
+                guests = guests + excluded.guests,
+                revenue = revenue + excluded.revenue""")
+
+def missing_columns_ddl(table, existing, dialect):
+    """ALTER TABLE ... ADD COLUMN for each model column an existing table lacks"""
+    quote = dialect.identifier_preparer.quote
+    statements = []
+    for column in table.columns:
+        if column.name in existing:
+            continue
+        ddl = f'ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column.type.compile(dialect)}'
+        if column.server_default is not None:
+            ddl += f' DEFAULT {column.server_default.arg}'
+            if not column.nullable:
+                ddl += ' NOT NULL'
+        statements.append(ddl)
+    return statements
+
+# Indexes replaced by tenant-leading ones
+RETIRED_INDEXES = ['ix_booking_updated', 'ix_booking_event_date_hall', 'ix_booking_tombstone_deleted']
+
+def upgrade_sqlite_schema(conn):
+    """Bring a database created before multi-tenancy up to the current models.
+
+    create_all only creates missing tables, so existing ones get their new
+    columns here (pre-tenant rows belong to DEFAULT_TENANT_ID), user is rebuilt
+    without its global unique email, and the rollups are dropped to be rebuilt
+    with tenant_id in their key.
+    """
+    tables = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    columns = {
+        table.name: {row[1] for row in conn.exec_driver_sql(f'PRAGMA table_info("{table.name}")')}
+        for table in db.metadata.sorted_tables if table.name in tables
+    }
+    if 'booking_daily_rollup' in columns and 'tenant_id' not in columns['booking_daily_rollup']:
+        for trigger in ('booking_rollup_ai', 'booking_rollup_ad', 'booking_rollup_au'):
+            conn.exec_driver_sql(f'DROP TRIGGER IF EXISTS {trigger}')
+        conn.exec_driver_sql('DROP TABLE booking_daily_rollup')
+        del columns['booking_daily_rollup']
+    if 'booking_tombstone' in columns and 'tenant_id' not in columns['booking_tombstone']:
+        conn.exec_driver_sql('DROP TRIGGER IF EXISTS booking_tombstone_ad')  # recreated with tenant_id
+    if 'user' in columns and 'tenant_id' not in columns['user']:
+        # SQLite cannot drop the old UNIQUE(email), so copy into a fresh table
+        create = str(sa.schema.CreateTable(User.__table__).compile(dialect=conn.dialect))
+        quoted = conn.dialect.identifier_preparer.format_table(User.__table__)
+        conn.exec_driver_sql(create.replace(f'CREATE TABLE {quoted}', 'CREATE TABLE user_new', 1))
+        copied = ', '.join(f'"{name}"' for name in sorted(columns['user']))
+        conn.exec_driver_sql(f'INSERT INTO user_new ({copied}) SELECT {copied} FROM "user"')
+        conn.exec_driver_sql('DROP TABLE "user"')
+        conn.exec_driver_sql('ALTER TABLE user_new RENAME TO "user"')
+        del columns['user']
+    for table in db.metadata.sorted_tables:
+        if table.name in columns:
+            for statement in missing_columns_ddl(table, columns[table.name], conn.dialect):
+                conn.exec_driver_sql(statement)
+    for index in RETIRED_INDEXES:
+        conn.exec_driver_sql(f'DROP INDEX IF EXISTS main.{index}')
+
+def create_schema():
+    conn = db.session.connection()
+    has_partition_index = True
+    if conn.dialect.name == 'sqlite':
+        upgrade_sqlite_schema(conn)
+        has_partition_index = conn.exec_driver_sql(
+            "SELECT 1 FROM main.sqlite_master WHERE name = 'booking_partition_index'"
+        ).first()
+    db.metadata.create_all(bind=conn)
+    # create_all skips indexes added to tables that already exist
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=conn, checkfirst=True)
+    if db.session.get(Tenant, DEFAULT_TENANT_ID) is None:
+        db.session.add(Tenant(id=DEFAULT_TENANT_ID, slug='default', name='Evento'))
+        db.session.flush()
+    if conn.dialect.name == 'sqlite':
+        conn.exec_driver_sql(BOOKING_TOMBSTONE_TRIGGER)
+        exists = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'booking_fts'"
+        ).first()
+        for statement in _booking_fts_ddl():
+            conn.exec_driver_sql(statement)
+        if not exists:
+            # Index bookings that were created before the FTS table existed
+            conn.exec_driver_sql("INSERT INTO booking_fts(booking_fts) VALUES ('rebuild')")
+        has_rollup_triggers = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'booking_rollup_ai'"
+        ).first()
+        for statement in _booking_rollup_ddl():
+            conn.exec_driver_sql(statement)
+        if not has_rollup_triggers:
+            # Count bookings written before the triggers existed
+            rebuild_booking_rollups(conn)
+        if not has_partition_index:
+            # Route bookings archived before the index existed
+            for year in conn.info.get('booking_partitions', {}):
+                conn.exec_driver_sql(
+                    f'INSERT OR IGNORE INTO booking_partition_index (booking_id, year) '
+                    f'SELECT booking_id, {int(year)} FROM bookings_{year}.booking')
+
+def seed_data(tenant_id=DEFAULT_TENANT_ID, admin_email='admin@evento.com', admin_password='admin123', catalog=True):
     # Create admin user if not exists
-    if not User.query.filter_by(email='admin@evento.com').first():
+    if not User.query.filter_by(tenant_id=tenant_id, email=admin_email).first():
         admin = User(
+            tenant_id=tenant_id,
             name='Admin',
-            email='admin@evento.com',
+            email=admin_email,
             phone='1234567890',
-            password=generate_password_hash('admin123'),
+            password=generate_password_hash(admin_password),
             is_admin=True
         )
         db.session.add(admin)
-        db.session.commit()
     
     # Add sample services if not exists
-    if not Service.query.first():
+    if catalog and not Service.query.filter_by(tenant_id=tenant_id).first():
         services = [
             Service(name='Venue Selection', description='We help you find the perfect venue', price=5000, category='venue'),
             Service(name='Invitation Card', description='Custom-designed invitation cards', price=3000, category='invitation'),
@@ -113,6 +512,7 @@ with app.app_context():
             Service(name='Custom Foods', description='Specialized culinary experiences', price=20000, category='catering')
         ]
         for service in services:
+            service.tenant_id = tenant_id
             db.session.add(service)
         
         # Add sample halls
@@ -124,6 +524,7 @@ with app.app_context():
             Hall(name='Andheri Business Hub', location='Andheri', price=20000, capacity=250, image_url='/static/image/hall4.jpg')
         ]
         for hall in halls:
+            hall.tenant_id = tenant_id
             db.session.add(hall)
         
         # Add sample packages
@@ -134,9 +535,2026 @@ with app.app_context():
             Package(name='For Others', price=75999, description='For other special events', features='["Full Services","Decorations","Music And Photos","Food And Drinks","Invitation Card"]')
         ]
         for package in packages:
+            package.tenant_id = tenant_id
             db.session.add(package)
-        
+
+def init_db(seed=True):
+    """Create tables (and optionally seed data) in one locked transaction. Idempotent."""
+    try:
+        if db.engine.dialect.name == 'sqlite':
+            # Outside the main transaction, which holds locks on the attached partitions
+            upgrade_booking_partitions()
+        _begin_immediate()
+        create_schema()
+        if seed:
+            seed_data()
         db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+def ensure_db():
+    """Lazy one-time initializer, safe to call from any thread"""
+    global _db_ready
+    if _db_ready:
+        return
+    with _db_init_lock:
+        if not _db_ready:
+            init_db()
+            _db_ready = True
+
+@app.before_request
+def lazy_init_db():
+    if app.config['AUTO_INIT_DB']:
+        ensure_db()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create database tables."""
+    init_db(seed=False)
+    print('Database tables created.')
+
+@app.cli.command('seed')
+def seed_command():
+    """Create database tables and insert the admin user and sample catalog."""
+    init_db(seed=True)
+    print('Database seeded.')
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the daily booking rollups from the booking table."""
+    init_db(seed=False)
+    _begin_immediate()
+    rebuild_booking_rollups(db.session.connection())
+    db.session.commit()
+    print('Booking rollups rebuilt.')
+
+# ==================== TENANTS ====================
+# Each event organizer is a tenant. A request belongs to the tenant named by a
+# /t/<slug>/ path prefix, else the one whose host matches the Host header, else
+# the default tenant. ORM queries on TENANT_MODELS are filtered to that tenant
+# and new rows are stamped with it; Core queries over those tables filter on
+# tenant_id themselves (record_query, booking_union). Jobs run scoped to the
+# tenant that queued them (platform jobs and the CLI are not scoped). Backups
+# and the process-wide diagnostics are for platform admins only: the admins of
+# the default tenant.
+app.config['TENANT_PATH_PREFIX'] = '/t'
+app.config['TENANT_CACHE_TTL'] = 60  # seconds a worker trusts its copy of the tenant table
+app.config['TENANT_CACHE_MAX_TENANTS'] = int(os.environ.get('TENANT_CACHE_MAX_TENANTS', 64))
+
+TENANT_MODELS = (User, Booking, Service, Hall, Package, BookingTombstone, BookingDailyRollup, ChangeEvent, Job)
+TENANT_SLUG_RE = re.compile(r'^[a-z0-9][a-z0-9-]{0,49}$')
+
+class TenantPathMiddleware:
+    """Moves a leading /t/<slug> from PATH_INFO to SCRIPT_NAME: routes match
+    unprefixed and url_for()/request.script_root keep links inside the tenant"""
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        prefix = app.config['TENANT_PATH_PREFIX'] + '/'
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(prefix):
+            slug, _, rest = path[len(prefix):].partition('/')
+            if TENANT_SLUG_RE.match(slug):
+                environ['evento.tenant_slug'] = slug
+                environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + prefix + slug
+                environ['PATH_INFO'] = '/' + rest
+        return self.wsgi_app(environ, start_response)
+
+app.wsgi_app = TenantPathMiddleware(app.wsgi_app)
+
+_tenant_directory = (0.0, {}, {})
+_tenant_directory_lock = threading.Lock()
+
+def tenant_directory():
+    """({slug: id}, {host: id}) for every tenant, re-read every TENANT_CACHE_TTL seconds"""
+    global _tenant_directory
+    if time.monotonic() - _tenant_directory[0] > app.config['TENANT_CACHE_TTL']:
+        with _tenant_directory_lock:
+            if time.monotonic() - _tenant_directory[0] > app.config['TENANT_CACHE_TTL']:
+                rows = db.session.execute(sa.select(Tenant.id, Tenant.slug, Tenant.host)).all()
+                _tenant_directory = (
+                    time.monotonic(),
+                    {row.slug: row.id for row in rows},
+                    {row.host.lower(): row.id for row in rows if row.host}
+                )
+    return _tenant_directory[1], _tenant_directory[2]
+
+def reset_tenant_directory():
+    global _tenant_directory
+    _tenant_directory = (0.0, {}, {})
+
+def request_tenant_id():
+    """The tenant the current request (or scoped thread) works for, None when unscoped"""
+    return g.get('tenant_id') if has_app_context() else None
+
+def current_tenant_id():
+    """Tenant for new rows and cache partitions: the scoped tenant or the default one"""
+    tenant_id = request_tenant_id()
+    return DEFAULT_TENANT_ID if tenant_id is None else tenant_id
+
+def is_platform_admin(user):
+    """Admins of the default tenant, who run the deployment as a whole"""
+    return bool(user and user.is_admin and user.tenant_id == DEFAULT_TENANT_ID)
+
+@app.before_request
+def resolve_tenant():
+    by_slug, by_host = tenant_directory()
+    slug = request.environ.get('evento.tenant_slug')
+    if slug is not None:
+        if slug not in by_slug:
+            return jsonify({'success': False, 'message': 'Unknown organizer'}), 404
+        g.tenant_id = by_slug[slug]
+    else:
+        g.tenant_id = by_host.get(request.host.split(':')[0].lower(), DEFAULT_TENANT_ID)
+
+@sa.event.listens_for(db.session, 'do_orm_execute')
+def scope_to_tenant(execute_state):
+    """Add tenant_id = <request tenant> to every ORM select, update and delete"""
+    tenant_id = request_tenant_id()
+    if tenant_id is None or execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    execute_state.statement = execute_state.statement.options(*(
+        sa.orm.with_loader_criteria(model, lambda cls: cls.tenant_id == tenant_id, include_aliases=True)
+        for model in TENANT_MODELS
+    ))
+
+@sa.event.listens_for(db.session, 'before_flush')
+def stamp_tenant(session, flush_context, instances):
+    for obj in session.new:
+        if isinstance(obj, TENANT_MODELS) and obj.tenant_id is None:
+            obj.tenant_id = current_tenant_id()
+
+@app.cli.command('create-tenant')
+@click.argument('slug')
+@click.argument('name')
+@click.option('--host', default=None, help='Host name that selects this tenant')
+@click.option('--admin-email', required=True)
+@click.option('--admin-password', required=True)
+@click.option('--sample-catalog/--no-sample-catalog', default=False, help='Copy in the demo services, halls and packages')
+def create_tenant_command(slug, name, host, admin_email, admin_password, sample_catalog):
+    """Add an organizer with its own admin user, served at /t/SLUG/ (and HOST)."""
+    if not TENANT_SLUG_RE.match(slug):
+        raise click.ClickException('Slugs are lowercase letters, digits and dashes')
+    init_db(seed=False)
+    if Tenant.query.filter_by(slug=slug).first():
+        raise click.ClickException(f'Tenant {slug} already exists')
+    tenant = Tenant(slug=slug, name=name, host=host.lower() if host else None)
+    db.session.add(tenant)
+    db.session.flush()
+    seed_data(tenant.id, admin_email, admin_password, catalog=sample_catalog)
+    db.session.commit()
+    print(f'Tenant {slug} created (id {tenant.id}).')
+
+# ==================== SERVER-SIDE SESSIONS ====================
+# The cookie only carries a signed random session ID; session data lives in a
+# store shared by all workers, so sessions survive restarts and scale-out.
+class SQLSessionStore:
+    """Sessions in the server_session table of the app database"""
+
+    # Always read from the database, never from a copy: a session deleted at
+    # logout must stop authenticating at once, even while a write holds the lock
+    def get(self, sid):
+        row = db.session.execute(
+            sa.select(ServerSession.data).where(
+                ServerSession.sid == sid,
+                ServerSession.expires_at > datetime.utcnow()
+            )
+        ).first()
+        db.session.rollback()  # don't hold a read transaction open for the request
+        return row[0] if row else None
+
+    # Writes run in a transaction of their own on the request's connection (a
+    # second pooled connection per request would deadlock the pool once every
+    # connection is held by a waiting request). Whatever the view left
+    # uncommitted is rolled back first, so it is never committed with the session.
+    def _write(self, *statements):
+        db.session.rollback()
+        try:
+            for statement in statements:
+                db.session.execute(statement)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def set(self, sid, data, ttl):
+        table = ServerSession.__table__
+        self._write(
+            table.delete().where(table.c.sid == sid),
+            table.insert().values(sid=sid, data=data, expires_at=datetime.utcnow() + timedelta(seconds=ttl))
+        )
+
+    def delete(self, sid):
+        table = ServerSession.__table__
+        self._write(table.delete().where(table.c.sid == sid))
+
+    def sweep(self):
+        table = ServerSession.__table__
+        self._write(table.delete().where(table.c.expires_at <= datetime.utcnow()))
+
+class LocalRedis:
+    """File-backed stand-in for the subset of the Redis client API we use.
+
+    Keys are files in one directory, so every worker on the host shares them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, key.replace(':', '_'))
+
+    def get(self, key):
+        try:
+            with open(self._file(key), 'rb') as f:
+                expires, _, value = f.read().partition(b'\n')
+        except FileNotFoundError:
+            return None
+        if float(expires) <= time.time():
+            self.delete(key)
+            return None
+        return value
+
+    def setex(self, key, ttl, value):
+        if isinstance(value, str):
+            value = value.encode('utf-8')
+        path = self._file(key)
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(str(time.time() + ttl).encode() + b'\n' + value)
+        os.replace(tmp, path)
+        return True
+
+    def delete(self, *keys):
+        removed = 0
+        for key in keys:
+            try:
+                os.remove(self._file(key))
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def sweep(self):
+        """Drop expired keys (real Redis expires keys by itself)"""
+        now = time.time()
+        for name in os.listdir(self.path):
+            path = os.path.join(self.path, name)
+            try:
+                with open(path, 'rb') as f:
+                    expires = float(f.readline())
+                if expires <= now:
+                    os.remove(path)
+            except (OSError, ValueError):
+                pass
+
+class RedisSessionStore:
+    """Sessions in Redis, or anything with the same get/setex/delete API"""
+
+    prefix = 'session:'
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, sid):
+        value = self.client.get(self.prefix + sid)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return value
+
+    def set(self, sid, data, ttl):
+        self.client.setex(self.prefix + sid, ttl, data)
+
+    def delete(self, sid):
+        self.client.delete(self.prefix + sid)
+
+    def sweep(self):
+        if hasattr(self.client, 'sweep'):
+            self.client.sweep()
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.stale_sid = None
+
+    def regenerate(self):
+        """Issue a fresh session ID (call on login to prevent session fixation)"""
+        if not self.new and self.stale_sid is None:
+            self.stale_sid = self.sid
+        self.sid = secrets.token_urlsafe(16)
+        self.modified = True
+
+class ServerSideSessionInterface(SessionInterface):
+    session_class = ServerSideSession
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self):
+        self._store = None
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+
+    def get_store(self, app):
+        if self._store is None:
+            if app.config['SESSION_BACKEND'] == 'redis':
+                url = app.config['SESSION_REDIS_URL']
+                if url:
+                    import redis
+                    client = redis.Redis.from_url(url)
+                else:
+                    client = LocalRedis(os.path.join(app.instance_path, 'sessions'))
+                self._store = RedisSessionStore(client)
+            else:
+                self._store = SQLSessionStore()
+        return self._store
+
+    def _signer(self, app):
+        return Signer(app.secret_key, salt='evento-session')
+
+    def get_cookie_name(self, app):
+        # Each /t/<slug> tenant keeps its own session cookie
+        name = super().get_cookie_name(app)
+        slug = request.environ.get('evento.tenant_slug') if has_request_context() else None
+        return f'{name}_{slug}' if slug else name
+
+    def open_session(self, app, request):
+        if request.path.startswith(app.static_url_path + '/'):
+            return self.make_null_session(app)
+        if app.config['AUTO_INIT_DB']:
+            ensure_db()
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode('utf-8')
+            except BadSignature:
+                sid = None
+            if sid:
+                data = self.get_store(app).get(sid)
+                if data is not None:
+                    return self.session_class(self.serializer.loads(data), sid=sid)
+        return self.session_class(sid=secrets.token_urlsafe(16), new=True)
+
+    def save_session(self, app, session, response):
+        store = self.get_store(app)
+        self._maybe_sweep(app, store)
+
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.stale_sid:
+            store.delete(session.stale_sid)
+
+        if not session:
+            if session.modified and not session.new:
+                store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not self.should_set_cookie(app, session):
+            return
+
+        ttl = int(app.permanent_session_lifetime.total_seconds())
+        store.set(session.sid, self.serializer.dumps(dict(session)), ttl)
+        response.vary.add('Cookie')
+        response.set_cookie(
+            name,
+            self._signer(app).sign(session.sid).decode('utf-8'),
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+    def _maybe_sweep(self, app, store):
+        """Purge expired sessions at most once per SESSION_SWEEP_INTERVAL per worker"""
+        now = time.monotonic()
+        if now - self._last_sweep < app.config['SESSION_SWEEP_INTERVAL']:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            store.sweep()
+        except Exception as e:
+            print(f"Session sweep error: {str(e)}")
+        finally:
+            self._sweep_lock.release()
+
+app.session_interface = ServerSideSessionInterface()
+
+# ==================== CACHING ====================
+class LRUCache:
+    """Small thread-safe in-process LRU cache"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class TenantCache:
+    """LRU cache partitioned by tenant, with the same get/set API as LRUCache.
+
+    Each tenant gets its own LRUCache of `maxsize` entries, so a busy tenant
+    only ever evicts its own entries. At most TENANT_CACHE_MAX_TENANTS
+    partitions are kept; the least recently used tenant's is dropped first.
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._partitions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def partition(self, tenant_id=None):
+        tenant_id = current_tenant_id() if tenant_id is None else tenant_id
+        with self._lock:
+            cache = self._partitions.get(tenant_id)
+            if cache is None:
+                cache = self._partitions[tenant_id] = LRUCache(self.maxsize)
+            self._partitions.move_to_end(tenant_id)
+            while len(self._partitions) > app.config['TENANT_CACHE_MAX_TENANTS']:
+                self._partitions.popitem(last=False)
+        return cache
+
+    def get(self, key, default=None):
+        return self.partition().get(key, default)
+
+    def set(self, key, value):
+        self.partition().set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._partitions.clear()
+
+def get_cache_version(name):
+    """Current version of a cached view (0 if it was never bumped)"""
+    return db.session.execute(
+        sa.select(CacheVersion.version).where(CacheVersion.name == name)
+    ).scalar() or 0
+
+def bump_cache_version(name, connection):
+    """Invalidate every cache entry keyed on `name`, in the caller's transaction"""
+    table = CacheVersion.__table__
+    if connection.dialect.name == 'sqlite':
+        stmt = sqlite_insert(table).values(name=name, version=1)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={'version': table.c.version + 1}
+        ))
+        return
+    result = connection.execute(
+        table.update().where(table.c.name == name).values(version=table.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(name=name, version=1))
+
+def user_bookings_version_key(user_id):
+    return f'user-bookings:{user_id}'
+
+def catalog_version_key(tenant_id=None):
+    return f'catalog:{current_tenant_id() if tenant_id is None else tenant_id}'
+
+def bookings_version_key(tenant_id=None):
+    return f'bookings:{current_tenant_id() if tenant_id is None else tenant_id}'
+
+@sa.event.listens_for(db.session, 'before_flush')
+def bump_cache_versions(session, flush_context, instances):
+    """Any write to a booking invalidates its owner's cached history and receipts
+    and its tenant's analytics; any service/hall/package write invalidates its
+    tenant's catalog caches"""
+    changed = list(session.new) + list(session.deleted)
+    changed += [obj for obj in session.dirty if session.is_modified(obj)]
+    owners = set()
+    booking_tenants = set()
+    catalog_tenants = set()
+    for obj in changed:
+        if isinstance(obj, Booking):
+            owners.add(obj.user_id)
+            booking_tenants.add(obj.tenant_id)
+        elif isinstance(obj, (Service, Hall, Package)):
+            catalog_tenants.add(obj.tenant_id)
+    for user_id in owners:
+        if user_id is not None:
+            bump_cache_version(user_bookings_version_key(user_id), session.connection())
+    for tenant_id in booking_tenants:
+        bump_cache_version(bookings_version_key(tenant_id), session.connection())
+    for tenant_id in catalog_tenants:
+        bump_cache_version(catalog_version_key(tenant_id), session.connection())
+
+@sa.event.listens_for(db.session, 'do_orm_execute')
+def bump_cache_versions_for_bulk_writes(execute_state):
+    """Bulk ORM UPDATE/DELETE (Query.update()/delete()) skip before_flush, so
+    bump the same versions for the rows they are about to touch"""
+    if not (execute_state.is_update or execute_state.is_delete) or execute_state.bind_mapper is None:
+        return
+    model = execute_state.bind_mapper.class_
+    if model is Booking:
+        columns = (Booking.tenant_id, Booking.user_id)
+    elif model in (Service, Hall, Package):
+        columns = (model.tenant_id,)
+    else:
+        return
+    query = sa.select(*columns).distinct()
+    if execute_state.statement.whereclause is not None:
+        query = query.where(execute_state.statement.whereclause)
+    connection = execute_state.session.connection()
+    for row in execute_state.session.execute(query).all():
+        if model is not Booking:
+            bump_cache_version(catalog_version_key(row.tenant_id), connection)
+            continue
+        bump_cache_version(bookings_version_key(row.tenant_id), connection)
+        if row.user_id is not None:
+            bump_cache_version(user_bookings_version_key(row.user_id), connection)
+
+# ==================== READ FAST PATH ====================
+# List endpoints select just the columns they return and read each row as a
+# plain dict (or, where a view reshapes it, a namedtuple). Column selects never
+# create ORM instances, so nothing lands in the identity map or is tracked for
+# changes. Responses are encoded like jsonify: compact, with sorted keys.
+SERVICE_FIELDS = ('id', 'name', 'description', 'price', 'category')
+HALL_FIELDS = ('id', 'name', 'location', 'description', 'price', 'capacity', 'image_url')
+PACKAGE_FIELDS = ('id', 'name', 'description', 'price', 'features')
+
+ServiceRow = namedtuple('ServiceRow', SERVICE_FIELDS)
+HallRow = namedtuple('HallRow', HALL_FIELDS)
+PackageRow = namedtuple('PackageRow', PACKAGE_FIELDS)
+AdminServiceRow = namedtuple('AdminServiceRow', SERVICE_FIELDS + ('is_active',))
+AdminHallRow = namedtuple('AdminHallRow', HALL_FIELDS + ('is_active',))
+AdminPackageRow = namedtuple('AdminPackageRow', PACKAGE_FIELDS + ('is_active',))
+UserRow = namedtuple('UserRow', 'id name email phone is_admin created_at')
+BookingListRow = namedtuple('BookingListRow', 'booking_id user_name user_email event_date event_type '
+                                              'guests total_amount status created_at')
+
+def record_query(model, record):
+    """SELECT of `model`'s columns named by the record's fields, in field order,
+    limited to the current tenant"""
+    table = model.__table__
+    return sa.select(*(table.c[name] for name in record._fields)).where(table.c.tenant_id == current_tenant_id())
+
+def read_records(record, query):
+    """Run a Core select on the session's connection and map each row onto `record`"""
+    return list(map(record._make, db.session.connection().execute(query)))
+
+def read_dicts(query):
+    """Run a Core select on the session's connection and return each row as a dict"""
+    return [dict(row._mapping) for row in db.session.connection().execute(query)]
+
+def encode_json(payload):
+    """Compact JSON bytes with sorted keys, via orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(payload, separators=(',', ':'), sort_keys=True).encode()
+
+def json_response(payload, status=200):
+    """Like jsonify, but encodes with orjson when it is installed"""
+    return Response(encode_json(payload), status=status, mimetype='application/json')
+
+def format_datetime(value, fmt, default='N/A'):
+    return value.strftime(fmt) if value else default
+
+# ==================== BACKGROUND JOBS ====================
+# Durable job queue in the `job` table. Request handlers only enqueue (in the
+# same transaction as their own writes); `flask --app app worker` processes
+# run the jobs, highest priority first, retrying failures with backoff.
+app.config['JOB_LOCK_TIMEOUT'] = 600  # seconds before a running job is presumed dead
+app.config['JOB_RETRY_BASE'] = 5  # first retry delay in seconds, doubled per attempt
+app.config['JOB_RETRY_MAX'] = 3600
+app.config['JOB_RETENTION'] = timedelta(days=7)  # how long done/failed jobs stay visible in /admin/jobs
+app.config['JOB_PRUNE_INTERVAL'] = 3600  # seconds between prunes of finished jobs, per worker
+
+JOB_HANDLERS = {}
+PLATFORM_JOBS = set()  # handlers that work across every tenant and run unscoped
+
+def job_handler(name, platform=False):
+    """Register a function as the handler for jobs called `name`"""
+    def decorator(func):
+        JOB_HANDLERS[name] = func
+        if platform:
+            PLATFORM_JOBS.add(name)
+        return func
+    return decorator
+
+def enqueue_job(name, payload=None, priority=0, delay=0, max_attempts=5):
+    """Add a job to the current transaction; workers see it once the caller commits"""
+    job = Job(
+        name=name,
+        payload=json.dumps(payload or {}),
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=datetime.utcnow() + timedelta(seconds=delay)
+    )
+    db.session.add(job)
+    return job
+
+def claim_job(worker_id):
+    """Atomically take the next due job; returns (id, tenant_id, name, payload, attempts, max_attempts) or None"""
+    now = datetime.utcnow()
+    table = Job.__table__
+    try:
+        _begin_immediate()
+        # Requeue jobs whose worker died mid-run
+        db.session.execute(table.update().where(
+            table.c.status == 'running',
+            table.c.locked_at < now - timedelta(seconds=app.config['JOB_LOCK_TIMEOUT'])
+        ).values(status='queued', locked_by=None, locked_at=None))
+
+        row = db.session.execute(
+            sa.select(table.c.id, table.c.tenant_id, table.c.name, table.c.payload, table.c.attempts,
+                      table.c.max_attempts)
+            .where(table.c.status == 'queued', table.c.run_at <= now)
+            .order_by(table.c.priority.desc(), table.c.run_at, table.c.id)
+            .limit(1)
+        ).first()
+        if row:
+            db.session.execute(table.update().where(table.c.id == row.id).values(
+                status='running', locked_by=worker_id, locked_at=now,
+                attempts=row.attempts + 1, updated_at=now
+            ))
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    if not row:
+        return None
+    return row.id, row.tenant_id, row.name, row.payload, row.attempts + 1, row.max_attempts
+
+def _finish_job(job_id, **values):
+    table = Job.__table__
+    values['updated_at'] = datetime.utcnow()
+    with db.engine.begin() as conn:
+        conn.execute(table.update().where(table.c.id == job_id).values(locked_by=None, locked_at=None, **values))
+
+def run_next_job(worker_id):
+    """Run one due job. Returns False when the queue has nothing to do."""
+    claimed = claim_job(worker_id)
+    if not claimed:
+        return False
+    job_id, tenant_id, name, payload, attempts, max_attempts = claimed
+    # Scope the handler's queries like the request that queued it
+    g.tenant_id = None if name in PLATFORM_JOBS else tenant_id
+    try:
+        JOB_HANDLERS[name](**json.loads(payload or '{}'))
+        db.session.commit()
+        _finish_job(job_id, status='done', last_error=None)
+    except Exception as e:
+        db.session.rollback()
+        error = f'{type(e).__name__}: {e}'
+        print(f"Job {job_id} ({name}) failed on attempt {attempts}: {error}")
+        if attempts >= max_attempts:
+            _finish_job(job_id, status='failed', last_error=error)
+        else:
+            delay = min(app.config['JOB_RETRY_BASE'] * 2 ** (attempts - 1), app.config['JOB_RETRY_MAX'])
+            delay *= random.uniform(0.8, 1.2)
+            _finish_job(job_id, status='queued', last_error=error,
+                        run_at=datetime.utcnow() + timedelta(seconds=delay))
+    return True
+
+def prune_jobs():
+    """Delete done and failed jobs older than JOB_RETENTION"""
+    table = Job.__table__
+    cutoff = datetime.utcnow() - app.config['JOB_RETENTION']
+    with db.engine.begin() as conn:
+        return conn.execute(table.delete().where(
+            table.c.status.in_(('done', 'failed')),
+            table.c.updated_at < cutoff
+        )).rowcount
+
+def work(worker_id=None, burst=False, poll_interval=1.0, stop_event=None):
+    """Worker loop. With burst=True, return as soon as the queue is empty."""
+    worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+    last_prune = None
+    while not (stop_event and stop_event.is_set()):
+        with app.app_context():
+            ensure_db()
+            try:
+                ran = run_next_job(worker_id)
+                # Prune when idle so finished jobs don't pile up in the table
+                if not ran and (last_prune is None or time.monotonic() - last_prune >= app.config['JOB_PRUNE_INTERVAL']):
+                    last_prune = time.monotonic()
+                    prune_jobs()
+            except sa.exc.OperationalError as e:
+                # Database busy; back off and try again
+                print(f"Job worker error: {str(e)}")
+                ran = False
+        if not ran:
+            if burst:
+                return
+            time.sleep(poll_interval)
+
+def start_embedded_worker():
+    """Run worker threads inside the web process (development server only)"""
+    threads = [
+        threading.Thread(target=work, name='job-worker', daemon=True),
+        threading.Thread(target=run_dispatcher, name='notification-dispatcher', daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+@app.cli.command('worker')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds to sleep when idle.')
+def worker_command(burst, poll_interval):
+    """Process background jobs."""
+    print(f"Job worker started (pid {os.getpid()})")
+    try:
+        work(burst=burst, poll_interval=poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+@job_handler('purge_old_bookings')
+def purge_old_bookings(days=365, batch_size=500):
+    """Delete the tenant's completed bookings older than `days`, in small batches so
+    the writer lock is released often"""
+    cutoff = datetime.now() - timedelta(days=days)
+    count = 0
+    while True:
+        old_bookings = Booking.query.filter(
+            Booking.status == 'completed',
+            Booking.created_at < cutoff
+        ).limit(batch_size).all()
+        if not old_bookings:
+            break
+        booking_ids = [booking.booking_id for booking in old_bookings]
+        for booking in old_bookings:
+            db.session.delete(booking)
+        db.session.commit()
+        for booking_id in booking_ids:
+            remove_receipt_pdfs(booking_id)
+        count += len(old_bookings)
+    # Drop tombstones older than the delta-sync retention window
+    tombstone_cutoff = datetime.utcnow() - app.config['SYNC_TOMBSTONE_RETENTION']
+    BookingTombstone.query.filter(BookingTombstone.deleted_at < tombstone_cutoff).delete()
+    db.session.commit()
+    print(f"Cleared {count} old bookings")
+    return count
+
+@job_handler('backup_database', platform=True)
+def backup_database():
+    """Online backup of the SQLite database into instance/backups"""
+    if db.engine.dialect.name != 'sqlite':
+        raise RuntimeError('Backups are only supported for SQLite')
+    backup_dir = os.path.join(app.instance_path, 'backups')
+    os.makedirs(backup_dir, exist_ok=True)
+    path = os.path.join(backup_dir, f"evento-{datetime.now().strftime('%Y%m%d%H%M%S')}.db")
+    source = db.engine.raw_connection()
+    target = sqlite3.connect(path)
+    try:
+        source.driver_connection.backup(target)
+    finally:
+        target.close()
+        source.close()
+    print(f"Database backed up to {path}")
+    return path
+
+# ==================== BOOKING PARTITIONS ====================
+# The main `booking` table holds the hot years. Bookings whose event year is
+# older than BOOKING_HOT_YEARS are moved by `flask --app app archive-bookings`
+# into one file per year, BOOKING_PARTITION_DIR/bookings_<year>.db. Every
+# pooled connection attaches those files read-only and memory-mapped as schema
+# `bookings_<year>`. The router helpers below send each query to the tables
+# its event-date range can touch and only fan out when it spans several.
+# Archived bookings are read-only and not part of the full-text search.
+app.config['BOOKING_PARTITION_DIR'] = os.environ.get('BOOKING_PARTITION_DIR', os.path.join(app.instance_path, 'partitions'))
+app.config['BOOKING_HOT_YEARS'] = int(os.environ.get('BOOKING_HOT_YEARS', 2))  # current year and the one before
+app.config['PARTITION_MMAP_SIZE'] = 256 * 1024 * 1024
+
+PARTITION_FILE_RE = re.compile(r'^bookings_(\d{4})\.db$')
+
+def partition_path(year):
+    return os.path.join(app.config['BOOKING_PARTITION_DIR'], f'bookings_{year}.db')
+
+def _sqlite_uri(path, mode):
+    return f'file:{urllib.parse.quote(os.path.abspath(path))}?mode={mode}'
+
+_partition_listing = (None, {})
+
+def partition_files():
+    """{year: (path, mtime)} of the partition files, re-listed only when the directory changes"""
+    global _partition_listing
+    directory = app.config['BOOKING_PARTITION_DIR']
+    try:
+        stamp = os.stat(directory).st_mtime_ns
+    except OSError:
+        return {}
+    if _partition_listing[0] != stamp:
+        files = {}
+        for name in os.listdir(directory):
+            match = PARTITION_FILE_RE.match(name)
+            if match:
+                path = os.path.join(directory, name)
+                files[int(match.group(1))] = (path, os.stat(path).st_mtime_ns)
+        _partition_listing = (stamp, files)
+    return _partition_listing[1]
+
+@sa.event.listens_for(sa.pool.Pool, 'checkout')
+def attach_booking_partitions(dbapi_connection, connection_record, connection_proxy):
+    """Keep the connection's attached partitions in step with the files on disk"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    wanted = partition_files()
+    if connection_record.info.get('booking_partition_files') is wanted:
+        return
+    attached = connection_record.info.setdefault('booking_partitions', {})
+    for year in [year for year in attached if wanted.get(year) != attached[year]]:
+        dbapi_connection.execute(f'DETACH DATABASE bookings_{year}')
+        del attached[year]
+    # Leave one slot free for archive_booking_year
+    limit = dbapi_connection.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - 1 if hasattr(dbapi_connection, 'getlimit') else 9
+    for year in sorted(wanted, reverse=True):
+        if year in attached:
+            continue
+        if len(attached) >= limit:
+            print(f"Booking partitions: attach limit reached, bookings_{year} and older are not attached")
+            break
+        try:
+            dbapi_connection.execute(f'ATTACH DATABASE ? AS bookings_{year}', (_sqlite_uri(wanted[year][0], 'ro'),))
+            dbapi_connection.execute(f"PRAGMA bookings_{year}.mmap_size = {app.config['PARTITION_MMAP_SIZE']}")
+            attached[year] = wanted[year]
+        except sqlite3.Error as e:
+            print(f"Booking partition {year} not attached: {str(e)}")
+    connection_record.info['booking_partition_files'] = wanted
+
+_partition_tables = {}
+
+def partition_table(year):
+    table = _partition_tables.get(year)
+    if table is None:
+        table = _partition_tables[year] = Booking.__table__.to_metadata(
+            sa.MetaData(), schema=f'bookings_{year}', referred_schema_fn=lambda *args: None)
+    return table
+
+def booking_tables(start=None, end=None):
+    """Booking tables that can hold event dates in [start, end]; the main table
+    always (late rows for archived years stay there until the next archive run)"""
+    years = db.session.connection().info.get('booking_partitions', {})
+    tables = [Booking.__table__]
+    for year in sorted(years, reverse=True):
+        if (start is None or year >= start.year) and (end is None or year <= end.year):
+            tables.append(partition_table(year))
+    return tables
+
+def booking_union(build, start=None, end=None):
+    """build(table) -> select, run over every table in range (and the request's
+    tenant) and combined with UNION ALL when there is more than one; returned
+    as a subquery"""
+    tenant_id = request_tenant_id()
+    selects = [build(table) if tenant_id is None else build(table).where(table.c.tenant_id == tenant_id)
+               for table in booking_tables(start, end)]
+    if len(selects) == 1:
+        return selects[0].subquery('booking')
+    return sa.union_all(*selects).subquery('booking')
+
+def find_booking(booking_id, **filters):
+    """A booking from whichever table holds it: the main table, else the one
+    partition booking_partition_index names. Archived bookings come back as
+    transient Booking objects that are never added to the session."""
+    booking = Booking.query.filter_by(booking_id=booking_id, **filters).first()
+    if booking is None:
+        year = db.session.execute(
+            sa.select(BookingPartitionIndex.year).where(BookingPartitionIndex.booking_id == booking_id)
+        ).scalar()
+        if year not in db.session.connection().info.get('booking_partitions', {}):
+            return None
+        tenant_id = request_tenant_id()
+        if tenant_id is not None:
+            filters['tenant_id'] = tenant_id
+        row = db.session.execute(sa.select(partition_table(year)).filter_by(booking_id=booking_id, **filters)).first()
+        if row:
+            return Booking(**row._mapping)
+    return booking
+
+_partition_bounds = {}  # year -> (partition file version, (oldest, newest) created_at)
+
+def partition_created_range(year):
+    """Oldest and newest created_at in a partition, cached until its file changes"""
+    version = db.session.connection().info['booking_partitions'][year]
+    cached = _partition_bounds.get(year)
+    if cached is None or cached[0] != version:
+        table = partition_table(year)
+        bounds = db.session.execute(sa.select(func.min(table.c.created_at), func.max(table.c.created_at))).first()
+        cached = _partition_bounds[year] = (version, tuple(bounds))
+    return cached[1]
+
+def history_tables(position=None):
+    """(table, newest created_at) for the tables a newest-first history page
+    before `position` can draw from: the main table, then partitions newest
+    first, leaving out partitions that are empty or entirely newer than it"""
+    tables = []
+    for year in db.session.connection().info.get('booking_partitions', {}):
+        oldest, newest = partition_created_range(year)
+        if newest is None or (position and oldest > position[0]):
+            continue
+        tables.append((partition_table(year), newest))
+    tables.sort(key=lambda item: item[1], reverse=True)
+    return [(Booking.__table__, None)] + tables
+
+def _partition_ddl():
+    table = Booking.__table__
+    statements = [sa.schema.CreateTable(table, if_not_exists=True)]
+    statements += [sa.schema.CreateIndex(index, if_not_exists=True) for index in table.indexes]
+    return [str(statement.compile(dialect=db.engine.dialect)) for statement in statements]
+
+def _upgrade_partition(conn):
+    """Create or update the booking table of a partition file to the current model"""
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(booking)')}
+    if existing:
+        for statement in missing_columns_ddl(Booking.__table__, existing, db.engine.dialect):
+            conn.execute(statement)
+        for index in RETIRED_INDEXES:
+            conn.execute(f'DROP INDEX IF EXISTS {index}')
+    for statement in _partition_ddl():
+        conn.execute(statement)
+
+def upgrade_booking_partitions():
+    """Add columns the booking model gained since each partition was written"""
+    for path, _ in partition_files().values():
+        conn = sqlite3.connect(path, isolation_level=None)
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            _upgrade_partition(conn)
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+def archive_booking_year(year):
+    """Copy one event year from the main booking table into its partition file,
+    then delete the copied rows from the main table. Safe to re-run: rows are
+    only deleted once the partition holding them is in place."""
+    if db.engine.dialect.name != 'sqlite':
+        raise RuntimeError('Booking partitions are only supported for SQLite')
+    path = partition_path(year)
+    tmp_path = path + '.tmp'
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if os.path.exists(path):
+        shutil.copyfile(path, tmp_path)
+    elif os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    
+    columns = [column.name for column in Booking.__table__.columns]
+    updates = ', '.join(f'{name} = excluded.{name}' for name in columns if name not in ('id', 'booking_id'))
+    target = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        _upgrade_partition(target)
+        target.execute('ATTACH DATABASE ? AS hot', (_sqlite_uri(db.engine.url.database, 'ro'),))
+        target.execute('BEGIN')
+        copied = target.execute(f"""
+            INSERT INTO main.booking ({', '.join(columns)})
+            SELECT {', '.join(columns)} FROM hot.booking WHERE event_date >= ? AND event_date < ?
+            ON CONFLICT (booking_id) DO UPDATE SET {updates}""",
+            (date(year, 1, 1).isoformat(), date(year + 1, 1, 1).isoformat())).rowcount
+        target.execute('COMMIT')
+        target.execute('DETACH DATABASE hot')
+    finally:
+        target.close()
+    if not copied:
+        os.remove(tmp_path)
+        return 0
+    os.replace(tmp_path, path)
+    
+    raw = db.engine.raw_connection()
+    try:
+        conn = raw.driver_connection
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('ATTACH DATABASE ? AS booking_archive', (_sqlite_uri(path, 'ro'),))
+        last_tombstone = conn.execute('SELECT coalesce(max(id), 0) FROM booking_tombstone').fetchone()[0]
+        # Only rows unchanged since the copy; anything edited meanwhile waits for the next run
+        conn.execute("""
+            CREATE TEMP TABLE archived_booking AS
+            SELECT b.id, b.booking_id FROM main.booking b
+            JOIN booking_archive.booking a ON a.booking_id = b.booking_id AND a.updated_at IS b.updated_at""")
+        # Archived bookings still count in reports: re-add what the delete trigger subtracts
+        conn.execute(f"""
+            INSERT INTO booking_daily_rollup({ROLLUP_KEY_COLUMNS}, bookings, guests, revenue)
+            SELECT {ROLLUP_KEY.format('booking')}, count(*), coalesce(sum(guests), 0), coalesce(sum(total_amount), 0)
+            FROM main.booking AS booking WHERE id IN (SELECT id FROM temp.archived_booking)
+            GROUP BY 1, 2, 3, 4, 5, 6
+            ON CONFLICT({ROLLUP_KEY_COLUMNS}) DO UPDATE SET
+                bookings = bookings + excluded.bookings,
+                guests = guests + excluded.guests,
+                revenue = revenue + excluded.revenue""")
+        conn.execute('INSERT OR REPLACE INTO booking_partition_index (booking_id, year) '
+                     'SELECT booking_id, ? FROM temp.archived_booking', (year,))
+        moved = conn.execute('DELETE FROM main.booking WHERE id IN (SELECT id FROM temp.archived_booking)').rowcount
+        # Archived bookings were moved, not deleted: delta sync must not report them gone
+        conn.execute('DELETE FROM booking_tombstone WHERE id > ? AND booking_id IN (SELECT booking_id FROM temp.archived_booking)',
+                     (last_tombstone,))
+        conn.execute('DROP TABLE temp.archived_booking')
+        conn.commit()
+        conn.execute('DETACH DATABASE booking_archive')
+    except Exception:
+        raw.driver_connection.rollback()
+        raise
+    finally:
+        raw.close()
+    return moved
+
+@job_handler('archive_bookings', platform=True)
+def archive_bookings(hot_years=None):
+    """Archive every event year older than the hot years into its partition"""
+    hot_years = hot_years or app.config['BOOKING_HOT_YEARS']
+    cutoff = date(date.today().year - hot_years + 1, 1, 1)
+    years = db.session.execute(
+        sa.select(func.strftime('%Y', Booking.event_date)).distinct().where(Booking.event_date < cutoff)
+    ).scalars().all()
+    db.session.rollback()  # release the connection before archiving takes the write lock
+    moved = {}
+    for year in sorted(int(year) for year in years):
+        moved[year] = archive_booking_year(year)
+        print(f"Archived {moved[year]} bookings from {year} to {partition_path(year)}")
+    return moved
+
+@app.cli.command('archive-bookings')
+@click.option('--hot-years', type=int, default=None, help='Event years kept in the main table (default BOOKING_HOT_YEARS).')
+def archive_bookings_command(hot_years):
+    """Move bookings of old event years into per-year partition files."""
+    init_db(seed=False)
+    archive_bookings(hot_years)
+
+# ==================== PDF RECEIPTS ====================
+# PDFs are rendered off the request path by a background job and stored as
+# <booking_id>-<updated_at>.pdf, so a download is a static file read and a
+# changed booking naturally gets a new file.
+app.config['RECEIPT_DIR'] = os.environ.get('RECEIPT_DIR', os.path.join(app.instance_path, 'receipts'))
+
+def _pdf_text(text):
+    text = str(text).replace('₹', 'Rs. ')
+    text = text.encode('latin-1', 'replace').decode('latin-1')
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+def build_pdf(lines):
+    """Minimal single-page PDF from (text, bold) lines using the built-in Helvetica fonts"""
+    content = ['BT', '50 790 Td', '18 TL']
+    for text, bold in lines:
+        content.append(f"/{'F2' if bold else 'F1'} {14 if bold else 11} Tf")
+        content.append(f'({_pdf_text(text)}) Tj T*')
+    content.append('ET')
+    stream = '\n'.join(content).encode('latin-1')
+
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold >>',
+    ]
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    for offset in offsets:
+        out += b'%010d 00000 n \n' % offset
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+def build_receipt_pdf(booking):
+    """Receipt PDF with the same data as the receipt.html page"""
+    amounts = receipt_context(booking)
+    lines = [
+        ('Evento - Booking Receipt', True),
+        (f'Booking ID: {booking.booking_id}', False),
+        (f'Customer: {booking.first_name} {booking.last_name}', False),
+        (f'Email: {booking.email}', False),
+        (f'Phone: {booking.phone}', False),
+        (f'Event: {booking.event_type} on {booking.event_date}', False),
+        (f'Guests: {booking.guests}', False),
+        (f'Status: {booking.status}', False),
+        ('', False),
+    ]
+    if booking.service_name:
+        lines.append((f'{booking.service_name}: ₹{booking.service_price}', False))
+    if booking.hall_name:
+        lines.append((f'{booking.hall_name}: ₹{booking.hall_price}', False))
+    if booking.package_name:
+        lines.append((f'{booking.package_name}: ₹{booking.package_price}', False))
+    lines += [
+        (f"Subtotal: ₹{amounts['subtotal']}", False),
+        (f"GST (18%): ₹{amounts['gst']:.2f}", False),
+        (f"Total: ₹{amounts['total_with_gst']:.2f}", True),
+    ]
+    return build_pdf(lines)
+
+def receipt_pdf_path(booking_id, updated_at):
+    stamp = updated_at.strftime('%Y%m%d%H%M%S%f') if updated_at else '0'
+    return os.path.join(app.config['RECEIPT_DIR'], f'{booking_id}-{stamp}.pdf')
+
+def generate_receipt_pdf(booking_id):
+    """Write the current receipt PDF for a booking and drop outdated versions"""
+    booking = find_booking(booking_id)
+    if not booking:
+        return None
+    path = receipt_pdf_path(booking.booking_id, booking.updated_at)
+    if not os.path.exists(path):
+        os.makedirs(app.config['RECEIPT_DIR'], exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(build_receipt_pdf(booking))
+        os.replace(tmp, path)
+    remove_receipt_pdfs(booking.booking_id, keep=path)
+    return path
+
+def remove_receipt_pdfs(booking_id, keep=None):
+    """Delete stored receipt PDFs of a booking, except `keep`"""
+    receipt_dir = app.config['RECEIPT_DIR']
+    if not os.path.isdir(receipt_dir):
+        return
+    prefix = f'{booking_id}-'
+    for name in os.listdir(receipt_dir):
+        path = os.path.join(receipt_dir, name)
+        if name.startswith(prefix) and name.endswith('.pdf') and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+@job_handler('receipt_pdf')
+def receipt_pdf_job(booking_id):
+    generate_receipt_pdf(booking_id)
+
+def schedule_receipt_pdf(booking_id, changed_at=None):
+    """Queue rendering of a booking's receipt PDF (committed with the caller's
+    transaction). Given when the booking last changed, nothing is queued if a
+    render is already waiting or was started since then: it writes the same
+    file. New bookings pass no time, as no render can exist for them yet."""
+    payload = {'booking_id': booking_id}
+    if changed_at is not None:
+        pending = Job.query.filter(
+            Job.name == 'receipt_pdf',
+            Job.payload == json.dumps(payload),
+            sa.or_(Job.status == 'queued', sa.and_(Job.status == 'running', Job.locked_at >= changed_at))
+        ).first()
+        if pending is not None:
+            return pending
+    return enqueue_job('receipt_pdf', payload, priority=10)
+
+@app.cli.command('regenerate-receipts')
+def regenerate_receipts_command():
+    """Rebuild every receipt PDF (run after changing the receipt layout)."""
+    receipt_dir = app.config['RECEIPT_DIR']
+    if os.path.isdir(receipt_dir):
+        for name in os.listdir(receipt_dir):
+            if name.endswith('.pdf'):
+                os.remove(os.path.join(receipt_dir, name))
+    count = 0
+    bookings = booking_union(lambda table: sa.select(table.c.id, table.c.booking_id))
+    booking_ids = db.session.execute(sa.select(bookings.c.booking_id).order_by(bookings.c.id)).scalars().all()
+    for booking_id in booking_ids:
+        if generate_receipt_pdf(booking_id):
+            count += 1
+        db.session.expunge_all()
+    print(f'Regenerated {count} receipts.')
+
+# ==================== NOTIFICATIONS ====================
+# Transactional outbox: booking changes write a `notification` row in the same
+# commit, and a separate dispatcher drains the table in batches. Several
+# pending updates for one booking are coalesced into a single message (the
+# newest), each provider keeps one connection open per batch and is rate limited.
+app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'localhost')
+app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 1025))
+app.config['MAIL_SENDER'] = os.environ.get('MAIL_SENDER', 'bookings@evento.com')
+app.config['NOTIFY_BATCH_SIZE'] = 100
+app.config['NOTIFY_MAX_ATTEMPTS'] = 5
+app.config['NOTIFY_RETRY_DELAY'] = 60  # seconds
+app.config['NOTIFY_RATE_LIMITS'] = {'email': 20}  # messages per second per provider
+app.config['NOTIFY_LOCK_TIMEOUT'] = 300
+
+class TokenBucket:
+    """In-process token bucket; acquire() sleeps until a token is available"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                time.sleep((1 - self.tokens) / self.rate)
+                self.tokens = 1
+                self.updated = time.monotonic()
+            self.tokens -= 1
+
+class SMTPProvider:
+    """Email over SMTP; one connection is reused for a whole batch"""
+
+    channel = 'email'
+
+    def __init__(self):
+        self.connection = None
+
+    def open(self):
+        if self.connection is None:
+            self.connection = smtplib.SMTP(app.config['MAIL_SERVER'], app.config['MAIL_PORT'], timeout=10)
+
+    def send(self, recipient, subject, body):
+        message = EmailMessage()
+        message['From'] = app.config['MAIL_SENDER']
+        message['To'] = recipient
+        message['Subject'] = subject
+        message.set_content(body)
+        self.open()
+        try:
+            self.connection.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self.connection = None
+            self.open()
+            self.connection.send_message(message)
+
+    def close(self):
+        if self.connection is not None:
+            try:
+                self.connection.quit()
+            except smtplib.SMTPException:
+                pass
+            self.connection = None
+
+NOTIFICATION_PROVIDERS = {'email': SMTPProvider}
+_notify_buckets = {}
+
+def queue_notification(booking, kind):
+    """Add an outbox row for a booking change to the current transaction"""
+    db.session.add(Notification(
+        booking_id=booking.booking_id,
+        channel='email',
+        recipient=booking.email,
+        kind=kind,
+        payload=json.dumps({
+            'name': booking.first_name,
+            'status': booking.status,
+            'event_type': booking.event_type,
+            'event_date': booking.event_date.strftime('%Y-%m-%d') if booking.event_date else None
+        })
+    ))
+
+def render_notification(kind, booking_id, payload):
+    """Subject and body of a notification message"""
+    if kind == 'booking_created':
+        subject = f'Booking {booking_id} confirmed'
+        body = (f"Hi {payload['name']},\n\nYour {payload['event_type']} booking {booking_id} "
+                f"for {payload['event_date']} is confirmed.\n\nThank you for choosing Evento!")
+    else:
+        subject = f"Booking {booking_id} is now {payload['status']}"
+        body = (f"Hi {payload['name']},\n\nThe status of your booking {booking_id} "
+                f"for {payload['event_date']} changed to {payload['status']}.\n\nEvento")
+    return subject, body
+
+def claim_notifications(batch_size):
+    """Claim the oldest pending notifications plus every other pending row for the same bookings"""
+    now = datetime.utcnow()
+    table = Notification.__table__
+    try:
+        _begin_immediate()
+        db.session.execute(table.update().where(
+            table.c.status == 'sending',
+            table.c.claimed_at < now - timedelta(seconds=app.config['NOTIFY_LOCK_TIMEOUT'])
+        ).values(status='pending', claimed_at=None))
+
+        booking_ids = db.session.execute(
+            sa.select(table.c.booking_id)
+            .where(table.c.status == 'pending',
+                   sa.or_(table.c.retry_at.is_(None), table.c.retry_at <= now))
+            .group_by(table.c.booking_id)
+            .order_by(func.min(table.c.id))
+            .limit(batch_size)
+        ).scalars().all()
+        rows = []
+        if booking_ids:
+            rows = db.session.execute(
+                sa.select(table.c.id, table.c.booking_id, table.c.channel, table.c.recipient,
+                          table.c.kind, table.c.payload, table.c.attempts)
+                .where(table.c.status == 'pending', table.c.booking_id.in_(booking_ids))
+                .order_by(table.c.id)
+            ).all()
+            db.session.execute(table.update().where(table.c.id.in_([r.id for r in rows]))
+                               .values(status='sending', claimed_at=now))
+        db.session.commit()
+        return rows
+    except Exception:
+        db.session.rollback()
+        raise
+
+def dispatch_notifications(batch_size=None):
+    """Send one batch from the outbox. Returns the number of rows processed."""
+    rows = claim_notifications(batch_size or app.config['NOTIFY_BATCH_SIZE'])
+    if not rows:
+        return 0
+
+    # Coalesce: only the newest message per booking and channel is delivered
+    latest = {}
+    for row in rows:
+        latest[(row.booking_id, row.channel)] = row
+    superseded = [row.id for row in rows if latest[(row.booking_id, row.channel)] is not row]
+
+    sent, failed, retry = [], [], []
+    providers = {}
+    try:
+        for row in latest.values():
+            if row.channel not in providers:
+                providers[row.channel] = NOTIFICATION_PROVIDERS[row.channel]()
+            bucket = _notify_buckets.get(row.channel)
+            if bucket is None:
+                bucket = _notify_buckets[row.channel] = TokenBucket(app.config['NOTIFY_RATE_LIMITS'].get(row.channel, 10))
+            bucket.acquire()
+            try:
+                subject, body = render_notification(row.kind, row.booking_id, json.loads(row.payload))
+                providers[row.channel].send(row.recipient, subject, body)
+                sent.append(row.id)
+            except Exception as e:
+                print(f"Notification {row.id} to {row.recipient} failed: {str(e)}")
+                providers[row.channel].close()
+                if row.attempts + 1 >= app.config['NOTIFY_MAX_ATTEMPTS']:
+                    failed.append(row.id)
+                else:
+                    retry.append(row.id)
+    finally:
+        for provider in providers.values():
+            provider.close()
+
+    table = Notification.__table__
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        for ids, values in (
+            (sent, {'status': 'sent', 'sent_at': now}),
+            (superseded, {'status': 'superseded'}),
+            (failed, {'status': 'failed', 'attempts': table.c.attempts + 1}),
+            (retry, {'status': 'pending', 'attempts': table.c.attempts + 1,
+                     'retry_at': now + timedelta(seconds=app.config['NOTIFY_RETRY_DELAY'])}),
+        ):
+            if ids:
+                conn.execute(table.update().where(table.c.id.in_(ids)).values(claimed_at=None, **values))
+    return len(rows)
+
+def run_dispatcher(burst=False, poll_interval=2.0, stop_event=None):
+    """Dispatcher loop. With burst=True, return as soon as the outbox is empty."""
+    while not (stop_event and stop_event.is_set()):
+        with app.app_context():
+            ensure_db()
+            try:
+                processed = dispatch_notifications()
+            except sa.exc.OperationalError as e:
+                print(f"Notification dispatcher error: {str(e)}")
+                processed = 0
+        if not processed:
+            if burst:
+                return
+            time.sleep(poll_interval)
+
+@app.cli.command('dispatch-notifications')
+@click.option('--burst', is_flag=True, help='Exit once the outbox is empty.')
+@click.option('--poll-interval', default=2.0, show_default=True, help='Seconds to sleep when idle.')
+def dispatch_notifications_command(burst, poll_interval):
+    """Deliver queued booking notifications."""
+    print(f"Notification dispatcher started (pid {os.getpid()})")
+    try:
+        run_dispatcher(burst=burst, poll_interval=poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+# ==================== IDEMPOTENCY KEYS ====================
+# A client may send an Idempotency-Key header with a write. The first
+# successful response is stored with the key in the same transaction as the
+# write; repeats of the key replay that response without touching the
+# underlying tables. A small LRU in front makes repeats on the same worker free.
+app.config['IDEMPOTENCY_TTL'] = timedelta(hours=24)
+
+_idempotency_cache = LRUCache(maxsize=4096)
+
+def _request_fingerprint():
+    return hashlib.sha256(request.get_data()).hexdigest()
+
+def idempotent_replay(user_id, key):
+    """Stored response for a repeated key, an error if the key was reused for a
+    different request, or None for a new key"""
+    cutoff = datetime.utcnow() - app.config['IDEMPOTENCY_TTL']
+    entry = _idempotency_cache.get((user_id, key))
+    if entry is None or entry[2] < cutoff:
+        row = db.session.execute(
+            sa.select(IdempotencyKey.request_hash, IdempotencyKey.response, IdempotencyKey.created_at)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key,
+                   IdempotencyKey.created_at >= cutoff)
+        ).first()
+        if not row:
+            return None
+        entry = tuple(row)
+        _idempotency_cache.set((user_id, key), entry)
+    request_hash, body, _ = entry
+    if request_hash != _request_fingerprint():
+        response = jsonify({'success': False, 'message': 'Idempotency-Key was already used for a different request'})
+        response.status_code = 422
+        return response
+    response = Response(body, mimetype='application/json')
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+def remember_response(user_id, key, body, request_hash=None):
+    """Store a response for `key` in the current transaction"""
+    now = datetime.utcnow()
+    db.session.add(IdempotencyKey(
+        user_id=user_id, key=key, request_hash=request_hash or _request_fingerprint(),
+        response=json.dumps(body), created_at=now
+    ))
+    if random.random() < 0.01:
+        IdempotencyKey.query.filter(
+            IdempotencyKey.created_at < now - app.config['IDEMPOTENCY_TTL']
+        ).delete(synchronize_session=False)
+
+# ==================== RATE LIMITING ====================
+# Token buckets per client IP and per user, shared by every worker process
+# through a small SQLite file of its own (WAL, no fsync), so throttling never
+# waits on the main database's writer lock. Limits are checked before the
+# view runs, i.e. before any password hashing or booking writes.
+app.config['RATE_LIMIT_ENABLED'] = os.environ.get('RATE_LIMIT_ENABLED', '1') == '1'
+app.config['RATE_LIMIT_DB'] = os.environ.get('RATE_LIMIT_DB', os.path.join(app.instance_path, 'ratelimit.db'))
+# route -> {'ip': (requests, seconds), 'user': (requests, seconds)}
+app.config['RATE_LIMITS'] = {
+    'login_user': {'ip': (20, 60), 'user': (5, 60)},
+    'register_user': {'ip': (5, 600)},
+    'create_booking': {'ip': (30, 60), 'user': (10, 60)},
+}
+
+_rate_limit_local = threading.local()
+
+_TAKE_TOKEN_SQL = """
+INSERT INTO bucket (key, tokens, updated_at) VALUES (:key, :capacity - 1, :now)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = min(:capacity, tokens + (:now - updated_at) * :rate) - 1,
+    updated_at = :now
+WHERE min(:capacity, tokens + (:now - updated_at) * :rate) >= 1
+"""
+
+def _rate_limit_db():
+    conn = getattr(_rate_limit_local, 'conn', None)
+    if conn is None:
+        path = app.config['RATE_LIMIT_DB']
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = sqlite3.connect(path, timeout=1, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute('CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)')
+        _rate_limit_local.conn = conn
+    return conn
+
+def take_token(key, capacity, period):
+    """Take one token from a shared bucket. Returns 0 if allowed, else seconds until a token is free."""
+    rate = capacity / period
+    now = time.time()
+    conn = _rate_limit_db()
+    if conn.execute(_TAKE_TOKEN_SQL, {'key': key, 'capacity': capacity, 'rate': rate, 'now': now}).rowcount:
+        if random.random() < 0.001:
+            # Forget buckets that have been full for a day
+            conn.execute('DELETE FROM bucket WHERE updated_at < ?', (now - 86400,))
+        return 0
+    row = conn.execute('SELECT tokens, updated_at FROM bucket WHERE key = ?', (key,)).fetchone()
+    tokens = min(capacity, row[0] + (now - row[1]) * rate) if row else 0
+    return max((1 - tokens) / rate, 0.001)
+
+def too_many_requests(retry_after):
+    retry_after = int(math.ceil(retry_after))
+    message = f'Too many requests. Please try again in {retry_after} seconds.'
+    if request.is_json:
+        response = jsonify({'success': False, 'message': message})
+    else:
+        response = Response(message, mimetype='text/plain')
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def rate_limit(route, user_key=None):
+    """Throttle a view with the RATE_LIMITS entry for `route`.
+
+    `user_key` returns the identity for the per-user bucket (e.g. the email
+    being logged into), or None to skip it.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            limits = app.config['RATE_LIMITS'].get(route)
+            if app.config['RATE_LIMIT_ENABLED'] and limits:
+                buckets = []
+                if 'ip' in limits:
+                    buckets.append((f'{route}:ip:{request.remote_addr}', limits['ip']))
+                identity = user_key() if user_key and 'user' in limits else None
+                if identity:
+                    buckets.append((f'{route}:user:{identity}', limits['user']))
+                for key, (capacity, period) in buckets:
+                    try:
+                        wait = take_token(key, capacity, period)
+                    except sqlite3.Error as e:
+                        # Fail open: throttling must not take the site down
+                        print(f"Rate limit error: {str(e)}")
+                        wait = 0
+                    if wait:
+                        return too_many_requests(wait)
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+def _form_email():
+    return (request.form.get('email') or '').strip().lower() or None
+
+# ==================== SLOW QUERY LOG ====================
+# Every SQL statement is timed by engine hooks and aggregated per statement
+# text (parameters are already bound separately, so the text identifies the
+# query). Statements slower than SLOW_QUERY_MS are logged with the shape of
+# their parameters and the route that ran them, and get an EXPLAIN QUERY PLAN
+# captured once so full table scans stand out. Stats are per process; admins
+# read the top offenders at /admin/queries.
+app.config['SLOW_QUERY_MS'] = float(os.environ.get('SLOW_QUERY_MS', 100))  # 0 disables query timing
+app.config['QUERY_STATS_SIZE'] = 500  # distinct statements tracked
+
+class QueryStats:
+    __slots__ = ('statement', 'count', 'total_ms', 'max_ms', 'slow_count', 'routes',
+                 'params', 'plan', 'full_scan')
+
+    def __init__(self, statement):
+        self.statement = statement
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow_count = 0
+        self.routes = {}
+        self.params = None
+        self.plan = None
+        self.full_scan = None
+
+    def to_dict(self):
+        return {
+            'statement': self.statement,
+            'count': self.count,
+            'total_ms': round(self.total_ms, 2),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else 0,
+            'max_ms': round(self.max_ms, 2),
+            'slow_count': self.slow_count,
+            'routes': self.routes,
+            'params': self.params,
+            'plan': self.plan,
+            'full_scan': self.full_scan,
+        }
+
+_query_stats = OrderedDict()
+_query_stats_lock = threading.Lock()
+
+def params_shape(parameters, executemany=False):
+    """Parameter names and types without their values, e.g. {'status_1': 'str'}"""
+    if executemany:
+        rows = list(parameters)
+        return {'rows': len(rows), 'each': params_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+def query_route():
+    if has_request_context():
+        return request.endpoint or request.path
+    return threading.current_thread().name
+
+def explain_query_plan(dbapi_connection, statement, parameters):
+    """SQLite query plan details for a statement, e.g. ['SCAN booking']"""
+    cursor = dbapi_connection.cursor()
+    try:
+        return [row[-1] for row in cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+    finally:
+        cursor.close()
+
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'INSERT')
+
+def is_full_scan(plan):
+    return any(detail.startswith('SCAN ') and detail != 'SCAN CONSTANT ROW' for detail in plan)
+
+@sa.event.listens_for(sa.engine.Engine, 'before_cursor_execute')
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if app.config['SLOW_QUERY_MS']:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@sa.event.listens_for(sa.engine.Engine, 'handle_error')
+def drop_query_timer(context):
+    # A failed statement never reaches after_cursor_execute: drop its start time
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+@sa.event.listens_for(sa.engine.Engine, 'after_cursor_execute')
+def record_query_time(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if not started:
+        return
+    elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+    slow = elapsed_ms >= app.config['SLOW_QUERY_MS']
+    if app.config['SLOW_REQUEST_MS'] and has_request_context():
+        # Per-request totals, kept with the capture if the request turns out slow
+        totals = request.environ.setdefault('evento.queries', {}).setdefault(statement, [0, 0.0])
+        totals[0] += 1
+        totals[1] += elapsed_ms
+    with _query_stats_lock:
+        stats = _query_stats.get(statement)
+        if stats is None:
+            while len(_query_stats) >= app.config['QUERY_STATS_SIZE']:
+                # Make room by evicting the statement costing the least so far
+                del _query_stats[min(_query_stats, key=lambda key: _query_stats[key].total_ms)]
+            stats = _query_stats[statement] = QueryStats(statement)
+        stats.count += 1
+        stats.total_ms += elapsed_ms
+        stats.max_ms = max(stats.max_ms, elapsed_ms)
+        if not slow:
+            return
+        stats.slow_count += 1
+        route = query_route()
+        stats.routes[route] = stats.routes.get(route, 0) + 1
+        stats.params = params_shape(parameters, executemany)
+        needs_plan = stats.plan is None
+    
+    verb = statement.lstrip()[:6].upper()
+    if needs_plan and conn.dialect.name == 'sqlite' and verb in EXPLAINABLE:
+        try:
+            plan = explain_query_plan(conn.connection.dbapi_connection, statement,
+                                      parameters[0] if executemany else parameters)
+            stats.plan, stats.full_scan = plan, is_full_scan(plan)
+        except Exception as e:
+            stats.plan = [f'EXPLAIN failed: {str(e)}']
+    print(f"Slow query {elapsed_ms:.1f} ms in {route}{' [FULL SCAN]' if stats.full_scan else ''}: "
+          f"{' '.join(statement.split())[:300]} params={stats.params}")
+
+# ==================== PROFILING ====================
+# Requests can be profiled on demand: admins send `X-Profile: 1`, and a
+# PROFILE_SAMPLE_RATE fraction of all requests is picked at random. Those run
+# under cProfile. Every request slower than SLOW_REQUEST_MS is captured with
+# its duration, endpoint and the statements it ran (timed by the slow-query
+# log). Stacks cost a background sampler waking every PROFILE_SAMPLE_INTERVAL
+# seconds, so they are opt-in: with SLOW_REQUEST_STACKS=1 the sampler records
+# every in-flight request and a slow one keeps its samples as folded stacks.
+# Captures go to a ring buffer of the newest PROFILE_KEEP files in PROFILE_DIR.
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 100))
+app.config['SLOW_REQUEST_MS'] = int(os.environ.get('SLOW_REQUEST_MS', 500))  # 0 disables slow capture
+app.config['SLOW_REQUEST_STACKS'] = os.environ.get('SLOW_REQUEST_STACKS', '0') == '1'
+app.config['SLOW_REQUEST_QUERIES'] = 50  # statements kept per capture, costliest first
+app.config['PROFILE_SAMPLE_INTERVAL'] = 0.01
+
+CAPTURE_ID_RE = re.compile(r'^\d+-[0-9a-f]{6}$')
+
+class StackSampler:
+    """Background thread counting the call stacks of registered request threads"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._stacks = {}  # thread id -> {folded stack: samples}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+
+    def register(self):
+        with self._lock:
+            self._stacks[threading.get_ident()] = {}
+
+    def unregister(self):
+        with self._lock:
+            return self._stacks.pop(threading.get_ident(), {})
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._stacks:
+                    continue
+                frames = sys._current_frames()
+                for ident, counts in self._stacks.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stack = self._fold(frame)
+                        counts[stack] = counts.get(stack, 0) + 1
+
+    @staticmethod
+    def _fold(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+stack_sampler = StackSampler(app.config['PROFILE_SAMPLE_INTERVAL'])
+
+def _profile_requested():
+    if request.headers.get('X-Profile') == '1' and 'user_id' in session:
+        user = db.session.get(User, session['user_id'])
+        if user and user.is_admin:
+            return True
+    rate = app.config['PROFILE_SAMPLE_RATE']
+    return rate > 0 and random.random() < rate
+
+def request_queries():
+    """Statements this request ran, costliest first, as recorded by record_query_time"""
+    queries = [{'statement': statement, 'count': count, 'total_ms': round(total_ms, 2)}
+               for statement, (count, total_ms) in request.environ.get('evento.queries', {}).items()]
+    queries.sort(key=lambda query: query['total_ms'], reverse=True)
+    return queries[:app.config['SLOW_REQUEST_QUERIES']]
+
+def save_capture(kind, duration_ms, status, write_data=None, extension=None, queries=None):
+    """Write one capture (optional data file + JSON metadata) and drop the oldest beyond PROFILE_KEEP"""
+    profile_dir = app.config['PROFILE_DIR']
+    os.makedirs(profile_dir, exist_ok=True)
+    capture_id = f'{int(time.time() * 1000)}-{secrets.token_hex(3)}'
+    data_file = None
+    if write_data is not None:
+        data_file = f'{capture_id}.{extension}'
+        write_data(os.path.join(profile_dir, data_file))
+    meta = {
+        'id': capture_id,
+        'kind': kind,
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'status': status,
+        'duration_ms': round(duration_ms, 1),
+        'user_id': session.get('user_id'),
+        'captured_at': datetime.utcnow().isoformat(timespec='seconds'),
+        'file': data_file,
+    }
+    if queries is not None:
+        meta['queries'] = queries
+    with open(os.path.join(profile_dir, f'{capture_id}.json'), 'w') as f:
+        json.dump(meta, f)
+    
+    captures = sorted(name[:-5] for name in os.listdir(profile_dir) if name.endswith('.json'))
+    for old in captures[:-app.config['PROFILE_KEEP']]:
+        for name in os.listdir(profile_dir):
+            if name.startswith(old + '.'):
+                try:
+                    os.remove(os.path.join(profile_dir, name))
+                except OSError:
+                    pass
+
+def list_captures():
+    profile_dir = app.config['PROFILE_DIR']
+    if not os.path.isdir(profile_dir):
+        return []
+    captures = []
+    for name in sorted(os.listdir(profile_dir), reverse=True):
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(profile_dir, name)) as f:
+                    captures.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # pruned or half-written by another worker
+    return captures
+
+@app.before_request
+def start_profiling():
+    request.environ['evento.started'] = time.perf_counter()
+    if app.config['SLOW_REQUEST_MS'] and app.config['SLOW_REQUEST_STACKS']:
+        stack_sampler.start()
+        stack_sampler.register()
+        request.environ['evento.sampled'] = True
+    if _profile_requested():
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return  # another profiler is active in this process
+        request.environ['evento.profiler'] = profiler
+
+@app.after_request
+def finish_profiling(response):
+    started = request.environ.get('evento.started')
+    if started is None:
+        return response
+    duration_ms = (time.perf_counter() - started) * 1000
+    profiler = request.environ.pop('evento.profiler', None)
+    stacks = stack_sampler.unregister() if request.environ.pop('evento.sampled', False) else {}
+    try:
+        if profiler is not None:
+            profiler.disable()
+            save_capture('profile', duration_ms, response.status_code, profiler.dump_stats, 'prof')
+        elif app.config['SLOW_REQUEST_MS'] and duration_ms >= app.config['SLOW_REQUEST_MS']:
+            def write_folded(path):
+                with open(path, 'w') as f:
+                    for stack, count in sorted(stacks.items(), key=lambda item: -item[1]):
+                        f.write(f'{stack} {count}\n')
+            save_capture('slow', duration_ms, response.status_code, write_folded if stacks else None, 'folded',
+                         queries=request_queries())
+    except OSError as e:
+        print(f"Profile capture error: {str(e)}")
+    response.headers['Server-Timing'] = f'app;dur={duration_ms:.1f}'
+    return response
+
+@app.teardown_request
+def stop_profiling(exc):
+    # after_request is skipped when a view raises; never leave a thread registered
+    if request.environ.pop('evento.sampled', False):
+        stack_sampler.unregister()
+    profiler = request.environ.pop('evento.profiler', None)
+    if profiler is not None:
+        profiler.disable()
+
+# ==================== STALE-WHILE-REVALIDATE ====================
+# The public catalog reads keep their last good response per tenant and URL.
+# Once a copy is cached, the route's queries run under a latency budget: the
+# SQLite busy timeout is cut to the budget and a progress handler interrupts
+# statements that run past it. When the budget is blown or the database is
+# locked (a purge, migration or backup holding the write lock) the cached copy
+# is served, marked with X-Cache: STALE and an Age header, and one background
+# thread per key re-runs the route without a budget to refresh it.
+# Pages behind a login (/mainhome, the admin reports) are never cached whole:
+# their session and permission checks always read the database, and only the
+# catalog and rollup reads they make go through stale_read(), which falls back
+# to that read's last good result the same way.
+app.config['STALE_READ_BUDGET_MS'] = int(os.environ.get('STALE_READ_BUDGET_MS', 250))
+app.config['STALE_READ_MAX_AGE'] = int(os.environ.get('STALE_READ_MAX_AGE', 3600))  # seconds
+app.config['STALE_READ_CACHE_SIZE'] = 512  # per tenant
+# Per-endpoint overrides of budget_ms / max_age; None turns the fallback off
+app.config['STALE_READ_POLICIES'] = {
+    'mainhome': {'budget_ms': 500, 'max_age': 600},
+    'admin_reports': {'budget_ms': 1000},
+    'admin_report_range': {'budget_ms': 1000},
+}
+
+_stale_cache = TenantCache(maxsize=app.config['STALE_READ_CACHE_SIZE'])
+_stale_refreshing = set()
+_stale_lock = threading.Lock()
+
+StaleEntry = namedtuple('StaleEntry', 'stored_at body status mimetype')
+StaleValue = namedtuple('StaleValue', 'stored_at value')
+
+def stale_read_policy(endpoint):
+    policies = app.config['STALE_READ_POLICIES']
+    if endpoint in policies and policies[endpoint] is None:
+        return None
+    return {
+        'budget_ms': app.config['STALE_READ_BUDGET_MS'],
+        'max_age': app.config['STALE_READ_MAX_AGE'],
+        **policies.get(endpoint, {})
+    }
+
+def is_busy_error(error):
+    """SQLITE_BUSY/LOCKED, or a statement stopped by the budget's progress handler"""
+    message = str(getattr(error, 'orig', error)).lower()
+    return 'database is locked' in message or 'database table is locked' in message or 'interrupted' in message
+
+@sa.event.listens_for(sa.engine.Engine, 'handle_error')
+def note_busy_error(context):
+    # Views catch their own exceptions and answer {'success': False}, so the
+    # failure is recorded where the stale-read wrapper can still see it
+    if has_app_context() and is_busy_error(context.original_exception):
+        g.stale_read_busy = True
+
+@contextlib.contextmanager
+def read_budget(budget_ms):
+    """Limit SQLite lock waits and statement run time on this request's connection"""
+    dbapi_connection = db.session.connection().connection.driver_connection
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        yield
+        return
+    deadline = time.monotonic() + budget_ms / 1000
+    previous = dbapi_connection.execute('PRAGMA busy_timeout').fetchone()[0]
+    dbapi_connection.execute(f'PRAGMA busy_timeout = {int(budget_ms)}')
+    dbapi_connection.set_progress_handler(lambda: time.monotonic() > deadline, 1000)
+    try:
+        yield
+    finally:
+        dbapi_connection.set_progress_handler(None, 0)
+        dbapi_connection.execute(f'PRAGMA busy_timeout = {previous}')
+
+def store_stale_entry(key, response):
+    if response.status_code == 200 and not response.is_streamed and not g.get('stale_read_busy'):
+        _stale_cache.set(key, StaleEntry(time.time(), response.get_data(), 200, response.mimetype))
+
+def refresh_stale_entry(key, tenant_id, view, kwargs, environ):
+    """Re-run a view for a fresh copy, without a budget, off the request thread"""
+    try:
+        with app.request_context(environ):
+            g.tenant_id = tenant_id
+            store_stale_entry(key, app.make_response(view(**kwargs)))
+    except Exception as e:
+        print(f"Stale read refresh error for {key[0]}: {str(e)}")
+    finally:
+        with _stale_lock:
+            _stale_refreshing.discard((tenant_id, key))
+
+def serve_stale(key, entry, view, kwargs):
+    tenant_id = current_tenant_id()
+    with _stale_lock:
+        refreshing = (tenant_id, key) in _stale_refreshing
+        _stale_refreshing.add((tenant_id, key))
+    if not refreshing:
+        threading.Thread(target=refresh_stale_entry, args=(key, tenant_id, view, kwargs, dict(request.environ)),
+                         daemon=True, name='stale-refresh').start()
+    response = Response(entry.body, status=entry.status, mimetype=entry.mimetype)
+    response.headers['X-Cache'] = 'STALE'
+    response.headers['Age'] = str(int(time.time() - entry.stored_at))
+    return response
+
+def stale_while_revalidate(view):
+    """Serve the last good response when this public read route is slow or locked out"""
+    @functools.wraps(view)
+    def wrapper(**kwargs):
+        policy = stale_read_policy(request.endpoint)
+        if policy is None or request.method != 'GET':
+            return view(**kwargs)
+        key = (request.endpoint, request.full_path)
+        entry = _stale_cache.get(key)
+        if entry is not None and time.time() - entry.stored_at > policy['max_age']:
+            entry = None
+        if entry is None:
+            response = app.make_response(view(**kwargs))
+            store_stale_entry(key, response)
+            return response
+
+        try:
+            with read_budget(policy['budget_ms']):
+                response = app.make_response(view(**kwargs))
+        except sa.exc.OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            g.stale_read_busy = True
+        if g.get('stale_read_busy'):
+            db.session.rollback()
+            return serve_stale(key, entry, view, kwargs)
+        store_stale_entry(key, response)
+        return response
+    return wrapper
+
+def stale_read(compute, *key):
+    """compute() (a catalog or rollup read), or its last good result for this
+    tenant, endpoint and `key` while the database is locked or slow. Callers run
+    their session and permission checks first; those are never cached."""
+    policy = stale_read_policy(request.endpoint)
+    if policy is None:
+        return compute()
+    key = ('data', request.endpoint) + key
+    entry = _stale_cache.get(key)
+    if entry is not None and time.time() - entry.stored_at > policy['max_age']:
+        entry = None
+    if entry is None:
+        value = compute()
+    else:
+        try:
+            with read_budget(policy['budget_ms']):
+                value = compute()
+        except sa.exc.OperationalError as e:
+            if not is_busy_error(e):
+                raise
+            # A failed SELECT leaves the transaction usable, and rolling back
+            # would expire the user the view has already loaded
+            g.stale_read_age = max(g.get('stale_read_age', 0), int(time.time() - entry.stored_at))
+            return entry.value
+    _stale_cache.set(key, StaleValue(time.time(), value))
+    return value
+
+@app.after_request
+def mark_stale_reads(response):
+    if g.get('stale_read_age') is not None:
+        response.headers['X-Cache'] = 'STALE'
+        response.headers['Age'] = str(g.stale_read_age)
+    return response
+
+def active_catalog():
+    """(services, halls, packages) rows of the active catalog"""
+    return tuple(
+        read_records(record, record_query(model, record).where(model.__table__.c.is_active == True))
+        for model, record in ((Service, ServiceRow), (Hall, HallRow), (Package, PackageRow))
+    )
 
 # Routes
 @app.route('/')
@@ -158,9 +2576,7 @@ def mainhome():
         return redirect(url_for('login_page'))
     
     # Get all services, halls, and packages for the homepage
-    services = Service.query.filter_by(is_active=True).all()
-    halls = Hall.query.filter_by(is_active=True).all()
-    packages = Package.query.filter_by(is_active=True).all()
+    services, halls, packages = stale_read(active_catalog)
     
     return render_template('mainhome.html', 
                          user=user,
@@ -234,6 +2650,7 @@ def register_page():
     return render_template('register.html')
 
 @app.route('/register_user', methods=['POST'])
+@rate_limit('register_user', user_key=_form_email)
 def register_user():
     try:
         name = request.form.get('name')
@@ -262,13 +2679,14 @@ def register_user():
         )
         
         db.session.add(new_user)
+        db.session.flush()
+        record_change('user_added', user_event_data(new_user))
         db.session.commit()
         
         # Auto login after registration
+        session.clear()
+        session.regenerate()
         session['user_id'] = new_user.id
-        session['user_name'] = new_user.name
-        session['user_email'] = new_user.email
-        session['is_admin'] = new_user.is_admin
         
         flash('Registration successful! Welcome to Evento.', 'success')
         return redirect(url_for('mainhome'))
@@ -295,6 +2713,7 @@ def admin_login_page():
     return render_template('adminlogin.html')
 
 @app.route('/login_user', methods=['POST'])
+@rate_limit('login_user', user_key=_form_email)
 def login_user():
     try:
         email = request.form.get('email')
@@ -303,10 +2722,9 @@ def login_user():
         user = User.query.filter_by(email=email).first()
         
         if user and check_password_hash(user.password, password):
+            session.clear()
+            session.regenerate()
             session['user_id'] = user.id
-            session['user_name'] = user.name
-            session['user_email'] = user.email
-            session['is_admin'] = user.is_admin
             
             flash('Login successful!', 'success')
             if user.is_admin:
@@ -325,45 +2743,227 @@ def login_user():
 @app.route('/logout')
 def logout():
     session.clear()
+    session.regenerate()
     flash('Logged out successfully!', 'success')
     return redirect(url_for('login_page'))
 
 @app.route('/api/services')
+@stale_while_revalidate
 def get_services():
-    services = Service.query.filter_by(is_active=True).all()
-    return jsonify([{
-        'id': s.id,
-        'name': s.name,
-        'description': s.description,
-        'price': s.price,
-        'category': s.category
-    } for s in services])
+    query = record_query(Service, ServiceRow).where(Service.__table__.c.is_active == True)
+    return json_response(read_dicts(query))
 
 @app.route('/api/halls')
+@stale_while_revalidate
 def get_halls():
-    halls = Hall.query.filter_by(is_active=True).all()
-    return jsonify([{
-        'id': h.id,
-        'name': h.name,
-        'location': h.location,
-        'description': h.description,
-        'price': h.price,
-        'capacity': h.capacity,
-        'image_url': h.image_url
-    } for h in halls])
+    query = record_query(Hall, HallRow).where(Hall.__table__.c.is_active == True)
+    return json_response(read_dicts(query))
 
 @app.route('/api/packages')
+@stale_while_revalidate
 def get_packages():
-    packages = Package.query.filter_by(is_active=True).all()
-    return jsonify([{
-        'id': p.id,
-        'name': p.name,
-        'description': p.description,
-        'price': p.price,
-        'features': p.features
-    } for p in packages])
+    query = record_query(Package, PackageRow).where(Package.__table__.c.is_active == True)
+    return json_response(read_dicts(query))
+
+# ==================== HALL SEARCH ====================
+# Active halls are held in memory, pre-sorted by capacity and by price and
+# grouped by location. A search bisects whichever index narrows the catalog
+# most and filters only that slice. The indexes are rebuilt when the catalog
+# version changes, i.e. after any hall/service/package write in any worker.
+HallRecord = namedtuple('HallRecord', 'id name location description price capacity image_url')
+
+class HallIndex:
+    def __init__(self, halls):
+        self.by_capacity = sorted(halls, key=lambda h: (h.capacity or 0, h.price, h.id))
+        self.capacities = [h.capacity or 0 for h in self.by_capacity]
+        self.by_price = sorted(halls, key=lambda h: (h.price, h.id))
+        self.prices = [h.price for h in self.by_price]
+        self.by_location = {}
+        for hall in self.by_capacity:
+            self.by_location.setdefault(normalize_location(hall.location), []).append(hall)
+
+    def search(self, min_capacity=None, max_price=None, location=None, exclude=()):
+        slices = [self.by_capacity]
+        if min_capacity:
+            slices.append(self.by_capacity[bisect.bisect_left(self.capacities, min_capacity):])
+        if max_price is not None:
+            slices.append(self.by_price[:bisect.bisect_right(self.prices, max_price)])
+        if location:
+            slices.append(self.by_location.get(normalize_location(location), []))
+        candidates = min(slices, key=len)
+        return [
+            h for h in candidates
+            if (not min_capacity or (h.capacity or 0) >= min_capacity)
+            and (max_price is None or h.price <= max_price)
+            and (not location or normalize_location(h.location) == normalize_location(location))
+            and h.name not in exclude
+        ]
+
+def normalize_location(location):
+    return (location or '').strip().lower()
+
+_hall_indexes = TenantCache(maxsize=1)  # (catalog version, HallIndex) per tenant
+_hall_index_lock = threading.Lock()
+
+def get_hall_index():
+    version = get_cache_version(catalog_version_key())
+    cached = _hall_indexes.get('halls')
+    if cached is None or cached[0] != version:
+        with _hall_index_lock:
+            cached = _hall_indexes.get('halls')
+            if cached is None or cached[0] != version:
+                rows = db.session.execute(
+                    sa.select(Hall.id, Hall.name, Hall.location, Hall.description,
+                              Hall.price, Hall.capacity, Hall.image_url)
+                    .where(Hall.is_active == True)
+                ).all()
+                cached = (version, HallIndex([HallRecord(*row) for row in rows]))
+                _hall_indexes.set('halls', cached)
+    return cached[1]
+
+HALL_SORTS = {
+    'fit': lambda h: (h.capacity or 0, h.price),  # smallest hall that fits, then cheapest
+    'price': lambda h: (h.price, h.capacity or 0),
+    'capacity': lambda h: (-(h.capacity or 0), h.price),
+}
+
+@app.route('/api/halls/search')
+def search_halls():
+    guests = request.args.get('guests', type=int)
+    max_price = request.args.get('max_price', type=int)
+    location = request.args.get('location', '').strip() or None
+    sort = request.args.get('sort', 'fit')
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    
+    event_date = None
+    if request.args.get('date'):
+        try:
+            event_date = datetime.strptime(request.args['date'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'success': False, 'message': 'date must be YYYY-MM-DD'}), 400
+    if sort not in HALL_SORTS:
+        return jsonify({'success': False, 'message': f"sort must be one of {', '.join(HALL_SORTS)}"}), 400
+    
+    booked = ()
+    if event_date:
+        bookings = booking_union(lambda table: sa.select(table.c.hall_name).where(
+            table.c.event_date == event_date,
+            table.c.hall_name.isnot(None),
+            table.c.status != 'cancelled'
+        ), event_date, event_date)
+        booked = set(db.session.execute(sa.select(bookings.c.hall_name).distinct()).scalars())
+    
+    halls = get_hall_index().search(guests, max_price, location, exclude=booked)
+    halls.sort(key=HALL_SORTS[sort])
+    start = (page - 1) * per_page
+    return jsonify({
+        'success': True,
+        'total': len(halls),
+        'page': page,
+        'per_page': per_page,
+        'has_more': start + per_page < len(halls),
+        'halls': [h._asdict() for h in halls[start:start + per_page]]
+    })
+
+# ==================== GROUP COMMIT ====================
+# With WRITE_BATCHING=1, create_booking hands its writes to one writer thread
+# per process instead of committing them itself. The writer gathers the writes
+# arriving within WRITE_BATCH_WINDOW seconds (up to WRITE_BATCH_MAX), runs each
+# in its own SAVEPOINT so a constraint failure only fails that booking,
+# commits the batch in one transaction (one fsync) and then hands every
+# waiting request its own result or error.
+app.config['WRITE_BATCHING'] = os.environ.get('WRITE_BATCHING', '0') == '1'
+app.config['WRITE_BATCH_WINDOW'] = float(os.environ.get('WRITE_BATCH_WINDOW', 0.005))
+app.config['WRITE_BATCH_MAX'] = int(os.environ.get('WRITE_BATCH_MAX', 64))
+app.config['WRITE_BATCH_TIMEOUT'] = 30  # seconds a queued write may wait before it is cancelled
+
+class WriteBatcher:
+    """Single writer thread committing queued write callables in batches"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, write):
+        """Run write() (which adds to db.session) in the next batch and return its
+        result once that batch has committed, or raise its error"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-batcher', daemon=True)
+                self._thread.start()
+        future = concurrent.futures.Future()
+        self._queue.put((write, future, request_tenant_id()))
+        try:
+            return future.result(timeout=app.config['WRITE_BATCH_TIMEOUT'])
+        except concurrent.futures.TimeoutError:
+            if future.cancel():
+                raise
+            return future.result()  # already being committed; its outcome is final
+
+    def _run(self):
+        with app.app_context():
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + app.config['WRITE_BATCH_WINDOW']
+                while len(batch) < app.config['WRITE_BATCH_MAX']:
+                    try:
+                        batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0)))
+                    except queue.Empty:
+                        break
+                try:
+                    self._commit(batch)
+                finally:
+                    db.session.remove()
+
+    def _commit(self, batch):
+        outcomes = []
+        try:
+            _begin_immediate()
+            for write, future, tenant_id in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                g.tenant_id = tenant_id  # scope this item like the request that queued it
+                try:
+                    with db.session.begin_nested():  # flushes on exit
+                        result = write()
+                except Exception as e:
+                    outcomes.append((future, None, e))
+                else:
+                    outcomes.append((future, result, None))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Write batch of {len(batch)} failed: {str(e)}")
+            for _, future, _ in batch:
+                if future.running():
+                    future.set_exception(e)
+            return
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+write_batcher = WriteBatcher()
+
+def commit_write(write):
+    """Run write() and commit it, either directly or through the group-commit writer"""
+    if app.config['WRITE_BATCHING']:
+        db.session.commit()  # hand this request's connection back to the pool while it waits
+        return write_batcher.submit(write)
+    result = write()
+    db.session.commit()
+    return result
+
+def new_booking_id():
+    """EVT-<yymmdd><10 random base32 chars>, unique even for bookings made in the same second"""
+    suffix = base64.b32encode(secrets.token_bytes(10)).decode()[:10]
+    return f"EVT-{datetime.now().strftime('%y%m%d')}{suffix}"
 
 @app.route('/create_booking', methods=['POST'])
+@rate_limit('create_booking', user_key=lambda: session.get('user_id'))
 def create_booking():
     print("=== CREATE BOOKING ENDPOINT CALLED ===")
     
@@ -371,6 +2971,14 @@ def create_booking():
         print("ERROR: User not logged in")
         return jsonify({'success': False, 'message': 'Please login first!'})
     
+    # Retried requests with the same Idempotency-Key get the original response
+    idempotency_key = (request.headers.get('Idempotency-Key') or '')[:255] or None
+    if idempotency_key:
+        replay = idempotent_replay(session['user_id'], idempotency_key)
+        if replay is not None:
+            print(f"Replaying response for Idempotency-Key {idempotency_key}")
+            return replay
+    
     try:
         # Get JSON data from frontend
         data = request.get_json()
@@ -380,7 +2988,7 @@ def create_booking():
             return jsonify({'success': False, 'message': 'No data received'})
         
         # Generate booking ID
-        booking_id = 'EVT-' + datetime.now().strftime('%Y%m%d%H%M%S')
+        booking_id = new_booking_id()
         print(f"Generated booking ID: {booking_id}")
         
         # Parse date
@@ -423,25 +3031,100 @@ def create_booking():
             status='confirmed'
         )
         
-        db.session.add(booking)
-        db.session.commit()
+        user_id = session['user_id']
+        event_data = booking_event_data(booking, db.session.get(User, user_id))
+        request_hash = _request_fingerprint()
+        
+        def write():
+            db.session.add(booking)
+            schedule_receipt_pdf(booking_id)
+            queue_notification(booking, 'booking_created')
+            record_change('booking_created', event_data)
+            result = {
+                'success': True,
+                'booking_id': booking_id,
+                'message': 'Booking confirmed successfully!'
+            }
+            if idempotency_key:
+                remember_response(user_id, idempotency_key, result, request_hash)
+            return result
+        
+        result = commit_write(write)
         
         print(f"=== BOOKING SUCCESSFULLY SAVED ===")
         print(f"Booking ID: {booking_id}")
         print(f"User ID: {session['user_id']}")
         
-        return jsonify({
-            'success': True,
-            'booking_id': booking_id,
-            'message': 'Booking confirmed successfully!'
-        })
-        
+        return jsonify(result)
+        
     except Exception as e:
         db.session.rollback()
+        if idempotency_key and isinstance(e, sa.exc.IntegrityError):
+            # A concurrent retry with the same key committed first
+            replay = idempotent_replay(session['user_id'], idempotency_key)
+            if replay is not None:
+                return replay
         print(f"=== BOOKING ERROR: {str(e)} ===")
         traceback.print_exc()
         return jsonify({'success': False, 'message': f'Booking failed: {str(e)}'})
 
+# Booking history is cursor-paginated on (created_at, id) and cached per user;
+# both caches are keyed on the user's bookings version, so any booking write
+# for that user makes the old entries unreachable.
+HISTORY_PAGE_SIZE = 20
+_history_cache = LRUCache(maxsize=2048)
+_receipt_cache = LRUCache(maxsize=1024)
+
+def encode_history_cursor(created_at, id):
+    raw = f'{created_at.isoformat()}|{id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_history_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+def load_booking_history(user_id, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """One page of a user's bookings, newest first, plus the cursor of the next page.
+    Tables are read newest first, each for its own first page, until the page is
+    full and the next partition holds only older bookings."""
+    position = decode_history_cursor(cursor) if cursor else None
+    rows = []
+    for table, newest in history_tables(position):
+        if len(rows) > limit and newest < rows[limit]['created_at']:
+            break
+        c = table.c
+        query = sa.select(
+            c.id, c.booking_id, c.event_date, c.event_type, c.guests, c.hall_name,
+            c.package_name, c.service_name, c.total_amount, c.status, c.created_at
+        ).where(c.user_id == user_id)
+        if position:
+            created_at, id = position
+            query = query.where(sa.or_(
+                c.created_at < created_at,
+                sa.and_(c.created_at == created_at, c.id < id)
+            ))
+        rows += db.session.execute(
+            query.order_by(c.created_at.desc(), c.id.desc()).limit(limit + 1)
+        ).mappings().all()
+        rows.sort(key=lambda row: (row['created_at'], row['id']), reverse=True)
+
+    bookings = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = bookings[-1]
+        next_cursor = encode_history_cursor(last['created_at'], last['id'])
+    return bookings, next_cursor
+
+def receipt_context(booking):
+    """Amounts shown on a receipt"""
+    subtotal = (booking.service_price or 0) + (booking.hall_price or 0) + (booking.package_price or 0)
+    gst = subtotal * 0.18
+    return {'subtotal': subtotal, 'gst': gst, 'total_with_gst': subtotal + gst}
+
 @app.route('/booking_history')
 def booking_history():
     if 'user_id' not in session:
@@ -449,9 +3132,17 @@ def booking_history():
         return redirect(url_for('login_page'))
     
     user_id = session['user_id']
-    bookings = Booking.query.filter_by(user_id=user_id).order_by(Booking.created_at.desc()).all()
+    cursor = request.args.get('cursor')
+    version = get_cache_version(user_bookings_version_key(user_id))
     
-    return render_template('booking_history.html', bookings=bookings)
+    key = (user_id, version, cursor)
+    page = _history_cache.get(key)
+    if page is None:
+        page = load_booking_history(user_id, cursor)
+        _history_cache.set(key, page)
+    bookings, next_cursor = page
+    
+    return render_template('booking_history.html', bookings=bookings, next_cursor=next_cursor)
 
 @app.route('/booking_receipt/<booking_id>')
 def booking_receipt(booking_id):
@@ -459,22 +3150,45 @@ def booking_receipt(booking_id):
         flash('Please login first!', 'error')
         return redirect(url_for('login_page'))
     
-    booking = Booking.query.filter_by(booking_id=booking_id, user_id=session['user_id']).first()
+    user_id = session['user_id']
+    version = get_cache_version(user_bookings_version_key(user_id))
+    key = (user_id, booking_id, version)
+    html = _receipt_cache.get(key)
+    if html is not None:
+        return html
+    
+    booking = find_booking(booking_id, user_id=user_id)
     
     if not booking:
         flash('Booking not found!', 'error')
         return redirect(url_for('booking_history'))
     
-    # Calculate GST
-    subtotal = (booking.service_price or 0) + (booking.hall_price or 0) + (booking.package_price or 0)
-    gst = subtotal * 0.18
-    total_with_gst = subtotal + gst
+    html = render_template('receipt.html', booking=booking, **receipt_context(booking))
+    _receipt_cache.set(key, html)
+    return html
+
+@app.route('/booking_receipt/<booking_id>/pdf')
+def booking_receipt_pdf(booking_id):
+    if 'user_id' not in session:
+        flash('Please login first!', 'error')
+        return redirect(url_for('login_page'))
+    
+    booking = find_booking(booking_id, user_id=session['user_id'])
+    if not booking:
+        flash('Booking not found!', 'error')
+        return redirect(url_for('booking_history'))
+    
+    path = receipt_pdf_path(booking_id, booking.updated_at)
+    if not os.path.exists(path):
+        schedule_receipt_pdf(booking_id, booking.updated_at)
+        db.session.commit()
+        response = jsonify({'success': False, 'message': 'Receipt is being generated, please try again shortly'})
+        response.status_code = 202
+        response.headers['Retry-After'] = '2'
+        return response
     
-    return render_template('receipt.html', 
-                         booking=booking,
-                         subtotal=subtotal,
-                         gst=gst,
-                         total_with_gst=total_with_gst)
+    return send_file(path, mimetype='application/pdf', as_attachment=True,
+                     download_name=f'{booking_id}.pdf', conditional=True)
 
 # ==================== ADMIN DASHBOARD ROUTES ====================
 @app.route('/admin')
@@ -503,17 +3217,18 @@ def admin_dashboard():
         return redirect(url_for('admin_login_page'))
     
     try:
-        # Get all bookings
-        bookings = Booking.query.order_by(Booking.created_at.desc()).all()
-        total_bookings = len(bookings)
-        total_revenue = sum(b.total_amount for b in bookings if b.total_amount)
+        # Totals across all partitions, from the daily rollups
+        total_bookings, total_revenue, pending_bookings = db.session.execute(
+            sa.select(
+                func.coalesce(func.sum(BookingDailyRollup.bookings), 0),
+                func.coalesce(func.sum(BookingDailyRollup.revenue), 0),
+                func.coalesce(func.sum(BookingDailyRollup.bookings).filter(BookingDailyRollup.status == 'pending'), 0)
+            )
+        ).one()
         
         # Get total users
         total_users = User.query.count()
         
-        # Get pending bookings
-        pending_bookings = Booking.query.filter_by(status='pending').count()
-        
         # Get recent bookings (last 10)
         recent_bookings = Booking.query.order_by(Booking.created_at.desc()).limit(10).all()
         
@@ -538,23 +3253,44 @@ def admin_bookings():
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     try:
-        bookings = Booking.query.order_by(Booking.created_at.desc()).all()
-        bookings_data = []
-        for booking in bookings:
-            user = db.session.get(User, booking.user_id)
-            bookings_data.append({
-                'booking_id': booking.booking_id,
-                'user_name': user.name if user else 'Unknown',
-                'user_email': user.email if user else 'Unknown',
-                'event_date': booking.event_date.strftime('%Y-%m-%d') if booking.event_date else 'N/A',
-                'event_type': booking.event_type or 'N/A',
-                'guests': booking.guests or 0,
-                'total_amount': booking.total_amount or 0,
-                'status': booking.status or 'pending',
-                'created_at': booking.created_at.strftime('%Y-%m-%d %H:%M') if booking.created_at else 'N/A'
-            })
+        # Optional event-date range; only the partitions it spans are read
+        start = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+        end = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+        
+        def listing(table):
+            query = sa.select(table.c.booking_id, table.c.user_id, table.c.event_date, table.c.event_type,
+                              table.c.guests, table.c.total_amount, table.c.status, table.c.created_at)
+            if start:
+                query = query.where(table.c.event_date >= start)
+            if end:
+                query = query.where(table.c.event_date <= end)
+            return query
+        
+        bookings = booking_union(listing, start, end)
+        users = User.__table__
+        query = sa.select(
+            bookings.c.booking_id,
+            func.coalesce(users.c.name, 'Unknown'),
+            func.coalesce(users.c.email, 'Unknown'),
+            bookings.c.event_date, bookings.c.event_type, bookings.c.guests,
+            bookings.c.total_amount, bookings.c.status, bookings.c.created_at
+        ).select_from(
+            bookings.outerjoin(users, users.c.id == bookings.c.user_id)
+        ).order_by(bookings.c.created_at.desc())
+        
+        bookings_data = [{
+            'booking_id': booking.booking_id,
+            'user_name': booking.user_name,
+            'user_email': booking.user_email,
+            'event_date': format_datetime(booking.event_date, '%Y-%m-%d'),
+            'event_type': booking.event_type or 'N/A',
+            'guests': booking.guests or 0,
+            'total_amount': booking.total_amount or 0,
+            'status': booking.status or 'pending',
+            'created_at': format_datetime(booking.created_at, '%Y-%m-%d %H:%M')
+        } for booking in read_records(BookingListRow, query)]
         
-        return jsonify({'success': True, 'bookings': bookings_data})
+        return json_response({'success': True, 'bookings': bookings_data})
     except Exception as e:
         print(f"Admin bookings error: {str(e)}")
         return jsonify({'success': False, 'message': str(e)})
@@ -569,21 +3305,22 @@ def admin_users():
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     try:
-        users = User.query.all()
-        users_data = []
-        for user in users:
-            bookings_count = Booking.query.filter_by(user_id=user.id).count()
-            users_data.append({
-                'id': user.id,
-                'name': user.name,
-                'email': user.email,
-                'phone': user.phone or 'N/A',
-                'is_admin': user.is_admin,
-                'created_at': user.created_at.strftime('%Y-%m-%d') if user.created_at else 'N/A',
-                'bookings_count': bookings_count
-            })
+        users = read_records(UserRow, record_query(User, UserRow))
+        bookings = booking_union(lambda table: sa.select(table.c.user_id))
+        booking_counts = dict(db.session.execute(
+            sa.select(bookings.c.user_id, func.count()).group_by(bookings.c.user_id)
+        ).all())
+        users_data = [{
+            'id': user.id,
+            'name': user.name,
+            'email': user.email,
+            'phone': user.phone or 'N/A',
+            'is_admin': user.is_admin,
+            'created_at': format_datetime(user.created_at, '%Y-%m-%d'),
+            'bookings_count': booking_counts.get(user.id, 0)
+        } for user in users]
         
-        return jsonify({'success': True, 'users': users_data})
+        return json_response({'success': True, 'users': users_data})
     except Exception as e:
         print(f"Admin users error: {str(e)}")
         return jsonify({'success': False, 'message': str(e)})
@@ -615,6 +3352,8 @@ def admin_add_user():
         )
         
         db.session.add(new_user)
+        db.session.flush()
+        record_change('user_added', user_event_data(new_user))
         db.session.commit()
         
         return jsonify({'success': True, 'message': 'User added successfully'})
@@ -664,15 +3403,8 @@ def admin_get_services():
     if not user or not user.is_admin:
         return jsonify({'success': False, 'message': 'Unauthorized'})
 
-    services = Service.query.all()
-    return jsonify({'success': True, 'services': [{
-        'id': s.id,
-        'name': s.name,
-        'description': s.description,
-        'price': s.price,
-        'category': s.category,
-        'is_active': s.is_active
-    } for s in services]})
+    services = read_dicts(record_query(Service, AdminServiceRow))
+    return json_response({'success': True, 'services': services})
 
 @app.route('/admin/services', methods=['POST'])
 def admin_add_service():
@@ -751,17 +3483,8 @@ def admin_get_halls():
     if not user or not user.is_admin:
         return jsonify({'success': False, 'message': 'Unauthorized'})
 
-    halls = Hall.query.all()
-    return jsonify({'success': True, 'halls': [{
-        'id': h.id,
-        'name': h.name,
-        'location': h.location,
-        'description': h.description,
-        'price': h.price,
-        'capacity': h.capacity,
-        'image_url': h.image_url,
-        'is_active': h.is_active
-    } for h in halls]})
+    halls = read_dicts(record_query(Hall, AdminHallRow))
+    return json_response({'success': True, 'halls': halls})
 
 @app.route('/admin/halls', methods=['POST'])
 def admin_add_hall():
@@ -844,15 +3567,8 @@ def admin_get_packages():
     if not user or not user.is_admin:
         return jsonify({'success': False, 'message': 'Unauthorized'})
 
-    packages = Package.query.all()
-    return jsonify({'success': True, 'packages': [{
-        'id': p.id,
-        'name': p.name,
-        'description': p.description,
-        'price': p.price,
-        'features': p.features,
-        'is_active': p.is_active
-    } for p in packages]})
+    packages = read_dicts(record_query(Package, AdminPackageRow))
+    return json_response({'success': True, 'packages': packages})
 
 @app.route('/admin/packages', methods=['POST'])
 def admin_add_package():
@@ -922,9 +3638,346 @@ def admin_delete_package(id):
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)})
 
-# ========== OTHER ADMIN ROUTES ==========
-@app.route('/admin/reports')
-def admin_reports():
+# ========== ADMIN: CATALOG IMPORT/EXPORT ==========
+# Services, halls and packages can be loaded in bulk from CSV or JSON, upserted
+# by name: a row naming an existing entry updates the columns it provides, any
+# other row is inserted with the same defaults as the add forms, and blank
+# values are skipped. The whole file is validated before anything is written,
+# then applied in one transaction with one executemany per statement shape and
+# a single catalog version bump.
+app.config['CATALOG_IMPORT_MAX_ROWS'] = int(os.environ.get('CATALOG_IMPORT_MAX_ROWS', 10000))
+
+CATALOG_KINDS = {'services': Service, 'halls': Hall, 'packages': Package}
+
+# Importable columns and the value an inserted row gets when it omits one;
+# None marks a column every new entry must provide
+CATALOG_COLUMNS = {
+    'services': {'name': None, 'description': '', 'price': None, 'category': '', 'is_active': True},
+    'halls': {'name': None, 'location': '', 'description': '', 'price': None, 'capacity': 0,
+              'image_url': '', 'is_active': True},
+    'packages': {'name': None, 'description': '', 'price': None, 'features': '', 'is_active': True},
+}
+
+def parse_catalog_value(column, value):
+    """Coerce one imported value to the column's type; raises ValueError"""
+    if isinstance(column.type, sa.Boolean):
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in ('1', 'true', 'yes', 'y'):
+            return True
+        if text in ('0', 'false', 'no', 'n'):
+            return False
+        raise ValueError(f'{column.name} must be true or false')
+    if isinstance(column.type, sa.Integer):
+        try:
+            if isinstance(value, (bool, float)):
+                raise ValueError
+            number = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'{column.name} must be a whole number')
+        if number < 0:
+            raise ValueError(f'{column.name} cannot be negative')
+        return number
+    if column.name == 'features' and isinstance(value, list):
+        value = json.dumps(value)
+    if not isinstance(value, str):
+        raise ValueError(f'{column.name} must be text')
+    value = value.strip()
+    if column.type.length and len(value) > column.type.length:
+        raise ValueError(f'{column.name} is longer than {column.type.length} characters')
+    return value
+
+def read_catalog_upload(kind):
+    """Rows from a multipart 'file' upload or the raw request body. The format
+    is ?format=csv|json, else guessed from the file name or content type."""
+    upload = request.files.get('file')
+    if upload:
+        raw, filename, mimetype = upload.read(), upload.filename or '', upload.mimetype
+    else:
+        raw, filename, mimetype = request.get_data(), '', request.mimetype
+    fmt = request.args.get('format')
+    if not fmt:
+        fmt = 'csv' if filename.lower().endswith('.csv') or mimetype == 'text/csv' else 'json'
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(raw.decode('utf-8-sig')))
+        rows = []
+        for row in reader:
+            # DictReader files surplus cells under the key None
+            if None in row:
+                raise ValueError(f'too many fields on line {reader.line_num}')
+            rows.append(row)
+        return rows
+    if fmt == 'json':
+        data = json.loads(raw)
+        if isinstance(data, dict):
+            data = data.get(kind)
+        if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+            raise ValueError(f'expected a list of objects or {{"{kind}": [...]}}')
+        return data
+    raise ValueError('format must be csv or json')
+
+def plan_catalog_import(kind, rows):
+    """Validate imported rows against the current catalog.
+
+    Returns (inserts, updates, errors): insert parameter dicts, update parameter
+    dicts keyed by the existing entry's row_id, and per-row problems numbered
+    from 1 (not counting a CSV header).
+    """
+    table = CATALOG_KINDS[kind].__table__
+    defaults = CATALOG_COLUMNS[kind]
+    existing = dict(db.session.execute(
+        sa.select(table.c.name, func.min(table.c.id))
+        .where(table.c.tenant_id == current_tenant_id())
+        .group_by(table.c.name)
+    ).all())
+    inserts, updates, errors = [], [], []
+    seen = {}
+    for number, row in enumerate(rows, start=1):
+        problems = []
+        unknown = sorted(set(row) - set(defaults) - {'id'})
+        if unknown:
+            problems.append(f"unknown column(s): {', '.join(map(str, unknown))}")
+        values = {}
+        for field in defaults:
+            if field not in row:
+                continue
+            # Blank values (empty CSV cells, null) leave the column as it is
+            if row[field] is None or row[field] == '':
+                continue
+            try:
+                values[field] = parse_catalog_value(table.c[field], row[field])
+            except ValueError as e:
+                problems.append(str(e))
+        name = values.get('name')
+        if not name:
+            problems.append('name is required')
+        elif name in seen:
+            problems.append(f'same name as row {seen[name]}')
+        else:
+            seen[name] = number
+            if name not in existing and not problems:
+                problems += [f'{column} is required for new entries'
+                             for column, default in defaults.items()
+                             if default is None and column not in values and column != 'name']
+        if problems:
+            errors.append({'row': number, 'name': name, 'errors': problems})
+        elif name in existing:
+            updates.append({'row_id': existing[name], **values})
+        else:
+            inserts.append({**defaults, **values, 'tenant_id': current_tenant_id()})
+    return inserts, updates, errors
+
+def apply_catalog_import(kind, inserts, updates):
+    """Write a validated import and bump the catalog version, in one transaction"""
+    table = CATALOG_KINDS[kind].__table__
+    connection = db.session.connection()
+    if inserts:
+        connection.execute(table.insert(), inserts)
+    # executemany needs the same columns in every parameter set, so updates
+    # are grouped by the columns they set
+    shapes = {}
+    for row in updates:
+        shapes.setdefault(tuple(sorted(row)), []).append(row)
+    for rows in shapes.values():
+        connection.execute(table.update().where(table.c.id == sa.bindparam('row_id'),
+                                                table.c.tenant_id == current_tenant_id()), rows)
+    bump_cache_version(catalog_version_key(), connection)
+    db.session.commit()
+
+@app.route('/admin/catalog/<kind>/import', methods=['POST'])
+def admin_import_catalog(kind):
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    user = db.session.get(User, session['user_id'])
+    if not user or not user.is_admin:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    if kind not in CATALOG_KINDS:
+        return jsonify({'success': False, 'message': f"Unknown catalog; use one of {', '.join(CATALOG_KINDS)}"}), 404
+
+    dry_run = request.args.get('dry_run') in ('1', 'true', 'yes')
+    try:
+        rows = read_catalog_upload(kind)
+    except (ValueError, csv.Error) as e:
+        return jsonify({'success': False, 'message': f'Could not read import: {e}'}), 400
+    if len(rows) > app.config['CATALOG_IMPORT_MAX_ROWS']:
+        return jsonify({'success': False, 'message': f"Imports are limited to {app.config['CATALOG_IMPORT_MAX_ROWS']} rows"}), 400
+
+    try:
+        inserts, updates, errors = plan_catalog_import(kind, rows)
+        if errors:
+            return jsonify({
+                'success': False,
+                'message': f'{len(errors)} of {len(rows)} rows are invalid; nothing was imported',
+                'errors': errors[:100]
+            }), 400
+        if not dry_run:
+            apply_catalog_import(kind, inserts, updates)
+        return jsonify({
+            'success': True,
+            'message': f"{'Would import' if dry_run else 'Imported'} {len(rows)} {kind}: "
+                       f'{len(inserts)} new, {len(updates)} updated',
+            'dry_run': dry_run,
+            'inserted': len(inserts),
+            'updated': len(updates)
+        })
+    except Exception as e:
+        db.session.rollback()
+        print(f"Catalog import error: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/admin/catalog/<kind>/export')
+def admin_export_catalog(kind):
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    user = db.session.get(User, session['user_id'])
+    if not user or not user.is_admin:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    if kind not in CATALOG_KINDS:
+        return jsonify({'success': False, 'message': f"Unknown catalog; use one of {', '.join(CATALOG_KINDS)}"}), 404
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'json'):
+        return jsonify({'success': False, 'message': 'format must be csv or json'}), 400
+
+    table = CATALOG_KINDS[kind].__table__
+    columns = list(CATALOG_COLUMNS[kind])
+    query = sa.select(*(table.c[name] for name in columns)).where(
+        table.c.tenant_id == current_tenant_id()).order_by(table.c.id)
+
+    def generate():
+        result = db.session.connection().execution_options(stream_results=True).execute(query)
+        if fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for chunk in result.partitions(500):
+                writer.writerows(chunk)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        else:
+            separator = b'['
+            for chunk in result.partitions(500):
+                yield separator + encode_json([dict(zip(columns, row)) for row in chunk])[1:-1]
+                separator = b','
+            yield b']' if separator == b',' else b'[]'
+
+    return Response(stream_with_context(generate()),
+                    mimetype='text/csv' if fmt == 'csv' else 'application/json',
+                    headers={'Content-Disposition': f'attachment; filename={kind}.{fmt}'})
+
+# ========== ADMIN: BOOKING SEARCH ==========
+_SNIPPET_OPEN, _SNIPPET_CLOSE = '\x02', '\x03'
+
+def fts_query(text):
+    """Turn free text into a safe FTS5 query: every word must match as a prefix"""
+    terms = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{t}"*' for t in terms)
+
+def _render_snippet(raw):
+    html = str(escape(raw or ''))
+    return html.replace(_SNIPPET_OPEN, '<mark>').replace(_SNIPPET_CLOSE, '</mark>')
+
+@app.route('/admin/search')
+def admin_search():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    user = db.session.get(User, session['user_id'])
+    if not user or not user.is_admin:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+
+    query = fts_query(request.args.get('q', ''))
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    if not query:
+        return jsonify({'success': True, 'results': [], 'page': page, 'per_page': per_page, 'has_more': False})
+
+    try:
+        rows = db.session.execute(sa.text("""
+            SELECT b.booking_id, b.first_name, b.last_name, b.event_date, b.event_type,
+                   b.guests, b.total_amount, b.status, b.created_at,
+                   u.name AS user_name, u.email AS user_email,
+                   snippet(booking_fts, -1, :open, :close, '…', 12) AS snippet,
+                   booking_fts.rank AS rank
+            FROM booking_fts
+            JOIN booking b ON b.id = booking_fts.rowid
+            LEFT JOIN user u ON u.id = b.user_id
+            WHERE booking_fts MATCH :query AND b.tenant_id = :tenant_id
+            ORDER BY booking_fts.rank
+            LIMIT :limit OFFSET :offset
+        """), {
+            'open': _SNIPPET_OPEN, 'close': _SNIPPET_CLOSE, 'query': query, 'tenant_id': current_tenant_id(),
+            'limit': per_page + 1, 'offset': (page - 1) * per_page
+        }).mappings().all()
+
+        results = [{
+            'booking_id': r['booking_id'],
+            'customer_name': f"{r['first_name']} {r['last_name']}",
+            'user_name': r['user_name'] or 'Unknown',
+            'user_email': r['user_email'] or 'Unknown',
+            'event_date': str(r['event_date']) if r['event_date'] else 'N/A',
+            'event_type': r['event_type'] or 'N/A',
+            'guests': r['guests'] or 0,
+            'total_amount': r['total_amount'] or 0,
+            'status': r['status'] or 'pending',
+            'created_at': str(r['created_at'])[:16] if r['created_at'] else 'N/A',
+            'snippet': _render_snippet(r['snippet']),
+            'rank': r['rank']
+        } for r in rows[:per_page]]
+
+        return jsonify({
+            'success': True,
+            'results': results,
+            'page': page,
+            'per_page': per_page,
+            'has_more': len(rows) > per_page
+        })
+    except Exception as e:
+        print(f"Admin search error: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)})
+
+# ========== ADMIN: DELTA SYNC ==========
+# Clients keep a watermark and ask only for bookings changed since then.
+# Inserts and updates are found through the (updated_at, id) index and
+# deletes through booking_tombstone, which a trigger fills on every delete.
+# Rows younger than the settle window are held back so that a transaction
+# still in flight can never commit "behind" a watermark already handed out.
+app.config['SYNC_SETTLE_SECONDS'] = None  # None: derived by sync_settle_seconds()
+app.config['SYNC_TOMBSTONE_RETENTION'] = timedelta(days=90)
+
+def sync_settle_seconds():
+    """Longest a change can take from its timestamp to its commit.
+
+    updated_at (and a tombstone's deleted_at) is taken when the row is
+    flushed, and the commit can then wait out the SQLite busy timeout, plus
+    the group-commit window for batched bookings. One extra second covers the
+    request's own work between flush and commit.
+    """
+    if app.config['SYNC_SETTLE_SECONDS'] is not None:
+        return app.config['SYNC_SETTLE_SECONDS']
+    settle = app.config['SQLITE_BUSY_TIMEOUT'] + 1
+    if app.config['WRITE_BATCHING']:
+        settle += app.config['WRITE_BATCH_WINDOW']
+    return settle
+
+def encode_watermark(position):
+    raw = json.dumps({key: [ts.isoformat(), id] for key, (ts, id) in position.items()})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_watermark(token):
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        return {key: (datetime.fromisoformat(raw[key][0]), int(raw[key][1])) for key in ('bookings', 'deleted')}
+    except (ValueError, KeyError, TypeError, IndexError):
+        return None
+
+def _after(column, id_column, position):
+    ts, id = position
+    return sa.or_(column > ts, sa.and_(column == ts, id_column > id))
+
+@app.route('/admin/bookings/changes')
+def admin_booking_changes():
     if 'user_id' not in session:
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
@@ -933,66 +3986,566 @@ def admin_reports():
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     try:
-        # Calculate monthly revenue for last 6 months
-        monthly_revenue = []
-        months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun']
-        for i in range(6):
-            month_date = datetime.now() - timedelta(days=30*i)
-            month_start = month_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            if i > 0:
-                month_end = (month_start - timedelta(days=1)).replace(day=1)
-            else:
-                month_end = month_start + timedelta(days=31)
-                month_end = month_end.replace(day=1) - timedelta(days=1)
-            
-            revenue = db.session.query(func.sum(Booking.total_amount)).filter(
-                Booking.created_at >= month_start,
-                Booking.created_at <= month_end
-            ).scalar() or 0
-            
-            monthly_revenue.append({
-                'month': months[i],
-                'revenue': int(revenue)
-            })
-        
-        monthly_revenue.reverse()
+        limit = min(max(request.args.get('limit', 500, type=int), 1), 5000)
+        upper = datetime.utcnow() - timedelta(seconds=sync_settle_seconds())
+        horizon = datetime.utcnow() - app.config['SYNC_TOMBSTONE_RETENTION']
         
-        # Status distribution
-        status_counts = {
-            'pending': Booking.query.filter_by(status='pending').count(),
-            'confirmed': Booking.query.filter_by(status='confirmed').count(),
-            'cancelled': Booking.query.filter_by(status='cancelled').count(),
-            'completed': Booking.query.filter_by(status='completed').count()
-        }
+        start = (datetime(1970, 1, 1), 0)
+        since = request.args.get('since')
+        position = decode_watermark(since) if since else None
+        full_resync = position is None or position['deleted'][0] < horizon
+        if full_resync:
+            # No watermark, or older than the retained tombstones: send everything
+            position = {'bookings': start, 'deleted': start}
         
-        status_distribution = [
-            {'status': 'Pending', 'count': status_counts['pending']},
-            {'status': 'Confirmed', 'count': status_counts['confirmed']},
-            {'status': 'Cancelled', 'count': status_counts['cancelled']},
-            {'status': 'Completed', 'count': status_counts['completed']}
-        ]
+        rows = db.session.execute(
+            sa.select(Booking, User.name, User.email)
+            .outerjoin(User, User.id == Booking.user_id)
+            .where(_after(Booking.updated_at, Booking.id, position['bookings']), Booking.updated_at < upper)
+            .order_by(Booking.updated_at, Booking.id)
+            .limit(limit + 1)
+        ).all()
+        tombstones = []
+        if not full_resync:
+            tombstones = db.session.execute(
+                sa.select(BookingTombstone.id, BookingTombstone.booking_id, BookingTombstone.deleted_at)
+                .where(_after(BookingTombstone.deleted_at, BookingTombstone.id, position['deleted']),
+                       BookingTombstone.deleted_at < upper)
+                .order_by(BookingTombstone.deleted_at, BookingTombstone.id)
+                .limit(limit + 1)
+            ).all()
         
-        # Event types
-        event_types = []
-        event_type_counts = db.session.query(
-            Booking.event_type, 
-            func.count(Booking.id).label('count')
-        ).group_by(Booking.event_type).all()
+        has_more = len(rows) > limit or len(tombstones) > limit
+        rows, tombstones = rows[:limit], tombstones[:limit]
+        new_position = {
+            'bookings': (rows[-1][0].updated_at, rows[-1][0].id) if len(rows) == limit else (upper, 0),
+            'deleted': (tombstones[-1].deleted_at, tombstones[-1].id) if len(tombstones) == limit else (upper, 0)
+        }
+        if full_resync:
+            new_position['deleted'] = (upper, 0)
         
-        for event_type, count in event_type_counts:
-            if event_type:
-                event_types.append({'type': event_type, 'count': count})
+        changes = []
+        for booking, user_name, user_email in rows:
+            changes.append({
+                'booking_id': booking.booking_id,
+                'user_id': booking.user_id,
+                'user_name': user_name or 'Unknown',
+                'user_email': user_email or 'Unknown',
+                'first_name': booking.first_name,
+                'last_name': booking.last_name,
+                'email': booking.email,
+                'phone': booking.phone,
+                'event_date': booking.event_date.strftime('%Y-%m-%d') if booking.event_date else None,
+                'event_type': booking.event_type,
+                'guests': booking.guests,
+                'special_requests': booking.special_requests,
+                'service_name': booking.service_name,
+                'service_price': booking.service_price,
+                'hall_name': booking.hall_name,
+                'hall_price': booking.hall_price,
+                'package_name': booking.package_name,
+                'package_price': booking.package_price,
+                'total_amount': booking.total_amount,
+                'status': booking.status,
+                'created_at': booking.created_at.isoformat() if booking.created_at else None,
+                'updated_at': booking.updated_at.isoformat() if booking.updated_at else None
+            })
         
         return jsonify({
             'success': True,
-            'monthly_revenue': monthly_revenue,
-            'status_distribution': status_distribution,
-            'event_types': event_types
+            'full_resync': full_resync,
+            'changes': changes,
+            'deleted': [{'booking_id': t.booking_id, 'deleted_at': t.deleted_at.isoformat()} for t in tombstones],
+            'watermark': encode_watermark(new_position),
+            'has_more': has_more
         })
+    except Exception as e:
+        print(f"Booking changes error: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)})
+
+# ==================== CHANGE STREAM ====================
+# Booking and user changes are appended to the change_event table in the same
+# commit as the change. One broker thread per worker process polls that table
+# (by primary key, only while someone is listening) and fans new events out to
+# the /admin/stream Server-Sent Events connections it serves.
+app.config['CHANGE_POLL_INTERVAL'] = 1.0  # seconds
+app.config['CHANGE_LOG_RETENTION'] = timedelta(days=1)
+app.config['SSE_HEARTBEAT'] = 15  # seconds
+
+def record_change(kind, data):
+    """Append an event to the change log in the current transaction"""
+    db.session.add(ChangeEvent(kind=kind, payload=json.dumps(data)))
+
+def booking_event_data(booking, user=None):
+    """Booking fields as shown in the admin bookings table"""
+    return {
+        'booking_id': booking.booking_id,
+        'customer_name': f"{booking.first_name} {booking.last_name}",
+        'user_name': user.name if user else 'Unknown',
+        'user_email': user.email if user else 'Unknown',
+        'event_date': booking.event_date.strftime('%Y-%m-%d') if booking.event_date else 'N/A',
+        'event_type': booking.event_type or 'N/A',
+        'guests': booking.guests or 0,
+        'total_amount': booking.total_amount or 0,
+        'status': booking.status or 'pending',
+        'created_at': booking.created_at.strftime('%Y-%m-%d %H:%M') if booking.created_at else datetime.utcnow().strftime('%Y-%m-%d %H:%M')
+    }
+
+def user_event_data(user):
+    """User fields as shown in the admin users table"""
+    return {
+        'id': user.id,
+        'name': user.name,
+        'email': user.email,
+        'phone': user.phone or 'N/A',
+        'is_admin': bool(user.is_admin),
+        'created_at': (user.created_at or datetime.utcnow()).strftime('%Y-%m-%d'),
+        'bookings_count': 0
+    }
+
+def format_sse(event_id, kind, payload):
+    return f'id: {event_id}\nevent: {kind}\ndata: {payload}\n\n'
+
+class ChangeBroker:
+    """Fans change_event rows out to in-process subscriber queues of the same tenant"""
+
+    def __init__(self):
+        self._subscribers = {}  # queue -> tenant id
+        self._lock = threading.Lock()
+        self._thread = None
+        self._last_id = None
+        self._last_prune = 0.0
+
+    def subscribe(self, tenant_id):
+        q = queue.Queue(maxsize=1000)
+        with self._lock:
+            self._subscribers[q] = tenant_id
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='change-broker', daemon=True)
+                self._thread.start()
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.pop(q, None)
+
+    def _publish(self, event, tenant_id):
+        with self._lock:
+            subscribers = [q for q, subscribed in self._subscribers.items() if subscribed == tenant_id]
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # Client is not reading: drop it. Its EventSource reconnects with
+                # the Last-Event-ID it actually got, so the backlog can be thrown
+                # away to make room for the end-of-stream marker without blocking.
+                self.unsubscribe(q)
+                while True:
+                    try:
+                        q.get_nowait()
+                    except queue.Empty:
+                        break
+                q.put_nowait(None)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    self._last_id = None
+                    return
+            try:
+                with app.app_context():
+                    self._poll()
+            except Exception as e:
+                print(f"Change broker error: {str(e)}")
+            time.sleep(app.config['CHANGE_POLL_INTERVAL'])
+
+    def _poll(self):
+        table = ChangeEvent.__table__
+        if self._last_id is None:
+            self._last_id = db.session.execute(sa.select(func.max(table.c.id))).scalar() or 0
+        rows = db.session.execute(
+            sa.select(table.c.id, table.c.tenant_id, table.c.kind, table.c.payload)
+            .where(table.c.id > self._last_id)
+            .order_by(table.c.id)
+            .limit(500)
+        ).all()
+        for row in rows:
+            self._publish((row.id, row.kind, row.payload), row.tenant_id)
+            self._last_id = row.id
+
+        if time.monotonic() - self._last_prune > 3600:
+            self._last_prune = time.monotonic()
+            cutoff = datetime.utcnow() - app.config['CHANGE_LOG_RETENTION']
+            with db.engine.begin() as conn:
+                conn.execute(table.delete().where(table.c.created_at < cutoff))
+
+change_broker = ChangeBroker()
+
+@app.route('/admin/stream')
+def admin_stream():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    user = db.session.get(User, session['user_id'])
+    if not user or not user.is_admin:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    subscription = change_broker.subscribe(current_tenant_id())
+    
+    # Replay what a reconnecting client missed
+    last_id = request.headers.get('Last-Event-ID', type=int) or 0
+    missed = []
+    if last_id:
+        missed = db.session.execute(
+            sa.select(ChangeEvent.id, ChangeEvent.kind, ChangeEvent.payload)
+            .where(ChangeEvent.id > last_id)
+            .order_by(ChangeEvent.id)
+            .limit(1000)
+        ).all()
+    db.session.remove()
+    heartbeat = app.config['SSE_HEARTBEAT']
+    
+    def generate():
+        sent = last_id
+        try:
+            yield 'retry: 3000\n\n'
+            for event_id, kind, payload in missed:
+                sent = event_id
+                yield format_sse(event_id, kind, payload)
+            while True:
+                try:
+                    event = subscription.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                if event is None:
+                    return
+                event_id, kind, payload = event
+                if event_id <= sent:
+                    continue
+                sent = event_id
+                yield format_sse(event_id, kind, payload)
+        finally:
+            change_broker.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# ========== OTHER ADMIN ROUTES ==========
+@app.route('/admin/reports')
+def admin_reports():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    user = db.session.get(User, session['user_id'])
+    if not user or not user.is_admin:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    try:
+        month_start = date.today().replace(day=1)
+        return jsonify({'success': True, **stale_read(lambda: booking_report(month_start), month_start)})
     except Exception as e:
         print(f"Admin reports error: {str(e)}")
         return jsonify({'success': False, 'message': str(e)})
 
+def booking_report(month_start):
+    """Dashboard charts from the rollups: revenue for the six months up to
+    `month_start`, and bookings by status and by event type"""
+    # Revenue for the current and previous 5 calendar months
+    month_starts = [month_start]
+    for _ in range(5):
+        month_starts.append((month_starts[-1] - timedelta(days=1)).replace(day=1))
+    month_starts.reverse()
+    
+    month = func.strftime('%Y-%m', BookingDailyRollup.day)
+    revenue_by_month = dict(db.session.execute(
+        sa.select(month, func.sum(BookingDailyRollup.revenue))
+        .where(BookingDailyRollup.day >= month_starts[0])
+        .group_by(month)
+    ).all())
+    monthly_revenue = [
+        {'month': start.strftime('%b'), 'revenue': int(revenue_by_month.get(start.strftime('%Y-%m'), 0))}
+        for start in month_starts
+    ]
+    
+    # Status distribution
+    status_counts = dict(db.session.execute(
+        sa.select(BookingDailyRollup.status, func.sum(BookingDailyRollup.bookings))
+        .group_by(BookingDailyRollup.status)
+    ).all())
+    
+    status_distribution = [
+        {'status': status.capitalize(), 'count': int(status_counts.get(status, 0))}
+        for status in ('pending', 'confirmed', 'cancelled', 'completed')
+    ]
+    
+    # Event types
+    event_types = []
+    event_type_counts = db.session.execute(
+        sa.select(BookingDailyRollup.event_type, func.sum(BookingDailyRollup.bookings))
+        .group_by(BookingDailyRollup.event_type)
+    ).all()
+    
+    for event_type, count in event_type_counts:
+        if event_type:
+            event_types.append({'type': event_type, 'count': int(count)})
+    
+    return {
+        'monthly_revenue': monthly_revenue,
+        'status_distribution': status_distribution,
+        'event_types': event_types
+    }
+
+REPORT_GROUPS = {
+    'day': BookingDailyRollup.day,
+    'month': func.strftime('%Y-%m', BookingDailyRollup.day),
+    'event_type': BookingDailyRollup.event_type,
+    'hall': BookingDailyRollup.hall_name,
+    'package': BookingDailyRollup.package_name,
+    'status': BookingDailyRollup.status,
+}
+
+@app.route('/admin/reports/range')
+def admin_report_range():
+    """Bookings, guests and revenue for bookings made between start and end
+    (inclusive), grouped by any of the REPORT_GROUPS keys, read from the rollups"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    user = db.session.get(User, session['user_id'])
+    if not user or not user.is_admin:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'start and end must be YYYY-MM-DD'}), 400
+    group_by = [g for g in request.args.get('group_by', 'month').split(',') if g]
+    unknown = [g for g in group_by if g not in REPORT_GROUPS]
+    if unknown:
+        return jsonify({'success': False, 'message': f"Unknown group_by: {', '.join(unknown)}"}), 400
+    
+    columns = [REPORT_GROUPS[g].label(g) for g in group_by]
+    query = sa.select(
+        *columns,
+        func.sum(BookingDailyRollup.bookings).label('bookings'),
+        func.sum(BookingDailyRollup.guests).label('guests'),
+        func.sum(BookingDailyRollup.revenue).label('revenue')
+    ).group_by(*columns).order_by(*columns)
+    if start:
+        query = query.where(BookingDailyRollup.day >= start)
+    if end:
+        query = query.where(BookingDailyRollup.day <= end)
+    for name, column in (('event_type', BookingDailyRollup.event_type),
+                         ('hall', BookingDailyRollup.hall_name),
+                         ('package', BookingDailyRollup.package_name),
+                         ('status', BookingDailyRollup.status)):
+        if name in request.args:
+            query = query.where(column == request.args[name])
+    
+    def read_rows():
+        rows = []
+        for row in db.session.execute(query).mappings():
+            row = dict(row)
+            if isinstance(row.get('day'), date):
+                row['day'] = row['day'].isoformat()
+            rows.append(row)
+        return rows
+    rows = stale_read(read_rows, request.full_path)
+    return jsonify({
+        'success': True,
+        'start': start.isoformat() if start else None,
+        'end': end.isoformat() if end else None,
+        'group_by': group_by,
+        'rows': rows
+    })
+
+# ==================== ANALYTICS ====================
+# Heavier admin analytics computed with NumPy over whole columns. Booking
+# columns are pulled once as Core tuples into arrays and reused until the next
+# booking write bumps the bookings cache version. NumPy is optional: without
+# it these endpoints answer 503 and the rest of the app is unaffected.
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+REVENUE_PERCENTILES = [25, 50, 75, 90, 99]
+GUEST_BINS = [0, 50, 100, 200, 300, 500, 1000]
+
+class BookingArrays:
+    """Non-cancelled bookings as parallel column arrays; categorical columns
+    are stored as integer codes into the matching label array"""
+
+    def __init__(self, rows):
+        event_dates, event_types, hall_names, guests, amounts = zip(*rows) if rows else ([],) * 5
+        self.event_date = np.array(event_dates, dtype='datetime64[D]')
+        self.event_types, self.event_type = np.unique(np.array(event_types, dtype=str), return_inverse=True)
+        self.halls, self.hall = np.unique(np.array([h or '' for h in hall_names], dtype=str), return_inverse=True)
+        self.guests = np.array(guests, dtype=np.int64)
+        self.amount = np.array(amounts, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.amount)
+
+_analytics_cache = TenantCache(maxsize=64)
+
+def load_booking_arrays():
+    version = get_cache_version(bookings_version_key())
+    arrays = _analytics_cache.get(('arrays', version))
+    if arrays is None:
+        # Dates stay ISO strings so NumPy parses them in one pass
+        bookings = booking_union(lambda table: sa.select(
+            sa.type_coerce(table.c.event_date, sa.String).label('event_date'), table.c.event_type,
+            table.c.hall_name, func.coalesce(table.c.guests, 0).label('guests'),
+            func.coalesce(table.c.total_amount, 0).label('total_amount')
+        ).where(table.c.status != 'cancelled'))
+        rows = db.session.execute(sa.select(bookings)).all()
+        arrays = BookingArrays(rows)
+        _analytics_cache.set(('arrays', version), arrays)
+    return version, arrays
+
+def occupancy_heatmap(b):
+    """Share of days each hall is booked, by weekday and by calendar month,
+    over the span of event dates on record"""
+    if not len(b):
+        return {'halls': [], 'weekdays': WEEKDAYS, 'months': MONTHS, 'by_weekday': [], 'by_month': []}
+    days = b.event_date.astype(np.int64)
+    named = b.halls[b.hall] != ''
+    # A hall is occupied once per day however many bookings share that day
+    hall_days = np.unique(np.stack([b.hall[named], days[named]]), axis=1)
+    hall, day = hall_days
+    weekday = (day + 3) % 7  # 1970-01-01 was a Thursday
+    month = np.datetime64('1970-01-01') + day
+    month = month.astype('datetime64[M]').astype(np.int64) % 12
+    n_halls = len(b.halls)
+    booked_weekday = np.bincount(hall * 7 + weekday, minlength=n_halls * 7).reshape(n_halls, 7)
+    booked_month = np.bincount(hall * 12 + month, minlength=n_halls * 12).reshape(n_halls, 12)
+    
+    # Days available in the span, per weekday and per calendar month
+    span = np.arange(days.min(), days.max() + 1)
+    available_weekday = np.bincount((span + 3) % 7, minlength=7)
+    span_month = (np.datetime64('1970-01-01') + span).astype('datetime64[M]').astype(np.int64) % 12
+    available_month = np.bincount(span_month, minlength=12)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        by_weekday = np.nan_to_num(booked_weekday / available_weekday)
+        by_month = np.nan_to_num(booked_month / available_month)
+    keep = b.halls != ''
+    return {
+        'halls': b.halls[keep].tolist(),
+        'weekdays': WEEKDAYS,
+        'months': MONTHS,
+        'by_weekday': np.round(by_weekday[keep], 4).tolist(),
+        'by_month': np.round(by_month[keep], 4).tolist(),
+        'from': str(np.datetime64(int(days.min()), 'D')),
+        'to': str(np.datetime64(int(days.max()), 'D')),
+    }
+
+def revenue_percentiles(b):
+    """Booking value percentiles for each event type"""
+    order = np.lexsort((b.amount, b.event_type))
+    amounts, types = b.amount[order], b.event_type[order]
+    bounds = np.searchsorted(types, np.arange(len(b.event_types) + 1))
+    result = []
+    for i, event_type in enumerate(b.event_types.tolist()):
+        values = amounts[bounds[i]:bounds[i + 1]]
+        result.append({
+            'type': event_type,
+            'bookings': int(len(values)),
+            'total': int(values.sum()),
+            'mean': round(float(values.mean()), 2),
+            'percentiles': dict(zip(map(str, REVENUE_PERCENTILES),
+                                    np.percentile(values, REVENUE_PERCENTILES).round(2).tolist())),
+        })
+    return {'event_types': result}
+
+def guest_distribution(b):
+    """Histogram and summary statistics of guest counts"""
+    if not len(b):
+        return {'bins': [], 'mean': 0, 'median': 0, 'p90': 0, 'max': 0}
+    largest = int(b.guests.max())
+    edges = GUEST_BINS + [largest + 1] if largest >= GUEST_BINS[-1] else GUEST_BINS
+    counts, _ = np.histogram(b.guests, bins=edges)
+    return {
+        'bins': [{'from': lo, 'to': hi - 1, 'count': int(n)}
+                 for lo, hi, n in zip(edges[:-1], edges[1:], counts)],
+        'mean': round(float(b.guests.mean()), 2),
+        'median': float(np.median(b.guests)),
+        'p90': float(np.percentile(b.guests, 90)),
+        'max': int(b.guests.max()),
+    }
+
+def demand_forecast(b, months=6):
+    """Bookings per event month projected forward: a linear trend fitted to the
+    deseasonalized monthly series, multiplied back by each month's seasonal index"""
+    if not len(b):
+        return {'history': [], 'forecast': [], 'seasonal_index': [1.0] * 12}
+    month = b.event_date.astype('datetime64[M]').astype(np.int64)
+    first = month.min()
+    counts = np.bincount(month - first).astype(float)
+    t = np.arange(len(counts))
+    calendar_month = (first + t) % 12
+    
+    # Seasonal index: each calendar month's mean relative to the overall mean
+    totals = np.bincount(calendar_month, weights=counts, minlength=12)
+    seen = np.bincount(calendar_month, minlength=12)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        seasonal = np.where(seen > 0, totals / seen, np.nan) / counts.mean()
+    seasonal = np.where(np.isfinite(seasonal) & (seasonal > 0), seasonal, 1.0)
+    
+    deseasonalized = counts / seasonal[calendar_month]
+    if len(counts) > 1:
+        slope, intercept = np.polyfit(t, deseasonalized, 1)
+    else:
+        slope, intercept = 0.0, deseasonalized[0]
+    future = np.arange(len(counts), len(counts) + months)
+    forecast = np.maximum((intercept + slope * future) * seasonal[(first + future) % 12], 0)
+    
+    label = lambda m: str(np.datetime64(int(m), 'M'))
+    return {
+        'history': [{'month': label(first + i), 'bookings': int(n)} for i, n in enumerate(counts)],
+        'forecast': [{'month': label(first + m), 'bookings': round(float(n), 1)}
+                     for m, n in zip(future, forecast)],
+        'seasonal_index': dict(zip(MONTHS, np.round(seasonal, 3).tolist())),
+        'trend_per_month': round(float(slope), 3),
+    }
+
+ANALYTICS = {
+    'occupancy': occupancy_heatmap,
+    'revenue': revenue_percentiles,
+    'guests': guest_distribution,
+    'forecast': demand_forecast,
+}
+
+@app.route('/admin/analytics/<name>')
+def admin_analytics(name):
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    user = db.session.get(User, session['user_id'])
+    if not user or not user.is_admin:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    if name not in ANALYTICS:
+        return jsonify({'success': False, 'message': f"Unknown analysis; use one of {', '.join(ANALYTICS)}"}), 404
+    if np is None:
+        return jsonify({'success': False, 'message': 'Analytics requires NumPy (pip install numpy)'}), 503
+    
+    kwargs = {}
+    if name == 'forecast':
+        kwargs['months'] = min(max(request.args.get('months', 6, type=int), 1), 24)
+    try:
+        version, arrays = load_booking_arrays()
+        key = (name, version, tuple(kwargs.items()))
+        result = _analytics_cache.get(key)
+        if result is None:
+            result = ANALYTICS[name](arrays, **kwargs)
+            _analytics_cache.set(key, result)
+        return jsonify({'success': True, 'bookings': len(arrays), **result})
+    except Exception as e:
+        print(f"Analytics error: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)})
+
 @app.route('/admin/update_booking_status', methods=['POST'])
 def update_booking_status():
     if 'user_id' not in session:
@@ -1009,10 +4562,20 @@ def update_booking_status():
         
         booking = Booking.query.filter_by(booking_id=booking_id).first()
         if booking:
+            old_status = booking.status
             booking.status = status
             booking.updated_at = datetime.utcnow()
+            schedule_receipt_pdf(booking.booking_id, booking.updated_at)
+            queue_notification(booking, 'status_changed')
+            record_change('booking_status', {
+                'booking_id': booking.booking_id,
+                'old_status': old_status,
+                'status': status
+            })
             db.session.commit()
             return jsonify({'success': True, 'message': 'Booking status updated successfully!'})
+        elif find_booking(booking_id):
+            return jsonify({'success': False, 'message': 'Archived bookings are read-only'})
         else:
             return jsonify({'success': False, 'message': 'Booking not found!'})
     except Exception as e:
@@ -1030,7 +4593,7 @@ def admin_view_booking(booking_id):
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     try:
-        booking = Booking.query.filter_by(booking_id=booking_id).first()
+        booking = find_booking(booking_id)
         if not booking:
             return jsonify({'success': False, 'message': 'Booking not found'})
         
@@ -1068,14 +4631,15 @@ def admin_backup():
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     user = db.session.get(User, session['user_id'])
-    if not user or not user.is_admin:
+    if not is_platform_admin(user):
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     try:
-        # In a real app, this would create a database backup
-        # For now, we'll just return success
-        return jsonify({'success': True, 'message': 'Database backup completed successfully'})
+        enqueue_job('backup_database', priority=5)
+        db.session.commit()
+        return jsonify({'success': True, 'message': 'Database backup scheduled'})
     except Exception as e:
+        db.session.rollback()
         print(f"Backup error: {str(e)}")
         return jsonify({'success': False, 'message': str(e)})
 
@@ -1089,27 +4653,108 @@ def admin_clear_old_data():
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     try:
-        # Calculate date 1 year ago
-        one_year_ago = datetime.now() - timedelta(days=365)
-        
-        # Delete completed bookings older than 1 year
-        old_bookings = Booking.query.filter(
-            Booking.status == 'completed',
-            Booking.created_at < one_year_ago
-        ).all()
-        
-        count = len(old_bookings)
-        for booking in old_bookings:
-            db.session.delete(booking)
-        
+        # Completed bookings older than 1 year are deleted by a background job
+        enqueue_job('purge_old_bookings', {'days': 365})
         db.session.commit()
         
-        return jsonify({'success': True, 'message': f'Cleared {count} old bookings'})
+        return jsonify({'success': True, 'message': 'Clearing old bookings in the background'})
     except Exception as e:
         db.session.rollback()
         print(f"Clear old data error: {str(e)}")
         return jsonify({'success': False, 'message': str(e)})
 
+@app.route('/admin/jobs')
+def admin_jobs():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    user = db.session.get(User, session['user_id'])
+    if not user or not user.is_admin:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    try:
+        counts = dict(db.session.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        
+        query = Job.query
+        if request.args.get('status'):
+            query = query.filter_by(status=request.args['status'])
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        jobs = query.order_by(Job.id.desc()).limit(limit).all()
+        
+        return jsonify({
+            'success': True,
+            'counts': {status: counts.get(status, 0) for status in ('queued', 'running', 'done', 'failed')},
+            'jobs': [{
+                'id': j.id,
+                'name': j.name,
+                'payload': json.loads(j.payload or '{}'),
+                'priority': j.priority,
+                'status': j.status,
+                'attempts': j.attempts,
+                'max_attempts': j.max_attempts,
+                'run_at': j.run_at.strftime('%Y-%m-%d %H:%M:%S') if j.run_at else None,
+                'locked_by': j.locked_by,
+                'last_error': j.last_error,
+                'created_at': j.created_at.strftime('%Y-%m-%d %H:%M:%S') if j.created_at else None
+            } for j in jobs]
+        })
+    except Exception as e:
+        print(f"Admin jobs error: {str(e)}")
+        return jsonify({'success': False, 'message': str(e)})
+
+@app.route('/admin/queries')
+def admin_queries():
+    """Statements ordered by total time (or ?sort=max_ms|count|slow_count)"""
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    user = db.session.get(User, session['user_id'])
+    if not is_platform_admin(user):
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    sort = request.args.get('sort', 'total_ms')
+    if sort not in ('total_ms', 'max_ms', 'count', 'slow_count'):
+        return jsonify({'success': False, 'message': 'sort must be total_ms, max_ms, count or slow_count'}), 400
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 200)
+    full_scans_only = request.args.get('full_scan') == '1'
+    with _query_stats_lock:
+        queries = [stats.to_dict() for stats in _query_stats.values()
+                   if stats.full_scan or not full_scans_only]
+    queries.sort(key=lambda query: query[sort], reverse=True)
+    return jsonify({
+        'success': True,
+        'threshold_ms': app.config['SLOW_QUERY_MS'],
+        'queries': queries[:limit]
+    })
+
+@app.route('/admin/profiles')
+def admin_profiles():
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    user = db.session.get(User, session['user_id'])
+    if not is_platform_admin(user):
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    return jsonify({'success': True, 'captures': list_captures()})
+
+@app.route('/admin/profiles/<capture_id>')
+def admin_profile_download(capture_id):
+    if 'user_id' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    user = db.session.get(User, session['user_id'])
+    if not is_platform_admin(user):
+        return jsonify({'success': False, 'message': 'Unauthorized'})
+    
+    if CAPTURE_ID_RE.match(capture_id):
+        for extension in ('prof', 'folded'):
+            path = os.path.join(app.config['PROFILE_DIR'], f'{capture_id}.{extension}')
+            if os.path.exists(path):
+                return send_file(os.path.abspath(path), as_attachment=True,
+                                 mimetype='application/octet-stream' if extension == 'prof' else 'text/plain')
+    return jsonify({'success': False, 'message': 'Capture not found'}), 404
+
 # New routes for selected items
 @app.route('/get_selected_service/<service_name>')
 def get_selected_service(service_name):
@@ -1180,5 +4825,13 @@ def create_test_user():
         return 'Test user created! Email: test@test.com, Password: test123'
     return 'Test user already exists'
 
+# Cold start time: module import only, no database work happens here
+STARTUP_MS = (time.perf_counter() - _import_started) * 1000
+app.logger.debug(f"Evento app loaded in {STARTUP_MS:.1f} ms")
+
 if __name__ == '__main__':
+    # The reloader child serves requests; give it a job worker so background
+    # work runs without a separate `flask --app app worker` process
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_embedded_worker()
     app.run(debug=True, port=5000)
\ No newline at end of file
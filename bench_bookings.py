@@ -0,0 +1,103 @@
+"""Booking insert benchmark: throughput and latency with and without group commit.
+
+Runs create_booking through the Flask test client from N concurrent threads
+against a throwaway SQLite database and prints bookings/second and latency
+percentiles for each concurrency level, once committing per request and once
+with WRITE_BATCHING on.
+
+    python bench_bookings.py --requests 2000 --concurrency 1,8,32
+
+Put --dir on the disk the real database lives on: the difference between the
+two modes is mostly fsyncs, which a tmpfs does not pay for.
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+
+def run(app, concurrency, total):
+    """Post `total` bookings from `concurrency` threads; returns (seconds, latencies, failures)"""
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+    per_thread = total // concurrency
+    start_gate = threading.Barrier(concurrency + 1)
+
+    def client_thread():
+        client = app.test_client()
+        client.post('/login_user', data={'email': 'admin@evento.com', 'password': 'admin123'})
+        local = []
+        errors = 0
+        start_gate.wait()
+        for i in range(per_thread):
+            started = time.perf_counter()
+            response = client.post('/create_booking', json={
+                'first_name': 'Bench', 'last_name': 'User', 'email': 'bench@example.com',
+                'phone': '1234567890', 'event_date': '2027-01-15', 'event_type': 'wedding',
+                'guests': 100, 'hall_name': 'Grand Mumbai Hall', 'hall_price': 25000,
+            })
+            local.append(time.perf_counter() - started)
+            if not response.get_json().get('success'):
+                errors += 1
+        with lock:
+            latencies.extend(local)
+            failures.append(errors)
+
+    threads = [threading.Thread(target=client_thread) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    start_gate.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, latencies, sum(failures)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help='bookings per run')
+    parser.add_argument('--concurrency', default='1,4,16,32', help='comma-separated thread counts')
+    parser.add_argument('--window', type=float, default=0.005, help='WRITE_BATCH_WINDOW in seconds')
+    parser.add_argument('--dir', default=None, help='directory for the benchmark database')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='evento-bench-', dir=args.dir)
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['RATE_LIMIT_DB'] = os.path.join(workdir, 'ratelimit.db')
+    os.environ['RATE_LIMIT_ENABLED'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from app import app, ensure_db
+    with app.app_context():
+        ensure_db()
+    app.config['WRITE_BATCH_WINDOW'] = args.window
+
+    print(f"{'mode':<10}{'threads':>8}{'bookings/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'failed':>8}")
+    try:
+        for concurrency in [int(c) for c in args.concurrency.split(',')]:
+            for batching in (False, True):
+                app.config['WRITE_BATCHING'] = batching
+                with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                    elapsed, latencies, failed = run(app, concurrency, args.requests)
+                print(f"{'group' if batching else 'single':<10}{concurrency:>8}"
+                      f"{len(latencies) / elapsed:>12.0f}"
+                      f"{statistics.median(latencies) * 1000:>10.1f}"
+                      f"{percentile(latencies, 95) * 1000:>10.1f}"
+                      f"{percentile(latencies, 99) * 1000:>10.1f}"
+                      f"{failed:>8}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
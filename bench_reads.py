@@ -0,0 +1,161 @@
+"""List endpoint benchmark: ORM instances + jsonify vs the Core/namedtuple fast path.
+
+Seeds a throwaway SQLite database with --rows halls, services, packages, users
+and bookings, then serves each list endpoint both ways inside a request
+context and prints CPU time and peak allocated memory per row.
+
+    python bench_reads.py --rows 5000 --repeat 5
+
+The "orm" column rebuilds each endpoint the way it was written before the fast
+path: load full model instances into the session, copy attributes into dicts
+and jsonify them.
+"""
+import argparse
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+
+def seed(app, db, models, rows):
+    """Bulk-insert `rows` of each list endpoint's table with Core"""
+    from werkzeug.security import generate_password_hash
+    Service, Hall, Package, User, Booking = models
+    now = datetime.utcnow()
+    password = generate_password_hash('bench')
+    with app.app_context():
+        db.session.execute(Service.__table__.insert(), [
+            {'name': f'Service {i}', 'description': 'Bench service ' * 4, 'price': 1000 + i,
+             'category': 'decoration', 'is_active': True} for i in range(rows)])
+        db.session.execute(Hall.__table__.insert(), [
+            {'name': f'Hall {i}', 'location': f'City {i % 50}', 'description': 'Bench hall ' * 4,
+             'price': 20000 + i, 'capacity': 100 + i % 900, 'image_url': f'/static/hall{i}.jpg',
+             'is_active': True} for i in range(rows)])
+        db.session.execute(Package.__table__.insert(), [
+            {'name': f'Package {i}', 'description': 'Bench package ' * 4, 'price': 50000 + i,
+             'features': '["Venue", "Catering", "Decoration"]', 'is_active': True} for i in range(rows)])
+        db.session.execute(User.__table__.insert(), [
+            {'name': f'User {i}', 'email': f'user{i}@bench.example', 'phone': '9999999999',
+             'password': password, 'created_at': now, 'is_admin': False} for i in range(rows)])
+        first_user = db.session.execute(db.select(db.func.min(User.id)).where(User.email.like('%@bench.example'))).scalar()
+        db.session.execute(Booking.__table__.insert(), [
+            {'booking_id': f'BENCH{i:010d}', 'user_id': first_user + i % rows, 'first_name': 'Bench',
+             'last_name': 'User', 'email': 'bench@example.com', 'phone': '9999999999',
+             'event_date': date.today() + timedelta(days=i % 365), 'event_type': 'wedding',
+             'guests': 50 + i % 500, 'hall_name': f'Hall {i % rows}', 'hall_price': 20000,
+             'total_amount': 20000 + i, 'status': 'confirmed', 'created_at': now, 'updated_at': now}
+            for i in range(rows)])
+        db.session.commit()
+
+
+def orm_views(app_module):
+    """The list endpoints as they were written before the fast path"""
+    m = app_module
+
+    def services():
+        return m.jsonify([{'id': s.id, 'name': s.name, 'description': s.description, 'price': s.price,
+                           'category': s.category} for s in m.Service.query.filter_by(is_active=True).all()])
+
+    def halls():
+        return m.jsonify([{'id': h.id, 'name': h.name, 'location': h.location, 'description': h.description,
+                           'price': h.price, 'capacity': h.capacity, 'image_url': h.image_url}
+                          for h in m.Hall.query.filter_by(is_active=True).all()])
+
+    def packages():
+        return m.jsonify([{'id': p.id, 'name': p.name, 'description': p.description, 'price': p.price,
+                           'features': p.features} for p in m.Package.query.filter_by(is_active=True).all()])
+
+    def users():
+        counts = dict(m.db.session.execute(
+            m.sa.select(m.Booking.user_id, m.func.count()).group_by(m.Booking.user_id)).all())
+        return m.jsonify({'success': True, 'users': [{
+            'id': u.id, 'name': u.name, 'email': u.email, 'phone': u.phone or 'N/A', 'is_admin': u.is_admin,
+            'created_at': u.created_at.strftime('%Y-%m-%d') if u.created_at else 'N/A',
+            'bookings_count': counts.get(u.id, 0)} for u in m.User.query.all()]})
+
+    def bookings():
+        data = []
+        for b in m.Booking.query.order_by(m.Booking.created_at.desc()).all():
+            user = m.db.session.get(m.User, b.user_id)
+            data.append({
+                'booking_id': b.booking_id, 'user_name': user.name if user else 'Unknown',
+                'user_email': user.email if user else 'Unknown',
+                'event_date': b.event_date.strftime('%Y-%m-%d') if b.event_date else 'N/A',
+                'event_type': b.event_type or 'N/A', 'guests': b.guests or 0,
+                'total_amount': b.total_amount or 0, 'status': b.status or 'pending',
+                'created_at': b.created_at.strftime('%Y-%m-%d %H:%M') if b.created_at else 'N/A'})
+        return m.jsonify({'success': True, 'bookings': data})
+
+    return {'/api/services': services, '/api/halls': halls, '/api/packages': packages,
+            '/admin/users': users, '/admin/bookings': bookings}
+
+
+def measure(app, db, admin_id, view, repeat):
+    """Best-of-`repeat` seconds and peak traced bytes for one call of `view`"""
+    def call():
+        with app.test_request_context():
+            from flask import session
+            session['user_id'] = admin_id
+            response = view()
+            db.session.remove()
+        return response
+
+    call()  # warm statement caches
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.process_time()
+        call()
+        best = min(best, time.process_time() - started)
+    tracemalloc.start()
+    call()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000, help='rows seeded per table')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per endpoint (best is kept)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='evento-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['RATE_LIMIT_DB'] = os.path.join(workdir, 'ratelimit.db')
+    os.environ['RATE_LIMIT_ENABLED'] = '0'
+    os.environ['SLOW_QUERY_MS'] = '0'
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    try:
+        import app as app_module
+        from app import app, db, ensure_db, Service, Hall, Package, User, Booking
+        with app.app_context():
+            ensure_db()
+        seed(app, db, (Service, Hall, Package, User, Booking), args.rows)
+        with app.app_context():
+            admin_id = User.query.filter_by(is_admin=True).first().id
+
+        print(f"{'endpoint':<18}{'rows':>7}{'orm us/row':>12}{'fast us/row':>13}"
+              f"{'orm B/row':>11}{'fast B/row':>12}{'speedup':>9}")
+        for endpoint, orm_view in orm_views(app_module).items():
+            fast_view = app.view_functions[app.url_map.bind('').match(endpoint)[0]]
+            with app.test_request_context():
+                payload = orm_view().get_json()
+            rows = len(payload if isinstance(payload, list) else next(
+                v for v in payload.values() if isinstance(v, list)))
+            with contextlib.redirect_stdout(open(os.devnull, 'w')):
+                orm_time, orm_peak = measure(app, db, admin_id, orm_view, args.repeat)
+                fast_time, fast_peak = measure(app, db, admin_id, fast_view, args.repeat)
+            print(f"{endpoint:<18}{rows:>7}"
+                  f"{orm_time / rows * 1e6:>12.2f}{fast_time / rows * 1e6:>13.2f}"
+                  f"{orm_peak / rows:>11.0f}{fast_peak / rows:>12.0f}"
+                  f"{orm_time / fast_time:>8.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Shared fixtures: one throwaway SQLite database for the whole test session.
+
+The app reads its configuration from the environment at import time, so the
+environment is set up here before `app` is imported. Tests share the seeded
+database and create their own uniquely named rows instead of resetting it.
+"""
+import os
+import shutil
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+TEST_DIR = tempfile.mkdtemp(prefix='evento-tests-')
+os.environ.update({
+    'DATABASE_URL': f"sqlite:///{os.path.join(TEST_DIR, 'evento.db')}",
+    'SECRET_KEY': 'test-secret-key',
+    'RATE_LIMIT_DB': os.path.join(TEST_DIR, 'ratelimit.db'),
+    'RATE_LIMIT_ENABLED': '0',
+    'BOOKING_PARTITION_DIR': os.path.join(TEST_DIR, 'partitions'),
+    'RECEIPT_DIR': os.path.join(TEST_DIR, 'receipts'),
+    'PROFILE_DIR': os.path.join(TEST_DIR, 'profiles'),
+})
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as evento  # noqa: E402
+
+evento.app.instance_path = os.path.join(TEST_DIR, 'instance')
+
+ADMIN_EMAIL = 'admin@evento.com'
+ADMIN_PASSWORD = 'admin123'
+
+
+@pytest.fixture(scope='session')
+def app():
+    evento.app.config['TESTING'] = True
+    with evento.app.app_context():
+        evento.ensure_db()
+    yield evento.app
+    shutil.rmtree(TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, email, password, prefix=''):
+    return client.post(f'{prefix}/login_user', data={'email': email, 'password': password})
+
+
+def register(client, prefix=''):
+    """Register a fresh user through the form and return their email"""
+    email = f'{uuid.uuid4().hex[:12]}@example.com'
+    client.post(f'{prefix}/register_user', data={
+        'name': 'Test User', 'email': email, 'phone': '9876543210',
+        'password': 'secret123', 'confirm_password': 'secret123',
+    })
+    return email
+
+
+def booking_data(**overrides):
+    data = {
+        'first_name': 'Test', 'last_name': 'User', 'email': 'guest@example.com', 'phone': '9876543210',
+        'event_date': '2030-06-15', 'event_type': 'wedding', 'guests': 120,
+        'hall_name': 'Grand Mumbai Hall', 'hall_price': 25000,
+    }
+    data.update(overrides)
+    return data
+
+
+def book(client, prefix='', **overrides):
+    """Create a booking through the API and return its booking_id"""
+    result = client.post(f'{prefix}/create_booking', json=booking_data(**overrides)).get_json()
+    assert result['success'], result
+    return result['booking_id']
+
+
+@pytest.fixture
+def admin_client(client):
+    login(client, ADMIN_EMAIL, ADMIN_PASSWORD)
+    return client
+
+
+@pytest.fixture
+def user_client(app):
+    client = app.test_client()
+    client.email = register(client)
+    return client
@@ -0,0 +1,98 @@
+import statistics
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import book, evento
+
+np = pytest.importorskip('numpy')
+
+
+def arrays(rows):
+    """BookingArrays from (event_date, event_type, hall_name, guests, amount) tuples"""
+    return evento.BookingArrays([(d.isoformat(), t, h, g, a) for d, t, h, g, a in rows])
+
+
+def test_occupancy_counts_each_hall_day_once():
+    monday = date(2030, 1, 7)
+    b = arrays([
+        (monday, 'wedding', 'A', 10, 1),
+        (monday, 'party', 'A', 10, 1),  # same hall and day
+        (monday + timedelta(days=7), 'wedding', 'A', 10, 1),
+        (monday + timedelta(days=1), 'wedding', 'B', 10, 1),
+        (monday, 'wedding', None, 10, 1),  # no hall: not occupancy
+    ])
+    result = evento.occupancy_heatmap(b)
+    assert result['halls'] == ['A', 'B']
+    assert result['by_weekday'][0][0] == 1.0  # both Mondays in the span booked
+    assert result['by_weekday'][1][1] == 1.0
+    assert result['by_month'][0][0] == round(2 / 8, 4)
+
+
+def test_revenue_percentiles_match_the_statistics_module():
+    rows = [(date(2030, 1, 1), 'wedding' if i % 3 else 'party', 'A', 10, 1000 + 137 * i) for i in range(60)]
+    result = {r['type']: r for r in evento.revenue_percentiles(arrays(rows))['event_types']}
+    weddings = [a for _, t, _, _, a in rows if t == 'wedding']
+    assert result['wedding']['bookings'] == len(weddings)
+    assert result['wedding']['total'] == sum(weddings)
+    assert result['wedding']['percentiles']['50'] == statistics.median(weddings)
+
+
+def test_guest_histogram_grows_an_overflow_bin():
+    b = arrays([(date(2030, 1, 1), 'x', 'A', g, 1) for g in (10, 60, 60, 2500)])
+    result = evento.guest_distribution(b)
+    assert [bin['count'] for bin in result['bins']] == [1, 2, 0, 0, 0, 0, 1]
+    assert result['bins'][-1] == {'from': 1000, 'to': 2500, 'count': 1}
+    assert result['median'] == 60
+
+
+def test_forecast_continues_a_growing_series():
+    rows = []
+    for month in range(24):
+        first = date(2028 + month // 12, month % 12 + 1, 1)
+        rows += [(first, 'x', 'A', 1, 1)] * (10 + month)
+    result = evento.demand_forecast(arrays(rows), months=3)
+    assert [h['bookings'] for h in result['history']] == list(range(10, 34))
+    assert [f['month'] for f in result['forecast']] == ['2030-01', '2030-02', '2030-03']
+    assert result['trend_per_month'] > 0
+    # Each forecast month is above the same month a year earlier
+    assert all(f['bookings'] > 22 + i for i, f in enumerate(result['forecast']))
+
+
+def test_empty_data_is_handled():
+    empty = evento.BookingArrays([])
+    for analysis in evento.ANALYTICS.values():
+        assert analysis(empty) is not None
+
+
+def test_endpoint_serves_fresh_results(admin_client, user_client):
+    before = admin_client.get('/admin/analytics/guests').get_json()['bookings']
+    book(user_client)
+    assert admin_client.get('/admin/analytics/guests').get_json()['bookings'] == before + 1
+
+
+def test_unknown_analysis_and_missing_numpy(admin_client, monkeypatch):
+    assert admin_client.get('/admin/analytics/nope').status_code == 404
+    monkeypatch.setattr(evento, 'np', None)
+    assert admin_client.get('/admin/analytics/guests').status_code == 503
+
+
+def test_deleting_a_user_drops_their_bookings_from_analytics(admin_client, user_client):
+    book(user_client)
+    book(user_client)
+    before = admin_client.get('/admin/analytics/guests').get_json()['bookings']
+    with evento.app.app_context():
+        user_id = evento.User.query.filter_by(email=user_client.email).one().id
+    assert admin_client.delete(f'/admin/delete_user/{user_id}').get_json()['success']
+    assert admin_client.get('/admin/analytics/guests').get_json()['bookings'] == before - 2
+    bookings = admin_client.get('/admin/bookings').get_json()['bookings']
+    assert not [b for b in bookings if b['user_email'] == user_client.email]
+
+
+def test_bulk_booking_updates_refresh_analytics(admin_client, user_client):
+    booking_id = book(user_client)
+    before = admin_client.get('/admin/analytics/guests').get_json()['bookings']
+    with evento.app.app_context():
+        evento.Booking.query.filter_by(booking_id=booking_id).update({'status': 'cancelled'})
+        evento.db.session.commit()
+    assert admin_client.get('/admin/analytics/guests').get_json()['bookings'] == before - 1
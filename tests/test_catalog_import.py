@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+import uuid
+
+from conftest import evento
+
+
+def import_csv(client, text, kind='services', query=''):
+    return client.post(f'/admin/catalog/{kind}/import?format=csv{query}', data=text.encode(),
+                       content_type='text/csv')
+
+
+def unique(prefix):
+    return f'{prefix} {uuid.uuid4().hex[:8]}'
+
+
+def service(name):
+    with evento.app.app_context():
+        return evento.Service.query.filter_by(name=name).first()
+
+
+def test_surplus_csv_fields_are_reported_by_line(admin_client):
+    response = import_csv(admin_client, 'name,price\nDecor,100\nLights,50,extra\n')
+    assert response.status_code == 400
+    assert 'too many fields on line 3' in response.get_json()['message']
+
+
+def test_invalid_rows_reject_the_whole_import(admin_client):
+    good, bad = unique('Good'), unique('Bad')
+    text = f'name,price,colour\n{good},100,\n{bad},cheap,\n'
+    response = import_csv(admin_client, text)
+    data = response.get_json()
+    assert response.status_code == 400
+    assert [error['row'] for error in data['errors']] == [1, 2]
+    assert 'unknown column(s): colour' in data['errors'][0]['errors']
+    assert 'price must be a whole number' in data['errors'][1]['errors']
+    assert service(good) is None
+
+
+def test_new_entries_need_required_columns(admin_client):
+    response = import_csv(admin_client, f'name\n{unique("Priceless")}\n')
+    assert response.status_code == 400
+    assert response.get_json()['errors'][0]['errors'] == ['price is required for new entries']
+
+
+def test_dry_run_writes_nothing(admin_client):
+    name = unique('Dry')
+    data = import_csv(admin_client, f'name,price\n{name},100\n', query='&dry_run=1').get_json()
+    assert data['success'] and data['dry_run'] and data['inserted'] == 1
+    assert service(name) is None
+
+
+def test_import_inserts_then_updates_by_name(admin_client):
+    name = unique('Upsert')
+    data = import_csv(admin_client, f'name,price,category\n{name},100,decor\n').get_json()
+    assert data['success'] and data['inserted'] == 1
+    data = import_csv(admin_client, f'name,price,category\n{name},250,\n').get_json()
+    assert data['success'] and (data['inserted'], data['updated']) == (0, 1)
+    entry = service(name)
+    assert (entry.price, entry.category) == (250, 'decor')  # blank cells leave columns as they are
+
+
+def test_export_round_trips_through_import(admin_client):
+    name = unique('Export')
+    import_csv(admin_client, f'name,price\n{name},75\n')
+    exported = admin_client.get('/admin/catalog/services/export?format=csv').get_data(as_text=True)
+    rows = list(csv.DictReader(io.StringIO(exported)))
+    assert [row['price'] for row in rows if row['name'] == name] == ['75']
+    data = import_csv(admin_client, exported, query='&dry_run=1').get_json()
+    assert data['success'] and data['inserted'] == 0 and data['updated'] == len(rows)
+
+    exported = admin_client.get('/admin/catalog/services/export?format=json').get_data()
+    assert name in {row['name'] for row in json.loads(exported)}
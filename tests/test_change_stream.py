@@ -0,0 +1,99 @@
+import json
+import queue
+import shutil
+import subprocess
+import threading
+
+import pytest
+
+from conftest import book, evento
+
+
+@pytest.fixture
+def fast_stream(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'CHANGE_POLL_INTERVAL', 0.05)
+    monkeypatch.setitem(app.config, 'SSE_HEARTBEAT', 0.2)
+
+
+def open_stream(client, **kwargs):
+    response = client.get('/admin/stream', buffered=False, **kwargs)
+    return response, (chunk.decode() for chunk in response.response)
+
+
+def next_event(chunks):
+    for chunk in chunks:
+        if chunk.startswith('id: '):
+            return chunk
+
+
+def test_new_bookings_are_pushed_to_the_stream(fast_stream, admin_client, user_client):
+    response, chunks = open_stream(admin_client)
+    assert next(chunks).startswith('retry:')
+    evento.time.sleep(0.2)  # let the broker take its starting position
+    booking_id = book(user_client)
+    event = next_event(chunks)
+    assert 'event: booking_created' in event and booking_id in event
+    response.close()
+
+
+def test_reconnect_replays_missed_events(fast_stream, admin_client, user_client):
+    response, chunks = open_stream(admin_client)
+    next(chunks)
+    evento.time.sleep(0.2)
+    book(user_client)
+    last_id = next_event(chunks).split('\n')[0][4:]
+    response.close()
+    missed = book(user_client)
+    response, chunks = open_stream(admin_client, headers={'Last-Event-ID': last_id})
+    assert missed in next_event(chunks)
+    response.close()
+
+
+def test_slow_subscriber_is_dropped_without_blocking_the_broker():
+    broker = evento.ChangeBroker()
+    slow = queue.Queue(maxsize=3)
+    fast = queue.Queue()
+    broker._subscribers = {slow: 1, fast: 1}
+    publisher = threading.Thread(target=lambda: [broker._publish((i, 'booking_created', '{}'), 1) for i in range(10)])
+    publisher.start()
+    publisher.join(timeout=2)
+    assert not publisher.is_alive()
+    assert slow not in broker._subscribers
+    assert slow.get_nowait() is None and slow.empty()
+    assert fast.qsize() == 10
+
+
+def test_stream_requires_admin(user_client):
+    assert user_client.get('/admin/stream').get_json()['success'] is False
+
+
+def page_function(page, name):
+    """Source of a top-level `function name(...) {...}` from the admin page script"""
+    start = page.index(f'function {name}(')
+    depth, end = 0, page.index('{', start)
+    while True:
+        depth += {'{': 1, '}': -1}.get(page[end], 0)
+        end += 1
+        if depth == 0:
+            return page[start:end]
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='needs node to run the dashboard script')
+def test_streamed_rows_escape_customer_text(admin_client):
+    page = admin_client.get('/admin/dashboard').get_data(as_text=True)
+    hostile = '<img src=x onerror=alert(1)>'
+    booking = {'booking_id': "EVT-1');alert('x", 'customer_name': hostile, 'user_name': hostile,
+               'user_email': hostile, 'event_date': hostile, 'event_type': hostile, 'guests': 1,
+               'total_amount': 1000, 'status': f'pending{hostile}'}
+    script = '\n'.join(page_function(page, name) for name in
+                       ('escapeHtml', 'jsArg', 'bookingRow', 'recentBookingRow', 'userRow'))
+    script += f"""
+const booking = {json.dumps(booking)};
+const user = {{id: 1, name: booking.customer_name, email: 'a@b.c', is_admin: false, bookings_count: 0}};
+console.log(JSON.stringify([recentBookingRow(booking), bookingRow(booking), userRow(user)]));
+"""
+    rows = json.loads(subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout)
+    for row in rows:
+        assert '<img' not in row
+        assert '&lt;img src=x onerror=alert(1)&gt;' in row
+    assert "viewBooking(&quot;EVT-1&#39;);alert(&#39;x&quot;)" in rows[0]
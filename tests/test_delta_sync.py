@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import book, evento
+
+
+def changes(client, since=None, **params):
+    if since:
+        params['since'] = since
+    return client.get('/admin/bookings/changes', query_string=params).get_json()
+
+
+def drain(client, since=None):
+    """Follow has_more to the end; returns (booking ids, deleted ids, watermark)"""
+    seen, deleted = [], []
+    while True:
+        page = changes(client, since, limit=200)
+        seen += [c['booking_id'] for c in page['changes']]
+        deleted += [d['booking_id'] for d in page['deleted']]
+        since = page['watermark']
+        if not page['has_more']:
+            return seen, deleted, since
+
+
+def set_timestamps(booking_id, when):
+    with evento.app.app_context():
+        evento.Booking.query.filter_by(booking_id=booking_id).update({'updated_at': when})
+        evento.db.session.commit()
+
+
+@pytest.fixture
+def no_settle(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'SYNC_SETTLE_SECONDS', 0)
+
+
+def test_settle_window_covers_the_busy_timeout(app, monkeypatch):
+    with app.app_context():
+        assert evento.sync_settle_seconds() > app.config['SQLITE_BUSY_TIMEOUT']
+        monkeypatch.setitem(app.config, 'WRITE_BATCHING', True)
+        assert evento.sync_settle_seconds() > app.config['SQLITE_BUSY_TIMEOUT'] + app.config['WRITE_BATCH_WINDOW']
+
+
+def test_late_commit_is_not_behind_a_handed_out_watermark(app, admin_client, user_client, monkeypatch):
+    _, _, watermark = drain(admin_client)
+    # Flushed just before the watermark was handed out, then waited on the
+    # busy timeout and committed only now
+    booking_id = book(user_client)
+    set_timestamps(booking_id, datetime.utcnow() - timedelta(seconds=app.config['SQLITE_BUSY_TIMEOUT'] - 1))
+    assert booking_id not in drain(admin_client, watermark)[0]  # still settling
+    monkeypatch.setitem(app.config, 'SYNC_SETTLE_SECONDS', 0)  # ... and once it has settled
+    assert booking_id in drain(admin_client, watermark)[0]
+
+
+def test_only_changes_since_the_watermark_are_sent(no_settle, admin_client, user_client):
+    book(user_client)
+    _, _, watermark = drain(admin_client)
+    evento.time.sleep(0.01)
+    updated = book(user_client)
+    seen, _, watermark = drain(admin_client, watermark)
+    assert seen == [updated]
+    assert drain(admin_client, watermark)[:2] == ([], [])
+
+
+def test_deletes_arrive_as_tombstones(no_settle, admin_client, user_client):
+    booking_id = book(user_client)
+    _, _, watermark = drain(admin_client)
+    with evento.app.app_context():
+        evento.Booking.query.filter_by(booking_id=booking_id).delete()
+        evento.db.session.commit()
+    evento.time.sleep(0.01)
+    assert drain(admin_client, watermark)[1] == [booking_id]
+
+
+def test_pages_follow_has_more(no_settle, admin_client, user_client):
+    ids = [book(user_client) for _ in range(3)]
+    _, _, start = drain(admin_client)
+    for booking_id in ids:
+        set_timestamps(booking_id, datetime.utcnow())
+        evento.time.sleep(0.01)
+    first = changes(admin_client, start, limit=2)
+    second = changes(admin_client, first['watermark'], limit=2)
+    assert first['has_more'] and not second['has_more']
+    assert [c['booking_id'] for c in first['changes'] + second['changes']] == ids
+
+
+def test_bad_watermark_falls_back_to_a_full_resync(no_settle, admin_client):
+    assert changes(admin_client, 'garbage')['full_resync']
@@ -0,0 +1,67 @@
+import threading
+import uuid
+
+import pytest
+
+from conftest import book, evento
+
+
+@pytest.fixture
+def batching(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'WRITE_BATCHING', True)
+    monkeypatch.setitem(app.config, 'WRITE_BATCH_WINDOW', 0.05)
+
+
+def submit(write, tenant_id=None):
+    with evento.app.test_request_context():
+        evento.g.tenant_id = tenant_id
+        return evento.write_batcher.submit(write)
+
+
+def service_names(names):
+    with evento.app.app_context():
+        query = evento.db.session.query(evento.Service.name)
+        return {name for (name,) in query.filter(evento.Service.name.in_(names))}
+
+
+def test_batched_booking_is_committed(batching, user_client):
+    booking_id = book(user_client)
+    with evento.app.app_context():
+        assert evento.Booking.query.filter_by(booking_id=booking_id).count() == 1
+
+
+def test_failing_write_only_fails_its_own_item(batching):
+    names = [f'Batched {uuid.uuid4().hex[:8]}' for _ in range(3)]
+    results, errors = {}, {}
+
+    def write(name):
+        if name == names[1]:
+            evento.db.session.add(evento.Service(name=name, price=1, category='x'))
+            raise ValueError('rejected')
+        evento.db.session.add(evento.Service(name=name, price=1, category='x'))
+        return name
+
+    def run(name):
+        try:
+            results[name] = submit(lambda: write(name))
+        except ValueError as e:
+            errors[name] = e
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in names]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert set(results) == {names[0], names[2]}
+    assert set(errors) == {names[1]}
+    assert service_names(names) == {names[0], names[2]}
+
+
+def test_batched_write_keeps_the_tenant_of_its_request(batching):
+    name = f'Tenant write {uuid.uuid4().hex[:8]}'
+    assert submit(evento.current_tenant_id, tenant_id=7) == 7
+    submit(lambda: evento.db.session.add(evento.Service(name=name, price=1, category='x')), tenant_id=7)
+    with evento.app.app_context():
+        query = evento.Service.query  # unscoped outside a request
+        assert query.filter_by(name=name).one().tenant_id == 7
@@ -0,0 +1,62 @@
+import random
+import uuid
+
+from conftest import book, evento
+
+
+def search(client, **params):
+    return client.get('/api/halls/search', query_string=params).get_json()
+
+
+def add_hall(admin_client, location, **fields):
+    hall = {'name': f'Hall {uuid.uuid4().hex[:8]}', 'location': location, 'price': 10000, 'capacity': 100}
+    hall.update(fields)
+    assert admin_client.post('/admin/halls', json=hall).get_json()['success']
+    return hall['name']
+
+
+def test_index_matches_a_linear_scan():
+    rng = random.Random(7)
+    halls = [evento.HallRecord(i, f'h{i}', rng.choice(['Andheri', 'andheri ', 'Pune', None]), '',
+                               rng.randrange(1000, 50000, 500), rng.choice([None, 50, 100, 300, 800]), '')
+             for i in range(300)]
+    index = evento.HallIndex(halls)
+    for _ in range(200):
+        guests = rng.choice([None, 0, 60, 250, 900])
+        max_price = rng.choice([None, 5000, 20000, 60000])
+        location = rng.choice([None, 'ANDHERI', 'pune', 'Goa'])
+        expected = {h.id for h in halls
+                    if (not guests or (h.capacity or 0) >= guests)
+                    and (max_price is None or h.price <= max_price)
+                    and (not location or (h.location or '').strip().lower() == location.lower())}
+        assert {h.id for h in index.search(guests, max_price, location)} == expected
+
+
+def test_search_filters_and_sorts(admin_client, client):
+    location = f'Testville {uuid.uuid4().hex[:6]}'
+    small = add_hall(admin_client, location, capacity=80, price=5000)
+    large = add_hall(admin_client, location, capacity=400, price=30000)
+    add_hall(admin_client, location, capacity=400, price=90000)
+    result = search(client, location=location, guests=50, max_price=40000)
+    assert [h['name'] for h in result['halls']] == [small, large]
+    assert [h['name'] for h in search(client, location=location, sort='capacity', max_price=40000)['halls']] == [large, small]
+
+
+def test_halls_booked_on_the_date_are_excluded(admin_client, user_client):
+    location = f'Datetown {uuid.uuid4().hex[:6]}'
+    hall = add_hall(admin_client, location)
+    book(user_client, hall_name=hall, event_date='2031-02-03')
+    assert search(user_client, location=location, date='2031-02-03')['total'] == 0
+    assert search(user_client, location=location, date='2031-02-04')['total'] == 1
+
+
+def test_index_follows_catalog_changes(admin_client, client):
+    location = f'Newtown {uuid.uuid4().hex[:6]}'
+    assert search(client, location=location)['total'] == 0
+    add_hall(admin_client, location)
+    assert search(client, location=location)['total'] == 1
+
+
+def test_bad_parameters_are_rejected(client):
+    assert client.get('/api/halls/search?date=03-02-2031').status_code == 400
+    assert client.get('/api/halls/search?sort=random').status_code == 400
@@ -0,0 +1,50 @@
+import re
+
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD, book, evento, login, register
+
+
+def user_id(email):
+    with evento.app.app_context():
+        return evento.User.query.filter_by(email=email).first().id
+
+
+def test_history_pages_with_a_cursor(user_client):
+    booked = [book(user_client) for _ in range(3)]
+    uid = user_id(user_client.email)
+    with evento.app.app_context():
+        first, cursor = evento.load_booking_history(uid, limit=2)
+        second, last_cursor = evento.load_booking_history(uid, cursor, limit=2)
+    assert [b['booking_id'] for b in first + second] == booked[::-1]
+    assert cursor and last_cursor is None
+
+
+def test_history_page_lists_only_own_bookings(app, user_client):
+    mine = book(user_client)
+    other = app.test_client()
+    register(other)
+    theirs = book(other)
+    html = user_client.get('/booking_history').get_data(as_text=True)
+    assert mine in html and theirs not in html
+
+
+def test_cached_pages_see_new_bookings(user_client):
+    book(user_client)
+    user_client.get('/booking_history')
+    newest = book(user_client)
+    assert newest in user_client.get('/booking_history').get_data(as_text=True)
+
+
+def test_cached_receipt_follows_status_changes(app, user_client):
+    booking_id = book(user_client)
+    assert 'confirmed' in user_client.get(f'/booking_receipt/{booking_id}').get_data(as_text=True)
+    admin = app.test_client()
+    login(admin, ADMIN_EMAIL, ADMIN_PASSWORD)
+    admin.post('/admin/update_booking_status', json={'booking_id': booking_id, 'status': 'cancelled'})
+    html = user_client.get(f'/booking_receipt/{booking_id}').get_data(as_text=True)
+    assert re.search(r'<span>Status</span><span>cancelled</span>', html)
+
+
+def test_receipt_of_another_user_is_not_shown(user_client, admin_client):
+    booking_id = book(admin_client)
+    response = user_client.get(f'/booking_receipt/{booking_id}')
+    assert response.status_code == 302
@@ -0,0 +1,62 @@
+import threading
+import uuid
+
+from conftest import booking_data, evento, register
+
+
+def post(client, key, **overrides):
+    return client.post('/create_booking', json=booking_data(**overrides), headers={'Idempotency-Key': key})
+
+
+def bookings_named(first_name):
+    with evento.app.app_context():
+        return evento.Booking.query.filter_by(first_name=first_name).count()
+
+
+def test_retry_replays_the_first_response(user_client):
+    key, name = uuid.uuid4().hex, uuid.uuid4().hex[:10]
+    first = post(user_client, key, first_name=name)
+    retry = post(user_client, key, first_name=name)
+    assert retry.get_json() == first.get_json()
+    assert retry.headers['Idempotent-Replayed'] == 'true'
+    assert bookings_named(name) == 1
+
+
+def test_replay_survives_a_cold_cache(user_client):
+    key, name = uuid.uuid4().hex, uuid.uuid4().hex[:10]
+    booking_id = post(user_client, key, first_name=name).get_json()['booking_id']
+    evento._idempotency_cache.clear()
+    assert post(user_client, key, first_name=name).get_json()['booking_id'] == booking_id
+
+
+def test_key_reused_for_another_request_is_rejected(user_client):
+    key = uuid.uuid4().hex
+    post(user_client, key, guests=10)
+    response = post(user_client, key, guests=20)
+    assert response.status_code == 422 and not response.get_json()['success']
+
+
+def test_keys_are_scoped_per_user(app, user_client):
+    other = app.test_client()
+    register(other)
+    key = uuid.uuid4().hex
+    assert post(user_client, key).get_json()['booking_id'] != post(other, key).get_json()['booking_id']
+
+
+def test_concurrent_retries_write_once(app, user_client):
+    key, name = uuid.uuid4().hex, uuid.uuid4().hex[:10]
+    cookie = user_client.get_cookie('session').value
+    results = []
+
+    def retry():
+        client = app.test_client()
+        client.set_cookie('session', cookie)
+        results.append(post(client, key, first_name=name).get_json())
+
+    threads = [threading.Thread(target=retry) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({result['booking_id'] for result in results}) == 1
+    assert bookings_named(name) == 1
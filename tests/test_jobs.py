@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import evento
+
+calls = []
+
+
+@evento.job_handler('test_record')
+def record_job(value):
+    calls.append(value)
+
+
+@evento.job_handler('test_fail')
+def failing_job():
+    raise RuntimeError('boom')
+
+
+def enqueue(name, payload=None, **kwargs):
+    with evento.app.app_context():
+        job = evento.enqueue_job(name, payload, **kwargs)
+        evento.db.session.commit()
+        return job.id
+
+
+def job(job_id):
+    with evento.app.app_context():
+        return evento.db.session.get(evento.Job, job_id)
+
+
+@pytest.fixture(autouse=True)
+def empty_queue(app):
+    evento.work(burst=True)
+    calls.clear()
+
+
+def test_jobs_run_by_priority_then_age():
+    enqueue('test_record', {'value': 'low'})
+    enqueue('test_record', {'value': 'high'}, priority=10)
+    enqueue('test_record', {'value': 'later'}, delay=3600)
+    evento.work(burst=True)
+    assert calls == ['high', 'low']
+
+
+def test_failed_job_is_retried_with_backoff_then_given_up():
+    job_id = enqueue('test_fail', max_attempts=2)
+    evento.work(burst=True)
+    first = job(job_id)
+    assert first.status == 'queued' and first.attempts == 1 and 'boom' in first.last_error
+    assert first.run_at > datetime.utcnow()
+    with evento.app.app_context():
+        evento.Job.query.filter_by(id=job_id).update({'run_at': datetime.utcnow()})
+        evento.db.session.commit()
+    evento.work(burst=True)
+    assert job(job_id).status == 'failed' and job(job_id).attempts == 2
+
+
+def test_dead_workers_jobs_are_requeued():
+    job_id = enqueue('test_record', {'value': 'orphan'})
+    with evento.app.app_context():
+        stale = datetime.utcnow() - timedelta(seconds=evento.app.config['JOB_LOCK_TIMEOUT'] + 1)
+        evento.Job.query.filter_by(id=job_id).update({'status': 'running', 'locked_by': 'gone', 'locked_at': stale})
+        evento.db.session.commit()
+    evento.work(burst=True)
+    assert calls == ['orphan'] and job(job_id).status == 'done'
+
+
+def test_finished_jobs_are_pruned_after_retention():
+    old_id = enqueue('test_record', {'value': 'old'})
+    new_id = enqueue('test_record', {'value': 'new'})
+    evento.work(burst=True)
+    with evento.app.app_context():
+        old = datetime.utcnow() - evento.app.config['JOB_RETENTION'] - timedelta(minutes=1)
+        evento.Job.query.filter_by(id=old_id).update({'updated_at': old})
+        evento.db.session.commit()
+        assert evento.prune_jobs() == 1
+    assert job(old_id) is None and job(new_id) is not None
+
+
+def test_admin_jobs_limit_is_clamped(admin_client):
+    enqueue('test_record', {'value': 'a'})
+    enqueue('test_record', {'value': 'b'})
+    assert len(admin_client.get('/admin/jobs?limit=-1').get_json()['jobs']) == 1
+    assert len(admin_client.get('/admin/jobs?limit=0').get_json()['jobs']) == 1
@@ -0,0 +1,82 @@
+import pytest
+
+from conftest import book, evento
+
+
+class FakeProvider:
+    channel = 'email'
+    sent = []
+    instances = 0
+    fail_for = set()
+
+    def __init__(self):
+        FakeProvider.instances += 1
+
+    def send(self, recipient, subject, body):
+        if recipient in self.fail_for:
+            raise OSError('mailbox unavailable')
+        self.sent.append((recipient, subject, body))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fake_provider(app, monkeypatch):
+    monkeypatch.setitem(evento.NOTIFICATION_PROVIDERS, 'email', FakeProvider)
+    monkeypatch.setitem(app.config, 'NOTIFY_RATE_LIMITS', {'email': 10000})
+    evento._notify_buckets.clear()
+    evento.run_dispatcher(burst=True)
+    FakeProvider.sent, FakeProvider.instances, FakeProvider.fail_for = [], 0, set()
+    yield
+    evento._notify_buckets.clear()
+
+
+def statuses(booking_id):
+    with evento.app.app_context():
+        return [n.status for n in evento.Notification.query.filter_by(booking_id=booking_id).order_by(evento.Notification.id)]
+
+
+def test_booking_confirmation_is_delivered_from_the_outbox(user_client):
+    booking_id = book(user_client, email='outbox@example.com')
+    assert statuses(booking_id) == ['pending']
+    evento.run_dispatcher(burst=True)
+    assert FakeProvider.sent == [('outbox@example.com', f'Booking {booking_id} confirmed', FakeProvider.sent[0][2])]
+    assert statuses(booking_id) == ['sent']
+
+
+def test_pending_updates_for_a_booking_are_coalesced(user_client, admin_client):
+    booking_id = book(user_client, email='coalesce@example.com')
+    for status in ('pending', 'cancelled'):
+        admin_client.post('/admin/update_booking_status', json={'booking_id': booking_id, 'status': status})
+    evento.run_dispatcher(burst=True)
+    assert [subject for _, subject, _ in FakeProvider.sent] == [f'Booking {booking_id} is now cancelled']
+    assert statuses(booking_id) == ['superseded', 'superseded', 'sent']
+
+
+def test_one_provider_connection_per_batch(user_client):
+    for _ in range(3):
+        book(user_client)
+    evento.run_dispatcher(burst=True)
+    assert len(FakeProvider.sent) == 3 and FakeProvider.instances == 1
+
+
+def test_failed_delivery_is_retried_then_marked_failed(app, user_client, monkeypatch):
+    FakeProvider.fail_for = {'bounce@example.com'}
+    monkeypatch.setitem(app.config, 'NOTIFY_RETRY_DELAY', 0)
+    monkeypatch.setitem(app.config, 'NOTIFY_MAX_ATTEMPTS', 2)
+    booking_id = book(user_client, email='bounce@example.com')
+    with app.app_context():
+        evento.dispatch_notifications()
+    assert statuses(booking_id) == ['pending']
+    with app.app_context():
+        evento.dispatch_notifications()
+    assert statuses(booking_id) == ['failed'] and not FakeProvider.sent
+
+
+def test_token_bucket_limits_the_send_rate():
+    bucket = evento.TokenBucket(rate=50, capacity=1)
+    started = evento.time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert evento.time.monotonic() - started >= 0.09
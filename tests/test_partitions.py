@@ -0,0 +1,111 @@
+import contextlib
+from datetime import datetime
+
+import pytest
+import sqlalchemy as sa
+
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD, book, evento, login, register
+
+
+@contextlib.contextmanager
+def partition_queries():
+    """Collect the statements that read a partition schema"""
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        if 'bookings_' in statement:
+            statements.append(statement)
+    sa.event.listen(evento.db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        sa.event.remove(evento.db.engine, 'before_cursor_execute', record)
+
+
+def user_id(email):
+    with evento.app.app_context():
+        return evento.User.query.filter_by(email=email).first().id
+
+
+def backdate(booking_id, created_at):
+    with evento.app.app_context():
+        evento.Booking.query.filter_by(booking_id=booking_id).update({'created_at': created_at, 'updated_at': created_at})
+        evento.db.session.commit()
+
+
+@pytest.fixture(scope='module')
+def archived(app):
+    """A user with bookings in two archived years and three hot ones"""
+    client = app.test_client()
+    email = register(client)
+    old = {year: book(client, event_date=f'{year}-05-01') for year in (2018, 2019)}
+    for year, booking_id in old.items():
+        backdate(booking_id, datetime(year - 1, 6, 1))
+    hot = [book(client) for _ in range(3)]
+    with app.app_context():
+        assert evento.archive_bookings(hot_years=2) == {2018: 1, 2019: 1}
+    client.email = email
+    return client, old, hot
+
+
+def test_lookup_reads_only_the_partition_that_holds_the_booking(app, archived):
+    client, old, _ = archived
+    with app.test_request_context(), partition_queries() as statements:
+        booking = evento.find_booking(old[2019])
+    assert booking.booking_id == old[2019] and booking.event_date.year == 2019
+    assert len(statements) == 1 and 'bookings_2019.booking' in statements[0]
+
+
+def test_unknown_booking_touches_no_partition(app, archived):
+    with app.test_request_context(), partition_queries() as statements:
+        assert evento.find_booking('EVT-000000NOTHERE') is None
+    assert statements == []
+
+
+def test_archived_receipt_is_only_shown_to_its_owner(app, archived):
+    client, old, _ = archived
+    assert old[2018] in client.get(f'/booking_receipt/{old[2018]}').get_data(as_text=True)
+    other = app.test_client()
+    register(other)
+    assert other.get(f'/booking_receipt/{old[2018]}').status_code == 302
+
+
+def test_history_merges_tables_newest_first(app, archived):
+    client, old, hot = archived
+    uid = user_id(client.email)
+    with app.app_context():
+        first, cursor = evento.load_booking_history(uid, limit=3)
+        second, _ = evento.load_booking_history(uid, cursor, limit=3)
+    assert [b['booking_id'] for b in first] == hot[::-1]
+    assert [b['booking_id'] for b in second] == [old[2019], old[2018]]
+
+
+def test_history_skips_partitions_older_than_the_page(app, archived):
+    client, old, _ = archived
+    uid = user_id(client.email)
+    with app.app_context(), partition_queries() as statements:
+        evento.load_booking_history(uid, limit=2)
+    assert not [s for s in statements if 'user_id' in s]
+    with app.app_context(), partition_queries() as statements:
+        evento.load_booking_history(uid, limit=3)
+    # The 2019 booking decides whether there is a next page; 2018 is older still
+    assert [s for s in statements if 'user_id' in s and 'bookings_2018' in s] == []
+    assert len([s for s in statements if 'user_id' in s and 'bookings_2019' in s]) == 1
+
+
+def test_index_is_backfilled_for_existing_partitions(app, archived):
+    _, old, _ = archived
+    with app.app_context():
+        evento.db.session.execute(sa.text('DROP TABLE booking_partition_index'))
+        evento.db.session.commit()
+        evento.init_db(seed=False)
+        years = dict(evento.db.session.execute(sa.select(evento.BookingPartitionIndex.booking_id,
+                                                         evento.BookingPartitionIndex.year)).all())
+    assert years[old[2018]] == 2018 and years[old[2019]] == 2019
+
+
+def test_reports_still_count_archived_bookings(app, archived):
+    client = app.test_client()
+    login(client, ADMIN_EMAIL, ADMIN_PASSWORD)
+    rows = client.get('/admin/reports/range', query_string={'end': '2018-12-31', 'group_by': 'day'}).get_json()['rows']
+    assert {'day': '2018-06-01', 'bookings': 1, 'guests': 120, 'revenue': 25000} in rows
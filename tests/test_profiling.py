@@ -0,0 +1,91 @@
+import pstats
+import time
+
+import pytest
+
+from conftest import evento
+
+
+@pytest.fixture
+def sampler(monkeypatch):
+    sampler = evento.StackSampler(0.001)
+    monkeypatch.setattr(evento, 'stack_sampler', sampler)
+    return sampler
+
+
+@pytest.fixture
+def slow_view(app, monkeypatch):
+    def check_login():
+        time.sleep(0.05)
+        return 'slow'
+    monkeypatch.setitem(app.view_functions, 'check_login', check_login)
+
+
+def newest_capture(client):
+    return client.get('/admin/profiles').get_json()['captures'][0]
+
+
+def test_stack_sampling_is_off_by_default(app, client, sampler):
+    assert app.config['SLOW_REQUEST_MS'] == 500
+    assert not app.config['SLOW_REQUEST_STACKS']
+    client.get('/api/halls')
+    assert sampler._thread is None
+
+
+def test_slow_requests_are_captured_with_their_queries(app, admin_client, sampler, monkeypatch):
+    def slow_services():
+        evento.db.session.execute(evento.sa.select(evento.Service.id)).all()
+        time.sleep(0.05)
+        return 'slow'
+    monkeypatch.setitem(app.view_functions, 'get_services', slow_services)
+    monkeypatch.setitem(app.config, 'SLOW_REQUEST_MS', 20)
+    admin_client.get('/api/services')
+    capture = newest_capture(admin_client)
+    assert capture['kind'] == 'slow' and capture['endpoint'] == 'get_services'
+    assert capture['duration_ms'] >= 20 and capture['file'] is None
+    assert any('FROM service' in query['statement'] for query in capture['queries'])
+    assert sampler._thread is None
+
+
+def test_fast_requests_are_not_captured(app, admin_client):
+    before = len(admin_client.get('/admin/profiles').get_json()['captures'])
+    admin_client.get('/check_login')
+    assert len(admin_client.get('/admin/profiles').get_json()['captures']) == before
+
+
+def test_slow_requests_keep_stacks_when_sampling_is_enabled(app, admin_client, sampler, slow_view, monkeypatch):
+    monkeypatch.setitem(app.config, 'SLOW_REQUEST_MS', 20)
+    monkeypatch.setitem(app.config, 'SLOW_REQUEST_STACKS', True)
+    admin_client.get('/check_login')
+    capture = newest_capture(admin_client)
+    assert capture['kind'] == 'slow' and capture['path'] == '/check_login'
+    folded = admin_client.get(f"/admin/profiles/{capture['id']}").get_data(as_text=True)
+    assert 'check_login (test_profiling.py' in folded
+    assert not sampler._stacks  # the request thread was unregistered
+
+
+def test_admin_can_profile_a_request(admin_client, tmp_path):
+    response = admin_client.get('/api/services', headers={'X-Profile': '1'})
+    assert 'app;dur=' in response.headers['Server-Timing']
+    capture = newest_capture(admin_client)
+    assert capture['kind'] == 'profile' and capture['path'] == '/api/services'
+    path = tmp_path / 'capture.prof'
+    path.write_bytes(admin_client.get(f"/admin/profiles/{capture['id']}").data)
+    assert pstats.Stats(str(path)).total_calls > 0
+
+
+def test_profile_header_is_ignored_for_non_admins(user_client, admin_client):
+    before = len(admin_client.get('/admin/profiles').get_json()['captures'])
+    user_client.get('/api/services', headers={'X-Profile': '1'})
+    assert len(admin_client.get('/admin/profiles').get_json()['captures']) == before
+
+
+def test_only_the_newest_captures_are_kept(app, admin_client, monkeypatch):
+    monkeypatch.setitem(app.config, 'PROFILE_KEEP', 2)
+    for _ in range(3):
+        admin_client.get('/api/services', headers={'X-Profile': '1'})
+    assert len(admin_client.get('/admin/profiles').get_json()['captures']) == 2
+
+
+def test_capture_ids_are_validated(admin_client):
+    assert admin_client.get('/admin/profiles/..%2Fevento').status_code == 404
@@ -0,0 +1,46 @@
+import pytest
+import sqlalchemy as sa
+
+from conftest import evento
+
+
+@pytest.fixture
+def query_stats(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'SLOW_QUERY_MS', 10000)
+    with evento._query_stats_lock:
+        saved = evento._query_stats.copy()
+        evento._query_stats.clear()
+    yield evento._query_stats
+    with evento._query_stats_lock:
+        evento._query_stats.clear()
+        evento._query_stats.update(saved)
+
+
+def test_new_statements_are_recorded_at_capacity(app, query_stats, monkeypatch):
+    monkeypatch.setitem(app.config, 'QUERY_STATS_SIZE', 3)
+    with app.app_context():
+        for n in range(6):
+            evento.db.session.execute(sa.text(f'SELECT {n}'))
+        assert len(query_stats) == 3
+        assert 'SELECT 5' in query_stats
+        assert query_stats['SELECT 5'].count == 1
+
+
+def test_failed_statement_does_not_leave_its_timer_behind(app, query_stats):
+    with app.app_context():
+        connection = evento.db.session.connection()
+        with pytest.raises(sa.exc.OperationalError):
+            connection.execute(sa.text('SELECT * FROM no_such_table'))
+        assert not connection.info.get('query_started')
+        connection.execute(sa.text('SELECT 42'))
+        assert not connection.info.get('query_started')
+        assert query_stats['SELECT 42'].count == 1
+
+
+def test_admin_queries_lists_recorded_statements(admin_client, query_stats):
+    admin_client.get('/api/services')
+    data = admin_client.get('/admin/queries?sort=count').get_json()
+    assert data['success']
+    assert data['queries']
+    assert all(query['count'] >= 1 for query in data['queries'])
+    assert admin_client.get('/admin/queries?sort=bogus').status_code == 400
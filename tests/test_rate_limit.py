@@ -0,0 +1,57 @@
+import sqlite3
+import uuid
+
+import pytest
+
+from conftest import book, evento, login
+
+
+@pytest.fixture(autouse=True)
+def rate_limits_on(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'RATE_LIMIT_ENABLED', True)
+
+
+def client_from(app, ip):
+    client = app.test_client()
+    client.environ_base['REMOTE_ADDR'] = ip
+    return client
+
+
+def test_login_attempts_are_limited_per_account(app):
+    email = f'{uuid.uuid4().hex[:8]}@example.com'
+    capacity = app.config['RATE_LIMITS']['login_user']['user'][0]
+    responses = [login(client_from(app, f'10.1.0.{i}'), email, 'wrong') for i in range(capacity + 1)]
+    assert all(r.status_code == 302 for r in responses[:capacity])
+    assert responses[-1].status_code == 429 and int(responses[-1].headers['Retry-After']) >= 1
+
+
+def test_registration_is_limited_per_ip(app):
+    client = client_from(app, '10.2.0.1')
+    capacity = app.config['RATE_LIMITS']['register_user']['ip'][0]
+    statuses = [client.post('/register_user', data={'email': f'{i}@x', 'password': 'a', 'confirm_password': 'b'}).status_code
+                for i in range(capacity + 1)]
+    assert statuses == [302] * capacity + [429]
+
+
+def test_throttled_booking_gets_a_json_error(app, user_client, monkeypatch):
+    monkeypatch.setitem(app.config, 'RATE_LIMITS', {'create_booking': {'user': (1, 60)}})
+    book(user_client)
+    response = user_client.post('/create_booking', json={})
+    assert response.status_code == 429 and response.get_json()['success'] is False
+
+
+def test_bucket_refills_over_time(app):
+    key = f'test:{uuid.uuid4().hex}'
+    with app.test_request_context():
+        assert evento.take_token(key, 2, 0.2) == 0
+        assert evento.take_token(key, 2, 0.2) == 0
+        assert 0 < evento.take_token(key, 2, 0.2) <= 0.1
+        evento.time.sleep(0.12)
+        assert evento.take_token(key, 2, 0.2) == 0
+
+
+def test_limiter_fails_open(app, monkeypatch):
+    def broken(*args):
+        raise sqlite3.OperationalError('disk I/O error')
+    monkeypatch.setattr(evento, 'take_token', broken)
+    assert login(client_from(app, '10.3.0.1'), 'nobody@example.com', 'x').status_code == 302
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+from conftest import evento
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_json_response_matches_jsonify(app, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(evento, 'orjson', None)
+    payload = {'success': True, 'zeta': [{'price': 10, 'id': 2, 'name': 'Hall'}], 'alpha': None}
+    with app.test_request_context():
+        fast = evento.json_response(payload)
+        reference = evento.jsonify(payload)
+    assert fast.mimetype == 'application/json'
+    assert fast.get_data().strip() == reference.get_data().strip()
+
+
+@pytest.mark.parametrize('path, fields', [
+    ('/api/services', evento.SERVICE_FIELDS),
+    ('/api/halls', evento.HALL_FIELDS),
+    ('/api/packages', evento.PACKAGE_FIELDS),
+])
+def test_catalog_lists_return_sorted_records(client, path, fields):
+    response = client.get(path)
+    rows = response.get_json()
+    assert rows
+    for row in rows:
+        assert list(row) == sorted(fields)
+    assert json.loads(response.get_data()) == rows
+
+
+def test_admin_catalog_lists_include_inactive_flag(admin_client):
+    data = admin_client.get('/admin/services').get_json()
+    assert data['success']
+    assert set(data['services'][0]) == set(evento.SERVICE_FIELDS) | {'is_active'}
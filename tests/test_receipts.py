@@ -0,0 +1,72 @@
+import os
+
+from conftest import book, evento
+
+
+def run_jobs():
+    evento.work(burst=True)
+
+
+def receipt_files(booking_id):
+    receipt_dir = evento.app.config['RECEIPT_DIR']
+    return [name for name in os.listdir(receipt_dir) if name.startswith(booking_id)]
+
+
+def test_pdf_is_rendered_in_the_background(user_client):
+    booking_id = book(user_client)
+    run_jobs()
+    response = user_client.get(f'/booking_receipt/{booking_id}/pdf')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert response.data.startswith(b'%PDF-1.4') and booking_id.encode() in response.data
+
+
+def test_missing_pdf_is_queued_instead_of_rendered_inline(user_client):
+    booking_id = book(user_client)
+    response = user_client.get(f'/booking_receipt/{booking_id}/pdf')
+    assert response.status_code == 202 and response.headers['Retry-After']
+    run_jobs()
+    assert user_client.get(f'/booking_receipt/{booking_id}/pdf').status_code == 200
+
+
+def test_changed_booking_replaces_its_pdf(user_client, admin_client):
+    booking_id = book(user_client)
+    run_jobs()
+    before = receipt_files(booking_id)
+    admin_client.post('/admin/update_booking_status', json={'booking_id': booking_id, 'status': 'cancelled'})
+    with evento.app.app_context():
+        evento.generate_receipt_pdf(booking_id)
+    after = receipt_files(booking_id)
+    assert len(before) == len(after) == 1 and before != after
+    assert b'Status: cancelled' in user_client.get(f'/booking_receipt/{booking_id}/pdf').data
+
+
+def test_pdf_text_is_escaped():
+    pdf = evento.build_pdf([('Total (incl. tax) \\ ₹100', True)])
+    assert b'Total \\(incl. tax\\) \\\\ Rs. 100' in pdf
+
+
+def receipt_jobs(booking_id):
+    with evento.app.app_context():
+        return evento.Job.query.filter(evento.Job.name == 'receipt_pdf',
+                                       evento.Job.payload.contains(booking_id)).all()
+
+
+def test_polling_for_a_missing_pdf_queues_one_render(user_client):
+    booking_id = book(user_client)
+    for _ in range(3):
+        assert user_client.get(f'/booking_receipt/{booking_id}/pdf').status_code == 202
+    assert [job.status for job in receipt_jobs(booking_id)] == ['queued']
+
+
+def test_render_started_before_a_change_does_not_block_a_new_one(user_client, admin_client):
+    booking_id = book(user_client)
+    with evento.app.app_context():
+        job = receipt_jobs(booking_id)[0]
+        evento.Job.query.filter_by(id=job.id).update({'status': 'running', 'locked_at': evento.datetime(2000, 1, 1)})
+        evento.db.session.commit()
+    assert user_client.get(f'/booking_receipt/{booking_id}/pdf').status_code == 202
+    assert sorted(job.status for job in receipt_jobs(booking_id)) == ['queued', 'running']
+    with evento.app.app_context():
+        evento.Job.query.filter_by(id=job.id).update({'status': 'done'})
+        evento.db.session.commit()
@@ -0,0 +1,62 @@
+import uuid
+
+from conftest import book, evento
+
+
+def rollup_rows(conn):
+    return conn.exec_driver_sql('SELECT * FROM booking_daily_rollup ORDER BY 1, 2, 3, 4, 5, 6').all()
+
+
+def assert_rollups_match_a_rebuild():
+    with evento.app.app_context():
+        conn = evento.db.session.connection()
+        maintained = rollup_rows(conn)
+        evento.rebuild_booking_rollups(conn)
+        rebuilt = rollup_rows(conn)
+        evento.db.session.rollback()
+    assert maintained == rebuilt
+
+
+def report(client, **params):
+    return client.get('/admin/reports/range', query_string=params).get_json()
+
+
+def test_triggers_keep_rollups_exact(admin_client, user_client):
+    kind = f'gala-{uuid.uuid4().hex[:6]}'
+    ids = [book(user_client, event_type=kind, guests=10 * i, hall_price=100 * i) for i in (1, 2, 3)]
+    assert_rollups_match_a_rebuild()
+    admin_client.post('/admin/update_booking_status', json={'booking_id': ids[0], 'status': 'cancelled'})
+    assert_rollups_match_a_rebuild()
+    with evento.app.app_context():
+        evento.Booking.query.filter_by(booking_id=ids[1]).delete()
+        evento.db.session.commit()
+    assert_rollups_match_a_rebuild()
+    rows = report(admin_client, event_type=kind, group_by='status')['rows']
+    assert rows == [
+        {'status': 'cancelled', 'bookings': 1, 'guests': 10, 'revenue': 100},
+        {'status': 'confirmed', 'bookings': 1, 'guests': 30, 'revenue': 300},
+    ]
+
+
+def test_report_range_groups_and_filters(admin_client, user_client):
+    kind = f'expo-{uuid.uuid4().hex[:6]}'
+    book(user_client, event_type=kind, hall_name='Grand Mumbai Hall', hall_price=500)
+    book(user_client, event_type=kind, hall_name='Andheri Business Hub', hall_price=700)
+    today = evento.date.today().isoformat()
+    rows = report(admin_client, event_type=kind, group_by='day,hall', start=today, end=today)['rows']
+    assert [(r['day'], r['hall'], r['revenue']) for r in rows] == [
+        (today, 'Andheri Business Hub', 700), (today, 'Grand Mumbai Hall', 500)]
+    assert report(admin_client, event_type=kind, end='2000-01-01')['rows'] == []
+
+
+def test_dashboard_report_counts_from_rollups(admin_client, user_client):
+    kind = f'fete-{uuid.uuid4().hex[:6]}'
+    book(user_client, event_type=kind)
+    book(user_client, event_type=kind)
+    event_types = admin_client.get('/admin/reports').get_json()['event_types']
+    assert {'type': kind, 'count': 2} in event_types
+
+
+def test_report_range_validates_parameters(admin_client):
+    assert admin_client.get('/admin/reports/range?group_by=weekday').status_code == 400
+    assert admin_client.get('/admin/reports/range?start=yesterday').status_code == 400
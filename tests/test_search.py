@@ -0,0 +1,56 @@
+import uuid
+
+from conftest import book
+
+
+def search(client, q, **params):
+    return client.get('/admin/search', query_string={'q': q, **params}).get_json()
+
+
+def test_search_finds_bookings_by_prefix(admin_client):
+    name = 'Zephyr' + uuid.uuid4().hex[:6]
+    booking_id = book(admin_client, first_name=name)
+    result = search(admin_client, name[:5].lower())
+    assert booking_id in [r['booking_id'] for r in result['results']]
+    hit = next(r for r in result['results'] if r['booking_id'] == booking_id)
+    assert '<mark>' in hit['snippet']
+
+
+def test_search_follows_status_updates(admin_client):
+    name = 'Quill' + uuid.uuid4().hex[:6]
+    booking_id = book(admin_client, first_name=name, special_requests='needs ramp')
+    admin_client.post('/admin/update_booking_status', json={'booking_id': booking_id, 'status': 'cancelled'})
+    hit = search(admin_client, name)['results'][0]
+    assert hit['booking_id'] == booking_id and hit['status'] == 'cancelled'
+
+
+def test_search_query_syntax_is_escaped(admin_client):
+    for q in ['"', 'a OR', 'NEAR(', '*', '-x']:
+        assert search(admin_client, q)['success']
+
+
+def test_search_paginates(admin_client):
+    name = 'Pager' + uuid.uuid4().hex[:6]
+    for _ in range(3):
+        book(admin_client, first_name=name)
+    first = search(admin_client, name, per_page=2)
+    second = search(admin_client, name, per_page=2, page=2)
+    assert first['has_more'] and not second['has_more']
+    assert len(first['results']) + len(second['results']) == 3
+
+
+def test_search_requires_admin(user_client):
+    assert not search(user_client, 'anything')['success']
+
+
+def test_snippet_escapes_booking_text_but_keeps_highlights(admin_client):
+    name = 'Umber' + uuid.uuid4().hex[:6]
+    booking_id = book(admin_client, first_name=f'<img src=x onerror=alert(1)>{name}')
+    hit = next(r for r in search(admin_client, name)['results'] if r['booking_id'] == booking_id)
+    assert '<img' not in hit['snippet']
+    assert '&lt;img' in hit['snippet'] and '<mark>' in hit['snippet']
+
+
+def test_admin_page_shows_search_snippets(admin_client):
+    page = admin_client.get('/admin/dashboard').get_data(as_text=True)
+    assert 'class="search-snippet"' in page
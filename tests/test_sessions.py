@@ -0,0 +1,58 @@
+import uuid
+
+from flask import session
+
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD, evento, login
+
+
+def session_cookie(client):
+    return client.get_cookie('session').value
+
+
+def test_session_is_shared_through_the_store(app, admin_client):
+    cookie = session_cookie(admin_client)
+    other_worker = app.test_client()
+    other_worker.set_cookie('session', cookie)
+    assert other_worker.get('/check_login').get_json()['logged_in']
+
+
+def test_cookie_carries_only_a_signed_session_id(admin_client):
+    sid = evento.app.session_interface._signer(evento.app).unsign(session_cookie(admin_client)).decode()
+    with evento.app.app_context():
+        assert evento.db.session.get(evento.ServerSession, sid) is not None
+
+
+def test_login_issues_a_new_session_id(client):
+    client.get('/check_login')
+    client.set_cookie('session', evento.app.session_interface._signer(evento.app).sign('fixated').decode())
+    login(client, ADMIN_EMAIL, ADMIN_PASSWORD)
+    assert evento.app.session_interface._signer(evento.app).unsign(session_cookie(client)) != b'fixated'
+
+
+def test_logout_revokes_the_session_everywhere(app, admin_client):
+    cookie = session_cookie(admin_client)
+    admin_client.get('/logout')
+    replay = app.test_client()
+    replay.set_cookie('session', cookie)
+    assert not replay.get('/check_login').get_json()['logged_in']
+
+
+def test_tampered_cookie_is_ignored(client):
+    client.set_cookie('session', 'not-a-signed-id')
+    assert not client.get('/check_login').get_json()['logged_in']
+
+
+def test_saving_the_session_never_commits_leftover_view_state(app, client, monkeypatch):
+    name = f'Uncommitted {uuid.uuid4().hex[:8]}'
+
+    def failed_view():
+        session['note'] = 'seen'
+        evento.db.session.add(evento.Service(name=name, price=1, category='x'))
+        evento.db.session.flush()
+        return {'success': False}  # error path that forgot to roll back
+
+    monkeypatch.setitem(app.view_functions, 'check_login', failed_view)
+    client.get('/check_login')
+    assert client.get_cookie('session') is not None  # the session itself was saved
+    with app.app_context():
+        assert evento.Service.query.filter_by(name=name).count() == 0
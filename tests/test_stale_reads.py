@@ -0,0 +1,114 @@
+import contextlib
+import sqlite3
+
+import pytest
+import sqlalchemy as sa
+
+from conftest import evento
+
+
+@contextlib.contextmanager
+def database_locked(app):
+    with app.app_context():
+        path = evento.db.engine.url.database
+    locker = sqlite3.connect(path, isolation_level=None)
+    locker.execute('BEGIN EXCLUSIVE')
+    try:
+        yield
+    finally:
+        locker.execute('ROLLBACK')
+        locker.close()
+
+
+def test_catalog_list_is_served_stale_while_the_database_is_locked(app, client):
+    fresh = client.get('/api/packages?stale-test=1')
+    assert fresh.status_code == 200
+    with database_locked(app):
+        stale = client.get('/api/packages?stale-test=1')
+    assert stale.status_code == 200
+    assert stale.headers['X-Cache'] == 'STALE'
+    assert stale.get_json() == fresh.get_json()
+
+
+@contextlib.contextmanager
+def write_in_progress(app):
+    """Another connection holding the write lock with an uncommitted write"""
+    with app.app_context():
+        path = evento.db.engine.url.database
+    writer = sqlite3.connect(path, isolation_level=None)
+    writer.execute('BEGIN IMMEDIATE')
+    writer.execute("INSERT INTO cache_version (name, version) VALUES ('stale-test-writer', 1)")
+    try:
+        yield
+    finally:
+        writer.execute('ROLLBACK')
+        writer.close()
+
+
+@pytest.fixture
+def locked_data_reads(monkeypatch):
+    """Catalog and rollup reads (the ones run under a read budget) find the
+    database locked, as when that write commits or spills its cache"""
+    @contextlib.contextmanager
+    def locked(budget_ms):
+        raise sa.exc.OperationalError('SELECT', {}, sqlite3.OperationalError('database is locked'))
+        yield
+
+    def lock():
+        monkeypatch.setattr(evento, 'read_budget', locked)
+    return lock
+
+
+@pytest.mark.parametrize('endpoint', ['mainhome', 'admin_reports', 'admin_report_range'])
+def test_pages_behind_a_login_are_not_cached_whole(app, endpoint):
+    assert not hasattr(app.view_functions[endpoint], '__wrapped__')
+
+
+def test_pages_render_from_stale_data_during_a_write(app, admin_client, locked_data_reads):
+    paths = ['/admin/reports', '/admin/reports/range?group_by=status,event_type']
+    fresh = {path: admin_client.get(path) for path in paths}
+    assert all(response.get_json()['success'] and 'X-Cache' not in response.headers
+               for response in fresh.values())
+    assert admin_client.get('/mainhome').status_code == 200
+
+    locked_data_reads()
+    with write_in_progress(app):
+        for path in paths:
+            stale = admin_client.get(path)
+            assert stale.headers['X-Cache'] == 'STALE' and int(stale.headers['Age']) >= 0
+            assert stale.get_json() == fresh[path].get_json()
+        home = admin_client.get('/mainhome')
+        assert home.status_code == 200 and home.headers['X-Cache'] == 'STALE'
+
+
+def test_permission_checks_stay_live_during_a_write(app, admin_client, user_client, locked_data_reads):
+    admin_client.get('/admin/reports')
+    assert user_client.get('/mainhome').status_code == 200
+    locked_data_reads()
+    with write_in_progress(app):
+        response = user_client.get('/admin/reports')
+        assert response.get_json() == {'success': False, 'message': 'Unauthorized'}
+        assert 'X-Cache' not in response.headers
+        assert user_client.get('/mainhome').headers['X-Cache'] == 'STALE'
+
+
+def test_logged_out_session_does_not_authenticate_while_the_database_is_locked(app, user_client, monkeypatch):
+    cookie = user_client.get_cookie('session').value
+    assert user_client.get('/check_login').get_json()['logged_in']
+    user_client.get('/logout')
+
+    store = evento.app.session_interface.get_store(app)
+    real_execute = evento.db.session.execute
+
+    def locked(statement, *args, **kwargs):
+        if 'server_session' in str(statement):
+            raise sa.exc.OperationalError(str(statement), {}, sqlite3.OperationalError('database is locked'))
+        return real_execute(statement, *args, **kwargs)
+
+    with app.app_context():
+        monkeypatch.setattr(evento.db.session, 'execute', locked)
+        sid = evento.app.session_interface._signer(app).unsign(cookie).decode()
+        with pytest.raises(sa.exc.OperationalError):
+            store.get(sid)
+        monkeypatch.undo()
+        assert store.get(sid) is None
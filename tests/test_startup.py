@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+from conftest import ADMIN_EMAIL, evento
+
+
+def test_import_does_no_database_work_or_output(tmp_path):
+    db_path = tmp_path / 'cold.db'
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', RATE_LIMIT_DB=str(tmp_path / 'rl.db'))
+    result = subprocess.run([sys.executable, '-c', 'import app'], cwd=os.path.dirname(evento.__file__),
+                            env=env, capture_output=True, text=True, check=True)
+    assert result.stdout == ''
+    assert not db_path.exists()
+
+
+def test_init_db_is_idempotent(app):
+    with app.app_context():
+        evento.init_db()
+        evento.init_db()
+        assert evento.User.query.filter_by(email=ADMIN_EMAIL).count() == 1
+        assert evento.Hall.query.filter_by(name='Grand Mumbai Hall').count() == 1
+
+
+def test_first_request_initializes_lazily(client):
+    assert client.get('/api/halls').status_code == 200
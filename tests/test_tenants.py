@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import ADMIN_EMAIL, ADMIN_PASSWORD, book, evento, login, register
+
+ACME = '/t/acme'
+ACME_ADMIN = 'admin@acme.example.com'
+
+
+@pytest.fixture(scope='module')
+def acme(app):
+    result = app.test_cli_runner().invoke(args=[
+        'create-tenant', 'acme', 'Acme Events', '--admin-email', ACME_ADMIN,
+        '--admin-password', 'acme-secret', '--sample-catalog'])
+    assert result.exit_code == 0, result.output
+    evento.reset_tenant_directory()
+    with app.app_context():
+        return evento.Tenant.query.filter_by(slug='acme').one().id
+
+
+@pytest.fixture
+def acme_admin(app, acme):
+    client = app.test_client()
+    login(client, ACME_ADMIN, 'acme-secret', prefix=ACME)
+    return client
+
+
+@pytest.fixture
+def default_admin(app):
+    client = app.test_client()
+    login(client, ADMIN_EMAIL, ADMIN_PASSWORD)
+    return client
+
+
+def acme_booking(app):
+    client = app.test_client()
+    register(client, prefix=ACME)
+    return book(client, prefix=ACME)
+
+
+def test_logins_do_not_cross_tenants(app, acme):
+    client = app.test_client()
+    login(client, ACME_ADMIN, 'acme-secret')
+    assert not client.get('/check_login').get_json()['logged_in']
+    login(client, ACME_ADMIN, 'acme-secret', prefix=ACME)
+    assert client.get(f'{ACME}/check_login').get_json()['logged_in']
+
+
+def test_bookings_are_only_visible_to_their_tenant(app, acme_admin, default_admin):
+    booking_id = acme_booking(app)
+    acme_ids = {b['booking_id'] for b in acme_admin.get(f'{ACME}/admin/bookings').get_json()['bookings']}
+    default_ids = {b['booking_id'] for b in default_admin.get('/admin/bookings').get_json()['bookings']}
+    assert booking_id in acme_ids
+    assert booking_id not in default_ids
+    assert not default_admin.get(f'/admin/view_booking/{booking_id}').get_json()['success']
+
+
+def test_jobs_are_listed_per_tenant(acme, acme_admin, default_admin):
+    assert acme_admin.post(f'{ACME}/admin/clear_old_data').get_json()['success']
+    acme_jobs = acme_admin.get(f'{ACME}/admin/jobs?limit=500').get_json()
+    default_jobs = default_admin.get('/admin/jobs?limit=500').get_json()
+    with evento.app.app_context():
+        owners = dict(evento.db.session.query(evento.Job.id, evento.Job.tenant_id))
+    assert acme_jobs['jobs'] and all(owners[job['id']] == acme for job in acme_jobs['jobs'])
+    assert all(owners[job['id']] != acme for job in default_jobs['jobs'])
+    assert sum(acme_jobs['counts'].values()) == sum(1 for owner in owners.values() if owner == acme)
+
+
+def test_purge_job_only_touches_its_own_tenant(app, acme, user_client):
+    default_id = book(user_client)
+    acme_id = acme_booking(app)
+    long_ago = datetime.now() - timedelta(days=800)
+    with app.app_context():
+        evento.Booking.query.filter(evento.Booking.booking_id.in_((default_id, acme_id))).update(
+            {'status': 'completed', 'created_at': long_ago})
+        evento.db.session.add(evento.BookingTombstone(tenant_id=evento.DEFAULT_TENANT_ID, booking_id='EVT-OLD',
+                                                      deleted_at=datetime.utcnow() - timedelta(days=400)))
+        evento.db.session.commit()
+        job = evento.Job(tenant_id=acme, name='purge_old_bookings', payload='{"days": 365}', priority=100)
+        evento.db.session.add(job)
+        evento.db.session.commit()
+        job_id = job.id
+
+    evento.work(burst=True)
+
+    with app.app_context():
+        assert evento.db.session.get(evento.Job, job_id).status == 'done'
+        remaining = {b.booking_id for b in evento.Booking.query.filter(
+            evento.Booking.booking_id.in_((default_id, acme_id)))}
+        assert remaining == {default_id}
+        assert evento.BookingTombstone.query.filter_by(booking_id='EVT-OLD').count() == 1
+
+
+@pytest.mark.parametrize('method, path', [
+    ('post', '/admin/backup'),
+    ('get', '/admin/queries'),
+    ('get', '/admin/profiles'),
+])
+def test_platform_tools_are_limited_to_default_tenant_admins(acme_admin, default_admin, method, path):
+    response = getattr(acme_admin, method)(f'{ACME}{path}').get_json()
+    assert response == {'success': False, 'message': 'Unauthorized'}
+    if method == 'get':
+        assert default_admin.get(path).get_json()['success']